@@ -1,10 +1,14 @@
 """
 Bayesian Network class
 """
+from uuid import uuid4
+
 import numpy as np
 from .directed_acyclic_graph import DirectedAcyclicGraph
 from .particles.particle import Particle
+from .particles.particle_set import ParticleSet
 from .conditional_probability_table import ConditionalProbabilityTable
+from .domains import DomainRegistry
 
 class BayesianNetwork(DirectedAcyclicGraph):
     """
@@ -13,9 +17,17 @@ class BayesianNetwork(DirectedAcyclicGraph):
     Parameters:
         random_variables: dict[str, RandomVariable]. Optional.
             Dictionary mapping variable names to RandomVariable objects.
+
+    Attributes:
+        network_id: str
+            Identifies this network among others.
+        version: integer
+            Incremented every time a node or an edge gets added.
     """
     def __init__(self, random_variables=None):
         super().__init__()
+        self.network_id = uuid4().hex
+        self.version = 0
         if random_variables is None:
             self.random_variables = {}
         else:
@@ -41,6 +53,7 @@ class BayesianNetwork(DirectedAcyclicGraph):
         if rv.name is None:
             raise ValueError("Random variable must have a name")
         self.random_variables[rv.name] = rv
+        self.version += 1
         super().add_node(rv.name)
 
         # For CPTs, add edges based on givens
@@ -48,10 +61,12 @@ class BayesianNetwork(DirectedAcyclicGraph):
             for parent_name in rv.get_givens():
                 self.add_edge(parent_name, rv.name)
         else:
-            # Add edges for parent relationships
-            for parent_name, parent in rv.get_parents().items():
-                if parent_name:
-                    self.add_edge(parent_name, rv.name)
+            # Add edges for parent relationships. Keys of get_parents could
+            # be parameter names (e.g. 'mean'), so the edge starts at the
+            # name of the parent itself.
+            for parent in rv.get_parents().values():
+                if parent.name:
+                    self.add_edge(parent.name, rv.name)
 
     def add_edge(self, parent_name, child_name):
         """
@@ -61,6 +76,27 @@ class BayesianNetwork(DirectedAcyclicGraph):
             child_name: str
         """
         super().add_edge(parent_name, child_name)
+        self.version += 1
+
+    def get_fingerprint(self):
+        """
+        Identifies the current state of the network. Changes whenever the
+        network gets mutated through add_node or add_edge, or the data of
+        one of its CPTs gets written (see the version of the Data classes).
+        Writing into a DataFrame returned by read goes unnoticed.
+
+        Returns: tuple (str, integer, tuple[integer])
+            The network_id, the version, and the version of the data of each
+            random variable (0 when it has none).
+        """
+        return (
+            self.network_id,
+            self.version,
+            tuple(
+                getattr(getattr(rv, 'data', None), 'version', 0)
+                for rv in self.random_variables.values()
+            )
+        )
 
     def get_random_variables(self):
         """
@@ -73,13 +109,23 @@ class BayesianNetwork(DirectedAcyclicGraph):
     def __repr__(self):
         return f"BayesianNetwork(\n\t{self.random_variables}\n)"
 
-    def sample(self):
+    def sample(self, n=None):
         """
         Perform forward sampling from the Bayesian Network.
         Samples each variable in topological order, using parent values as needed.
+        Parameters:
+            n: int, optional
+                Number of samples. If given, each variable gets sampled once
+                for the whole batch, with arrays of parent values (see
+                ConditionalProbabilityTable.sample_batch).
         Returns:
-            Particle: A particle containing sampled values for all variables
+            Particle: A particle containing sampled values for all variables.
+                If n is given, a ParticleSet instead, with one array of
+                values per variable.
         """
+        if n is not None:
+            return self.__sample_batch__(n)
+
         sorted_vars = self.topological_sort()
         particle = Particle()
         for var in sorted_vars:
@@ -107,10 +153,10 @@ class BayesianNetwork(DirectedAcyclicGraph):
                         parent_values[parent_name] = parent_val
             else:
                 # For other random variables, get parent values from parent objects
-                for parent in rv.get_parents():
+                for param, parent in rv.get_parents().items():
                     if not particle.has_variable(parent.name):
                         raise ValueError(f"Parent variable {parent.name} not yet sampled")
-                    parent_values[parent.name] = particle.get_value(parent.name)
+                    parent_values[param] = particle.get_value(parent.name)
 
             # Sample from the random variable
             sampled_value = rv.sample(**parent_values)
@@ -122,13 +168,68 @@ class BayesianNetwork(DirectedAcyclicGraph):
                 particle.set_value(var, sampled_value)
         return particle
 
-    def to_markov_network(self):
+    def __sample_batch__(self, n):
+        columns = {}
+
+        for var in self.topological_sort():
+            rv = self.random_variables[var]
+
+            if hasattr(rv, 'sample_batch'):
+                parent_values = {}
+
+                for parent_name in rv.get_givens():
+                    parent_val = columns[parent_name]
+                    parent_rv = self.random_variables.get(parent_name)
+
+                    # Discretize parent values for CPTs
+                    if parent_rv.__class__.__name__ == 'Uniform':
+                        parent_val = (parent_val > 0.5).astype(int)
+                    elif parent_rv.__class__.__name__ == 'Normal':
+                        parent_val = (parent_val > 0).astype(int)
+
+                    parent_values[parent_name] = parent_val
+
+                columns.update(
+                    rv.sample_batch(given_values=parent_values, size=n)
+                )
+            else:
+                # Parent samples are passed as arrays, which NumPy broadcasts.
+                parent_values = {
+                    param: columns[parent.name]
+                    for param, parent in rv.get_parents().items()
+                }
+                columns[var] = np.broadcast_to(
+                    rv.sample(size=n, **parent_values), (n,)
+                )
+
+        return ParticleSet.from_columns(columns)
+
+    def to_markov_network(
+        self,
+        factor_class=None,
+        encode_domains=False,
+        storage_policy=None,
+    ):
         """
         Convert Bayesian Network to Markov Network.
 
         This method assumes all random variables are ConditionalProbabilityTables.
         Each CPT is converted to a Factor and added to the Markov Network.
 
+        Parameters:
+            factor_class: class. Defaults to Factor.
+                The class used to wrap each CPT (e.g. Factor or DenseFactor).
+                It must accept cpt and data keyword arguments.
+            encode_domains: bool. Defaults to False.
+                If True, builds a DomainRegistry out of the values of every
+                CPT, and the factors store integer codes instead of the raw
+                values. The registry is available as the domain_registry
+                attribute of the Markov Network.
+            storage_policy: StoragePolicy. Optional.
+                Passed to each factor, to pick where the data of the factors
+                derived from it get stored. Only for factor classes that
+                accept a storage_policy keyword argument, e.g. Factor.
+
         Returns:
             MarkovNetwork: The converted Markov Network
 
@@ -147,12 +248,40 @@ class BayesianNetwork(DirectedAcyclicGraph):
                     "to_markov_network() only works with CPTs."
                 )
 
+        if factor_class is None:
+            factor_class = Factor
+
+        kwargs = {}
+        if storage_policy is not None:
+            kwargs['storage_policy'] = storage_policy
+
         # Create Markov Network
         markov_network = MarkovNetwork()
 
-        # Convert each CPT to a Factor and add to Markov Network
+        if not encode_domains:
+            # Convert each CPT to a Factor and add to Markov Network
+            for rv in self.random_variables.values():
+                factor = factor_class(cpt=rv, **kwargs)
+                markov_network.add_factor(factor)
+
+            return markov_network
+
+        registry = DomainRegistry()
         for rv in self.random_variables.values():
-            factor = Factor(cpt=rv)
+            registry.add_df(rv.get_data().read())
+
+        for rv in self.random_variables.values():
+            data = rv.get_data()
+            factor = factor_class(
+                data=data.__class__(
+                    registry.encode_df(data.read()),
+                    storage_folder=data.get_storage_folder(),
+                    temporary=True
+                ),
+                **kwargs
+            )
             markov_network.add_factor(factor)
 
+        markov_network.domain_registry = registry
+
         return markov_network
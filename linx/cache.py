@@ -0,0 +1,309 @@
+"""
+Cache module
+"""
+from collections import OrderedDict
+from threading import RLock
+from uuid import uuid4
+
+import pandas as pd
+import pyarrow.feather as feather
+
+from .settings import is_copy_on_write
+
+
+class LRUCache:
+    """
+    Least-recently-used cache with an optional cap on the number of entries
+    and on the total byte size of the entries.
+
+    Parameters:
+        max_entries: integer. Optional.
+            Maximum number of entries. None means no limit.
+
+        max_bytes: integer. Optional.
+            Maximum total byte size of the entries. None means no limit.
+            Values bigger than max_bytes are never stored.
+
+        on_evict: callable. Optional.
+            Called with the key and the value of every entry that gets
+            evicted to make room for newer ones.
+    """
+    def __init__(self, max_entries=None, max_bytes=None, on_evict=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = RLock()
+
+    def __repr__(self):
+        return f"LRUCache({self.get_stats()})"
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, default=None):
+        """
+        Look up a key, marking it as recently used.
+
+        Parameters:
+            key: hashable
+
+            default: any
+                Returned on a miss.
+
+        Returns: any
+        """
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self.entries.move_to_end(key)
+
+            return self.entries[key][0]
+
+    def put(self, key, value, nbytes=0):
+        """
+        Store a value, evicting the least recently used entries if the cache
+        goes over its limits.
+
+        Parameters:
+            key: hashable
+
+            value: any
+
+            nbytes: integer. Defaults to 0.
+                Byte size of the value.
+
+        Returns: bool
+            False if the value is too big to ever fit, True otherwise.
+        """
+        with self.lock:
+            if self.max_bytes is not None and nbytes > self.max_bytes:
+                return False
+
+            self.remove(key)
+
+            self.entries[key] = (value, nbytes)
+            self.bytes += nbytes
+
+            while self.entries and (
+                (
+                    self.max_entries is not None
+                    and len(self.entries) > self.max_entries
+                ) or (
+                    self.max_bytes is not None
+                    and self.bytes > self.max_bytes
+                )
+            ):
+                evicted_key, (evicted, evicted_bytes) = \
+                    self.entries.popitem(last=False)
+                self.bytes -= evicted_bytes
+                self.evictions += 1
+
+                if self.on_evict is not None:
+                    self.on_evict(evicted_key, evicted)
+
+            return True
+
+    def remove(self, key):
+        """
+        Remove an entry, if it exists. Not counted as an eviction.
+
+        Parameters:
+            key: hashable
+        """
+        with self.lock:
+            if key in self.entries:
+                _, nbytes = self.entries.pop(key)
+                self.bytes -= nbytes
+
+    def invalidate(self, predicate):
+        """
+        Remove every entry whose key satisfies the predicate.
+
+        Parameters:
+            predicate: callable
+                Takes a key. Returns a boolean.
+        """
+        with self.lock:
+            for key in [key for key in self.entries if predicate(key)]:
+                self.remove(key)
+
+    def clear(self):
+        """
+        Remove every entry. The counters are kept.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def get_stats(self):
+        """
+        Returns: dict
+            hits, misses, evictions, entries, bytes, and hit_rate.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+class ParquetCache:
+    """
+    Read-through cache of decoded Parquet files, keyed by path. Parquet data
+    is written once, so entries don't get stale, as long as a path doesn't
+    get rewritten (ParquetData.write invalidates its path just in case).
+
+    Under Copy-on-Write, DataFrames handed out share their columns with the
+    cached one. Without it, they are deep copies (see InMemoryData).
+
+    Parameters:
+        max_bytes: integer
+            Budget of the decoded DataFrames kept in memory. The least
+            recently used ones get evicted past it.
+
+        spill_folder: Path-like object. Optional.
+            If given, evicted DataFrames get written there as uncompressed
+            Feather files, which are much faster to read back than Parquet.
+    """
+    def __init__(self, max_bytes, spill_folder=None):
+        self.spill_folder = spill_folder
+        self.spilled = {}
+        self.spill_hits = 0
+        self.lock = RLock()
+
+        self.cache = LRUCache(max_bytes=max_bytes, on_evict=self.__spill__)
+
+    def __repr__(self):
+        return f"ParquetCache({self.get_stats()})"
+
+    def __contains__(self, path):
+        return path in self.cache
+
+    def __spill__(self, path, df):
+        if self.spill_folder is None:
+            return
+
+        spill_path = self.spill_folder / f'{uuid4()}.arrow'
+        feather.write_feather(
+            df.reset_index(drop=True),
+            spill_path,
+            compression='uncompressed'
+        )
+
+        with self.lock:
+            self.spilled[path] = spill_path
+
+    def read(self, path):
+        """
+        Read a Parquet file, through the cache.
+
+        Parameters:
+            path: Path-like object
+
+        Returns: pd.DataFrame
+        """
+        df = self.cache.get(path)
+
+        if df is None:
+            with self.lock:
+                spill_path = self.spilled.pop(path, None)
+
+            if spill_path is None:
+                df = pd.read_parquet(path, engine='pyarrow')
+            else:
+                self.spill_hits += 1
+                df = feather.read_feather(spill_path)
+                spill_path.unlink()
+
+            self.cache.put(
+                path,
+                df,
+                nbytes=int(df.memory_usage(deep=True).sum())
+            )
+
+        return df.copy(deep=not is_copy_on_write())
+
+    def invalidate(self, path):
+        """
+        Forget a path.
+
+        Parameters:
+            path: Path-like object
+        """
+        self.cache.remove(path)
+
+        with self.lock:
+            spill_path = self.spilled.pop(path, None)
+
+        if spill_path is not None:
+            spill_path.unlink(missing_ok=True)
+
+    def clear(self):
+        """
+        Forget every path, and delete the spilled files.
+        """
+        self.cache.clear()
+
+        with self.lock:
+            spill_paths = list(self.spilled.values())
+            self.spilled.clear()
+
+        for spill_path in spill_paths:
+            spill_path.unlink(missing_ok=True)
+
+    def get_stats(self):
+        """
+        Returns: dict
+            The stats of LRUCache (hits, misses, evictions, entries, bytes,
+            hit_rate), plus spilled (number of spilled entries) and
+            spill_hits (misses that got served by a spilled file).
+        """
+        stats = self.cache.get_stats()
+
+        with self.lock:
+            stats['spilled'] = len(self.spilled)
+
+        stats['spill_hits'] = self.spill_hits
+
+        return stats
+
+
+PARQUET_CACHE = {
+    'cache': None,
+}
+
+
+def set_parquet_cache(cache):
+    """
+    Set the process-wide cache used by ParquetData.read.
+
+    Parameters:
+        cache: ParquetCache or None
+            None turns caching off, which is the default.
+    """
+    PARQUET_CACHE['cache'] = cache
+
+
+def get_parquet_cache():
+    """
+    Returns: ParquetCache or None
+    """
+    return PARQUET_CACHE['cache']
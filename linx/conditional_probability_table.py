@@ -5,6 +5,7 @@ import numpy as np
 import pandas as pd
 from .errors import ArgumentError
 from .random.random_variable import RandomVariable
+from .sampling_table import SamplingTable
 
 
 class ConditionalProbabilityTable(RandomVariable):
@@ -53,6 +54,8 @@ class ConditionalProbabilityTable(RandomVariable):
         self.givens = givens
         self.outcomes = outcomes
         self.data = data
+        self.sampling_table = None
+        self.sampling_version = None
 
         self.__validate__()
 
@@ -105,9 +108,48 @@ class ConditionalProbabilityTable(RandomVariable):
         """
         return self.outcomes
 
+    def get_sampling_table(self):
+        """
+        Compile the table for sampling, once per version of the data. See
+        SamplingTable.
+
+        Returns: SamplingTable
+        """
+        version = getattr(self.get_data(), 'version', 0)
+
+        if self.sampling_table is None or self.sampling_version != version:
+            self.sampling_table = SamplingTable(
+                self.get_data().read(),
+                outcomes=self.get_outcomes(),
+                givens=self.get_givens()
+            )
+            self.sampling_version = version
+
+        return self.sampling_table
+
+    def __check_given_values__(self, given_values):
+        givens = self.get_givens()
+
+        if not givens:
+            return
+
+        if not given_values:
+            raise ValueError(
+                f"Given variables {givens} are required but no "
+                + "given_values provided"
+            )
+
+        for given_var in givens:
+            if given_var not in given_values:
+                raise ValueError(
+                    f"Given variable {given_var} not provided in given_values"
+                )
+
     def sample_with_given_values(self, given_values=None):
         """
-        Sample a value from this conditional probability table.
+        Sample a value from this conditional probability table. Takes
+        constant time, through the alias tables of the compiled sampling
+        table.
 
         Parameters:
             given_values: dict, optional
@@ -117,47 +159,35 @@ class ConditionalProbabilityTable(RandomVariable):
         Returns:
             dict: Dictionary mapping outcome variable names to their sampled values
         """
-        # Get the data from the CPT
-        df = self.get_data().read()
-
-        # Get the outcome variables
-        outcomes = self.get_outcomes()
-
-        # Get the given variables (parents)
-        givens = self.get_givens()
+        self.__check_given_values__(given_values)
 
-        # Filter the dataframe based on the values of the given variables
-        if givens:
-            if not given_values:
-                raise ValueError(f"Given variables {givens} are required but no given_values provided")
+        return self.get_sampling_table().sample(given_values)
 
-            # Create a filter condition for each given variable
-            for given_var in givens:
-                if given_var not in given_values:
-                    raise ValueError(f"Given variable {given_var} not provided in given_values")
-
-                given_value = given_values[given_var]
-                df = df[df[given_var] == given_value]
+    def sample_batch(self, given_values=None, size=None):
+        """
+        Sample many values at once, one for each combination of values of
+        the given variables, through the alias tables of the compiled
+        sampling table, with no Python loop over the samples. The outcome
+        variables all come from the same sampled row.
 
-            # Check if we have any rows after filtering
-            if df.empty:
-                raise ValueError(f"No matching rows found for given values: {given_values}")
+        Parameters:
+            given_values: dict[str, array-like]. Optional.
+                Values of the given variables, one array per variable, all of
+                the same length.
 
-        # Sample from each outcome variable
-        sampled_values = {}
-        for outcome_var in outcomes:
-            # Extract the possible values and their probabilities for this outcome
-            possible_values = df[outcome_var].values
-            probabilities = df['value'].values
+            size: integer. Optional.
+                Number of samples. Required when there are no given
+                variables, ignored otherwise.
 
-            # Normalize probabilities to ensure they sum to 1
-            probabilities = probabilities / probabilities.sum()
+        Returns:
+            dict[str, np.ndarray]: Sampled values of each outcome variable.
+        """
+        self.__check_given_values__(given_values)
 
-            # Sample from the categorical distribution
-            sampled_value = np.random.choice(possible_values, p=probabilities)
-            sampled_values[outcome_var] = sampled_value
+        if not self.get_givens() and size is None:
+            raise ValueError("size is required when there are no givens")
 
-        return sampled_values
+        return self.get_sampling_table().sample_batch(given_values, size)
 
     def pdf(self, x, **kwargs):
         """
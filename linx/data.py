@@ -1,23 +1,48 @@
 """
 Data module
 """
+import os
+import shutil
 from uuid import uuid4
+import weakref
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
 
+from .cache import get_parquet_cache
 from .errors import ArgumentError
+from .settings import is_copy_on_write
 
 
 class InMemoryData:
     """
     Wraps a data object in memory only. Doesn't cache to disk.
 
+    Under Copy-on-Write (see linx.settings.is_copy_on_write), reads don't
+    copy the values: they return a new DataFrame object that shares the
+    stored columns, and writing into it copies them first. Without it, reads
+    always return a deep copy.
+
     Parameters:
         data: An object that implements
             - read_parquet
             - to_parquet
+
+        storage_folder: Ignored.
+
+        name: str. Optional.
+
+        temporary: bool. Ignored, since nothing is written to disk. Accepted
+            so that InMemoryData could be used like the other Data classes.
     """
-    def __init__(self, data, storage_folder=None, name=None):
+    def __init__(self, data, storage_folder=None, name=None, temporary=False):
+        if name is None:
+            self.name = uuid4()
+        else:
+            self.name = name
+
         self.columns = data.columns
         self.data = data
 
@@ -33,13 +58,17 @@ class InMemoryData:
         """
         return "NOTHING"
 
-    def read(self):
+    def read(self, copy=False):
         """
         Read the data.
 
+        Parameters:
+            copy: bool. Defaults to False.
+                If True, returns a deep copy, even under Copy-on-Write.
+
         Returns: data
         """
-        return self.data.copy()
+        return self.data.copy(deep=copy or not is_copy_on_write())
 
     def write(self, data):
         """
@@ -47,6 +76,73 @@ class InMemoryData:
         """
         pass
 
+    def get_nbytes(self):
+        """
+        Return: integer
+            Memory used by the data.
+        """
+        return int(self.data.memory_usage(deep=True).sum())
+
+
+def delete_path(path):
+    """
+    Delete the file or directory of some data, and drop it from the
+    ParquetCache, if any. Missing paths are ignored.
+
+    Parameters:
+        path: Path-like object
+    """
+    cache = get_parquet_cache()
+
+    if cache is not None:
+        cache.invalidate(path)
+
+    if path.is_dir():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        path.unlink(missing_ok=True)
+
+
+def filter_df(df, filters):
+    """
+    Apply filters in the (column, operator, value) format of pyarrow to a
+    DataFrame.
+
+    Parameters:
+        df: pd.DataFrame
+        filters: list[tuple] or None
+
+    Returns: pd.DataFrame
+    """
+    if not filters:
+        return df
+
+    mask = pd.Series(True, index=df.index)
+
+    for column, operator, value in filters:
+        values = df[column]
+
+        if operator in ['=', '==']:
+            mask = mask & (values == value)
+        elif operator == '!=':
+            mask = mask & (values != value)
+        elif operator == '<':
+            mask = mask & (values < value)
+        elif operator == '<=':
+            mask = mask & (values <= value)
+        elif operator == '>':
+            mask = mask & (values > value)
+        elif operator == '>=':
+            mask = mask & (values >= value)
+        elif operator == 'in':
+            mask = mask & values.isin(value)
+        elif operator == 'not in':
+            mask = mask & ~values.isin(value)
+        else:
+            raise ArgumentError(f"Unknown filter operator {operator}")
+
+    return df[mask]
+
 
 class ParquetData:
     """
@@ -57,8 +153,43 @@ class ParquetData:
         data: An object that implements
             - read_parquet
             - to_parquet
+
+        storage_folder: Path-like object
+
+        name: str. Optional.
+            Name of the file. Defaults to a uuid.
+
+        sort_by: list[str]. Optional.
+            Variables to sort the rows by before writing them, e.g. the ones
+            that are filtered on the most. Row groups then hold narrow ranges
+            of those variables, so that filtered reads skip most of them.
+            Defaults to every variable, in the order of the columns, so
+            tables that list the evidence variables first (e.g. the givens
+            of a CPT) get sorted by them. Pass [] to keep the order of the
+            rows.
+
+        row_group_size: integer. Optional.
+            Maximum number of rows per row group.
+
+        temporary: bool. Defaults to False.
+            If True, the file gets deleted once this object gets garbage
+            collected, i.e. once no factor refers to it anymore. Used for the
+            intermediate factors created by the operations of factors.
+
+    Attributes:
+        version: integer
+            Incremented every time the data gets written, so that caches
+            keyed on it (see BayesianNetwork.get_fingerprint) notice.
     """
-    def __init__(self, data, storage_folder, name=None):
+    def __init__(
+        self,
+        data,
+        storage_folder,
+        name=None,
+        sort_by=None,
+        row_group_size=None,
+        temporary=False,
+    ):
         if name is None:
             self.name = uuid4()
         else:
@@ -66,12 +197,22 @@ class ParquetData:
 
         self.storage_folder = storage_folder
         self.path = storage_folder / str(self.name)
+        if sort_by is None:
+            sort_by = [col for col in data.columns if col != 'value']
+
+        self.sort_by = sort_by
+        self.row_group_size = row_group_size
+        self.version = 0
 
         if self.path.exists():
             raise ArgumentError(f"{self.path} already exists")
 
         self.write(data)
         self.columns = data.columns
+        self.temporary = temporary
+
+        if temporary:
+            weakref.finalize(self, delete_path, self.path)
 
     def get_columns(self):
         """
@@ -85,16 +226,375 @@ class ParquetData:
         """
         return self.storage_folder
 
-    def read(self):
+    def read(self, copy=False, columns=None, filters=None):
         """
-        Read the data.
+        Read the data. If a process-wide ParquetCache is set (see
+        linx.cache.set_parquet_cache), the decoded DataFrame is read through
+        it, and shares its columns with the cached one, like with
+        InMemoryData.
+
+        Parameters:
+            copy: bool. Defaults to False.
+                If True, returns a DataFrame that is safe to mutate in
+                place.
+
+            columns: list[str]. Optional.
+                Only read these columns.
+
+            filters: list[tuple]. Optional.
+                Only read the rows that satisfy every (column, operator,
+                value) filter. Operators are the ones of pyarrow: ==, !=, <,
+                <=, >, >=, in, not in. They are pushed down to the reader,
+                which skips the row groups that could not match. If the file
+                is already cached, they get applied to the cached DataFrame
+                instead.
 
         Returns: data
         """
-        return pd.read_parquet(self.path, engine='pyarrow')
+        cache = get_parquet_cache()
+
+        if columns is not None or filters:
+            if cache is not None and self.path in cache:
+                df = filter_df(cache.read(self.path), filters)
+
+                if columns is not None:
+                    df = df[columns]
+
+                return df
+
+            return pd.read_parquet(
+                self.path,
+                engine='pyarrow',
+                columns=columns,
+                filters=filters or None
+            )
+
+        if cache is None:
+            return pd.read_parquet(self.path, engine='pyarrow')
+
+        df = cache.read(self.path)
+
+        if copy:
+            return df.copy(deep=True)
+
+        return df
+
+    def get_nbytes(self):
+        """
+        Return: integer
+            Size of the file on disk. Nothing is kept in memory.
+        """
+        return self.path.stat().st_size
 
     def write(self, data):
         """
         Write the data.
         """
-        data.to_parquet(self.path, engine='pyarrow')
+        self.version += 1
+        cache = get_parquet_cache()
+
+        if cache is not None:
+            cache.invalidate(self.path)
+
+        sort_by = [var for var in self.sort_by if var in data.columns]
+
+        if sort_by:
+            data = data.sort_values(sort_by)
+
+        data.to_parquet(
+            self.path,
+            engine='pyarrow',
+            index=False,
+            row_group_size=self.row_group_size
+        )
+
+
+class ArrowData:
+    """
+    Stores the data on disk as an uncompressed Arrow IPC (Feather V2) file,
+    and reads it through memory mapping. Nothing gets decompressed or
+    decoded, so reads are cheap, the pages are shared between processes that
+    read the same file, and the OS page cache decides what stays in RAM.
+
+    Like with InMemoryData, numeric columns of the DataFrames returned by
+    read share memory with the mapped file, so they must not be written into
+    in place. Use read(copy=True) to get a DataFrame that is safe to mutate.
+
+    Parameters:
+        data: pd.DataFrame
+
+        storage_folder: Path-like object
+
+        name: str. Optional.
+            Name of the file. Defaults to a uuid.
+
+        temporary: bool. Defaults to False.
+            If True, the file gets deleted once this object gets garbage
+            collected, i.e. once no factor refers to it anymore. Used for the
+            intermediate factors created by the operations of factors.
+
+    Attributes:
+        version: integer
+            Incremented every time the data gets written.
+    """
+    def __init__(self, data, storage_folder, name=None, temporary=False):
+        if name is None:
+            self.name = uuid4()
+        else:
+            self.name = name
+
+        self.storage_folder = storage_folder
+        self.path = storage_folder / str(self.name)
+        self.table = None
+        self.version = 0
+
+        if self.path.exists():
+            raise ArgumentError(f"{self.path} already exists")
+
+        self.write(data)
+        self.columns = data.columns
+        self.temporary = temporary
+
+        if temporary:
+            weakref.finalize(self, delete_path, self.path)
+
+    def get_columns(self):
+        """
+        Return: pd.Index
+        """
+        return self.columns
+
+    def get_storage_folder(self):
+        """
+        Return: Path-like object
+        """
+        return self.storage_folder
+
+    def get_table(self):
+        """
+        The memory-mapped Arrow table. The file gets mapped on the first
+        call only.
+
+        Return: pa.Table
+        """
+        if self.table is None:
+            self.table = feather.read_table(self.path, memory_map=True)
+
+        return self.table
+
+    def read(self, copy=False):
+        """
+        Read the data.
+
+        Parameters:
+            copy: bool. Defaults to False.
+                If True, returns a DataFrame that doesn't share memory with
+                the mapped file.
+
+        Returns: pd.DataFrame
+        """
+        df = self.get_table().to_pandas(split_blocks=True)
+
+        if copy:
+            return df.copy(deep=True)
+
+        return df
+
+    def get_nbytes(self):
+        """
+        Return: integer
+            Size of the file on disk. Pages get loaded on demand.
+        """
+        return self.path.stat().st_size
+
+    def write(self, data):
+        """
+        Write the data.
+        """
+        self.version += 1
+        # A table mapped before would still hold the old data.
+        self.table = None
+
+        # Writing over the mapped file in place would change the pages under
+        # the tables and DataFrames read before. Replacing it leaves them the
+        # old file, which gets freed once they're gone.
+        tmp_path = self.path.with_name(f'{self.path.name}.{uuid4()}.tmp')
+
+        feather.write_feather(
+            data.reset_index(drop=True),
+            tmp_path,
+            compression='uncompressed'
+        )
+
+        os.replace(tmp_path, self.path)
+
+
+class PartitionedParquetData:
+    """
+    Data stored as a directory of Parquet files, one per partition, so that
+    it could be processed one partition at a time without loading all of it
+    in RAM. Factors backed by it get multiplied, divided, summed, filtered
+    and normalized out of core (see linx.out_of_core).
+
+    Parameters:
+        data: pd.DataFrame or iterable of pd.DataFrame
+            If a DataFrame, it gets split into partitions of at most
+            batch_size rows. If an iterable, each item becomes one partition,
+            and only one item is held in memory at a time.
+
+        storage_folder: Path-like object
+
+        name: str. Optional.
+            Name of the directory. Defaults to a uuid.
+
+        num_partitions: integer. Defaults to 16.
+            Number of hash buckets used by the out-of-core operations. Results
+            inherit it.
+
+        batch_size: integer. Defaults to 65536.
+            Number of rows read at a time by the out-of-core operations.
+
+        temporary: bool. Defaults to False.
+            If True, the directory gets deleted once this object gets garbage
+            collected, i.e. once no factor refers to it anymore. Used for the
+            intermediate factors created by the operations of factors.
+
+    Attributes:
+        version: integer
+            Incremented every time the data gets written.
+    """
+    def __init__(
+        self,
+        data,
+        storage_folder,
+        name=None,
+        num_partitions=16,
+        batch_size=65536,
+        temporary=False,
+    ):
+        if name is None:
+            self.name = uuid4()
+        else:
+            self.name = name
+
+        self.storage_folder = storage_folder
+        self.path = storage_folder / str(self.name)
+        self.num_partitions = num_partitions
+        self.batch_size = batch_size
+        self.columns = None
+        self.version = 0
+
+        if self.path.exists():
+            raise ArgumentError(f"{self.path} already exists")
+
+        self.path.mkdir(parents=True)
+        self.temporary = temporary
+
+        if temporary:
+            # Registered before writing, so that a failed write gets cleaned
+            # up too.
+            weakref.finalize(self, delete_path, self.path)
+
+        self.write(data)
+
+    def get_columns(self):
+        """
+        Return: pd.Index
+        """
+        return self.columns
+
+    def get_storage_folder(self):
+        """
+        Return: Path-like object
+        """
+        return self.storage_folder
+
+    def get_paths(self):
+        """
+        Return: list[Path-like object]
+            The files of the partitions.
+        """
+        return sorted(self.path.glob('part-*.parquet'))
+
+    def read(self, copy=False):
+        """
+        Read every partition into one DataFrame.
+
+        Parameters:
+            copy: bool. Defaults to False.
+                Accepted for compatibility with InMemoryData.
+
+        Returns: pd.DataFrame
+        """
+        dfs = list(self.iter_partitions())
+
+        if not dfs:
+            return pd.DataFrame(columns=self.columns)
+
+        return pd.concat(dfs, ignore_index=True)
+
+    def iter_partitions(self):
+        """
+        Yields: pd.DataFrame
+            One partition at a time.
+        """
+        for path in self.get_paths():
+            yield pd.read_parquet(path, engine='pyarrow')
+
+    def iter_batches(self):
+        """
+        Yields: pd.DataFrame
+            At most batch_size rows at a time.
+        """
+        for path in self.get_paths():
+            for batch in pq.ParquetFile(path).iter_batches(
+                batch_size=self.batch_size
+            ):
+                yield batch.to_pandas()
+
+    def get_nbytes(self):
+        """
+        Return: integer
+            Size of the files on disk. Nothing is kept in memory.
+        """
+        return sum(path.stat().st_size for path in self.get_paths())
+
+    def write(self, data):
+        """
+        Write the partitions.
+
+        Parameters:
+            data: pd.DataFrame or iterable of pd.DataFrame
+        """
+        self.version += 1
+
+        if isinstance(data, pd.DataFrame):
+            partitions = (
+                data.iloc[start:start + self.batch_size]
+                for start in range(0, max(data.shape[0], 1), self.batch_size)
+            )
+        else:
+            partitions = data
+
+        schema = None
+
+        for i, df in enumerate(partitions):
+            if self.columns is None:
+                self.columns = df.columns
+
+            if df.shape[0] == 0:
+                continue
+
+            table = pa.Table.from_pandas(
+                df[list(self.columns)],
+                schema=schema,
+                preserve_index=False
+            )
+            schema = table.schema
+
+            pq.write_table(table, self.path / f'part-{i:05d}.parquet')
+
+        if self.columns is None:
+            raise ArgumentError(
+                f"No partition was given to write to {self.path}"
+            )
@@ -0,0 +1,434 @@
+"""
+DenseFactor module
+"""
+import numpy as np
+import pandas as pd
+
+from .data import InMemoryData
+from .errors import ArgumentError
+from .factor_one import FactorOne
+
+
+def broadcast_to_variables(values, variables, target_variables):
+    """
+    Reshape an array so that it broadcasts against arrays laid out in the
+    order of target_variables.
+
+    Parameters:
+        values: np.ndarray
+            One axis per variable in variables.
+
+        variables: list[str]
+            The variables that index the axes of values.
+
+        target_variables: list[str]
+            Superset of variables. Defines the output axis order.
+
+    Returns: np.ndarray
+    """
+    order = [
+        variables.index(var) for var in target_variables if var in variables
+    ]
+    shape = [
+        values.shape[variables.index(var)] if var in variables else 1
+        for var in target_variables
+    ]
+
+    return np.transpose(values, order).reshape(shape)
+
+
+def as_dense(factor):
+    """
+    Convert a factor into a DenseFactor, if it isn't one already.
+
+    Parameters:
+        factor: DenseFactor or Factor
+
+    Returns: DenseFactor
+    """
+    if isinstance(factor, DenseFactor):
+        return factor
+
+    return DenseFactor(data=factor.get_data())
+
+
+class DenseFactor:
+    """
+    Factor that stores its values in an N-dimensional NumPy array, with one
+    axis per variable, instead of a long-format DataFrame. Products use
+    broadcasting and marginalization uses axis reductions.
+
+    It implements the same interface as Factor, so that it could be used by
+    Factors and VariableElimination. Combinations that are absent in the
+    long-format data are stored as zeros, and get_df omits zero entries.
+
+    Parameters:
+        data: Data
+            Long-format data, with one column per variable plus 'value'.
+
+        cpt: ConditionalProbabilityTable
+
+        values: np.ndarray
+            Used along with domains, when the array is already built.
+
+        domains: dict[str, np.ndarray]
+            Key is a variable name. Value is the sorted array of the values
+            that the variable could take. The order of the keys is the order
+            of the axes of values.
+    """
+    def __init__(self, data=None, cpt=None, values=None, domains=None):
+        if data is not None and cpt is not None:
+            raise ArgumentError(
+                "DenseFactor must be supplied with only one of"
+                + " Data or ConditionalProbabilityTable."
+            )
+
+        if cpt is not None:
+            data = cpt.get_data()
+
+        if data is not None:
+            self.values, self.domains = self.__from_df__(data.read())
+        else:
+            self.values = np.asarray(values, dtype=float)
+            self.domains = dict(domains)
+
+        self.data_class = InMemoryData
+
+        self.__validate__()
+
+    def __from_df__(self, df):
+        if df.shape[0] == 0:
+            raise ArgumentError(
+                f"Dataframe is empty. Columns: {df.columns}"
+            )
+
+        variables = [col for col in df.columns if col != 'value']
+        domains = {var: np.unique(df[var].to_numpy()) for var in variables}
+        shape = tuple(len(domain) for domain in domains.values())
+
+        codes = tuple(
+            np.searchsorted(domains[var], df[var].to_numpy())
+            for var in variables
+        )
+
+        flat_index = np.ravel_multi_index(codes, shape)
+
+        if np.unique(flat_index).shape[0] < flat_index.shape[0]:
+            raise ArgumentError(
+                f"Too many counts detected for variables {variables}"
+            )
+
+        values = np.zeros(shape)
+        values[codes] = df['value'].to_numpy()
+
+        return values, domains
+
+    def __validate__(self):
+        expected_shape = tuple(len(domain) for domain in self.domains.values())
+
+        if self.values.shape != expected_shape:
+            raise ArgumentError(
+                f"Shape of values {self.values.shape} does not match the"
+                + f" domain sizes {expected_shape}"
+            )
+
+    def __repr__(self):
+        return f"\nDenseFactor(\nvariables: {self.get_variables()}" \
+            + f", \ndf: \n{self.get_df()}\n)"
+
+    def __aligned__(self, other):
+        """
+        Line up this factor and the other factor so that their arrays
+        broadcast against each other. Shared variables whose domains differ
+        (e.g. after filtering) are restricted to the common values.
+        """
+        other = as_dense(other)
+
+        left_values = self.values
+        right_values = other.values
+        left_vars = list(self.domains)
+        right_vars = list(other.domains)
+        domains = {}
+
+        for var, domain in self.domains.items():
+            if var in other.domains \
+                    and not np.array_equal(domain, other.domains[var]):
+
+                common, left_idx, right_idx = np.intersect1d(
+                    domain,
+                    other.domains[var],
+                    return_indices=True
+                )
+
+                if common.shape[0] == 0:
+                    raise ArgumentError(
+                        "Tables being merged have nothing in common:"
+                        + f"\ncommon: {var}"
+                    )
+
+                left_values = np.take(
+                    left_values, left_idx, axis=left_vars.index(var)
+                )
+                right_values = np.take(
+                    right_values, right_idx, axis=right_vars.index(var)
+                )
+                domains[var] = common
+            else:
+                domains[var] = domain
+
+        for var, domain in other.domains.items():
+            if var not in domains:
+                domains[var] = domain
+
+        variables = list(domains)
+
+        return (
+            broadcast_to_variables(left_values, left_vars, variables),
+            broadcast_to_variables(right_values, right_vars, variables),
+            domains
+        )
+
+    def get_variables(self):
+        """
+        Return variables
+        """
+        return list(self.domains.keys())
+
+    def get_domain_sizes(self):
+        """
+        Return the number of values of each variable.
+
+        Returns: dict[str, integer]
+        """
+        return {var: len(domain) for var, domain in self.domains.items()}
+
+    def get_nbytes(self):
+        """
+        Returns: integer
+            Bytes used by the values and the domains.
+        """
+        return int(self.values.nbytes + sum(
+            domain.nbytes for domain in self.domains.values()
+        ))
+
+    def prod(self, other):
+        """
+        Multiplication of one factor with "other" factor.
+
+        Parameters:
+            other: DenseFactor or Factor
+
+        Returns:
+            DenseFactor
+        """
+        left, right, domains = self.__aligned__(other)
+
+        return DenseFactor(values=left * right, domains=domains)
+
+    def div(self, other):
+        """
+        Division of one factor by the "other" factor. Dividing by zero gives
+        zero, so that combinations absent from both factors stay absent.
+
+        Parameters:
+            other: DenseFactor or Factor
+
+        Returns: DenseFactor
+        """
+        left, right, domains = self.__aligned__(other)
+
+        out = np.zeros(np.broadcast_shapes(left.shape, right.shape))
+        np.divide(left, right, out=out, where=right != 0)
+
+        return DenseFactor(values=out, domains=domains)
+
+    def filter(self, filters):
+        """
+        Apply filters of a query to this factor. Callable filters are
+        evaluated on a DataFrame holding the domain of the variable.
+
+        Parameters:
+            filters: dict or Query
+                Key is a variable name (string).
+                Value is either a callable or non-callable
+
+        Returns: DenseFactor
+        """
+        if 'get_filters' in dir(filters):
+            fs = {}
+            for d in filters.get_filters():
+                for k, v in d.items():
+                    fs[k] = v
+        else:
+            fs = filters
+
+        values = self.values
+        domains = dict(self.domains)
+        variables = list(domains)
+
+        for key, value in fs.items():
+            if key not in domains:
+                continue
+
+            domain = domains[key]
+
+            if callable(value):
+                mask = np.asarray(value(pd.DataFrame({key: domain})))
+            else:
+                # We assume we're doing an equality
+                mask = domain == value
+
+            if not mask.any():
+                raise ArgumentError(
+                    "Dataframe is empty after filtering using filter"
+                    + f" {key}.\n\tColumns: {variables}"
+                )
+
+            values = np.compress(mask, values, axis=variables.index(key))
+            domains[key] = domain[mask]
+
+        return DenseFactor(values=values, domains=domains)
+
+    def sum(self, var):
+        """
+        Sum out a variable by reducing along its axis.
+
+        Parameters:
+            var: string
+                The variable to be summed out.
+
+        Returns: DenseFactor or FactorOne
+        """
+        variables = list(self.domains)
+
+        if variables == [var]:
+            return FactorOne()
+
+        domains = {k: v for k, v in self.domains.items() if k != var}
+
+        return DenseFactor(
+            values=self.values.sum(axis=variables.index(var)),
+            domains=domains
+        )
+
+    def normalize(self, variables=None):
+        """
+        Make sure the values represent probabilities.
+
+        Parameters:
+            variables: list[str]
+                The variables in the denominator.
+
+        Returns: DenseFactor
+        """
+        if not variables:
+            return DenseFactor(
+                values=self.values / self.values.sum(),
+                domains=self.domains
+            )
+
+        own_vars = list(self.domains)
+        axes = tuple(
+            i for i, var in enumerate(own_vars) if var not in variables
+        )
+
+        totals = self.values.sum(axis=axes, keepdims=True)
+        out = np.zeros(self.values.shape)
+        np.divide(self.values, totals, out=out, where=totals != 0)
+
+        return DenseFactor(values=out, domains=self.domains)
+
+    def get_df(self):
+        """
+        Returns the long-format dataframe. Zero entries are omitted.
+
+        Returns: pd.DataFrame
+        """
+        grids = np.meshgrid(*self.domains.values(), indexing='ij')
+
+        df = pd.DataFrame({
+            var: grid.ravel() for var, grid in zip(self.domains, grids)
+        })
+        df['value'] = self.values.ravel()
+
+        return df[df['value'] != 0].reset_index(drop=True)
+
+    def get_data(self):
+        """
+        Return the data object, built from the long-format dataframe.
+
+        Returns: InMemoryData
+        """
+        return self.data_class(self.get_df())
+
+
+def sum_product(factors, var):
+    """
+    Multiply factors and sum out a variable in a single einsum contraction,
+    so that the joint table over every variable of every factor is never
+    materialized.
+
+    Parameters:
+        factors: list[DenseFactor or Factor]
+
+        var: str
+            The variable to be summed out.
+
+    Returns: DenseFactor or FactorOne
+    """
+    factors = [as_dense(factor) for factor in factors]
+
+    domains = {}
+    for factor in factors:
+        for variable, domain in factor.domains.items():
+            if variable in domains:
+                domains[variable] = np.intersect1d(domains[variable], domain)
+            else:
+                domains[variable] = domain
+
+    for variable, domain in domains.items():
+        if domain.shape[0] == 0:
+            raise ArgumentError(
+                "Tables being merged have nothing in common:"
+                + f"\ncommon: {variable}"
+            )
+
+    variables = list(domains)
+    output_vars = [variable for variable in variables if variable != var]
+
+    if not output_vars:
+        return FactorOne()
+
+    if len(variables) > 52:
+        # einsum only supports 52 distinct subscripts.
+        factor_prod = factors[0]
+        for factor in factors[1:]:
+            factor_prod = factor_prod.prod(factor)
+
+        return factor_prod.sum(var)
+
+    operands = []
+    for factor in factors:
+        values = factor.values
+        factor_vars = list(factor.domains)
+
+        for axis, variable in enumerate(factor_vars):
+            if not np.array_equal(factor.domains[variable], domains[variable]):
+                indices = np.searchsorted(
+                    factor.domains[variable], domains[variable]
+                )
+                values = np.take(values, indices, axis=axis)
+
+        operands.append(values)
+        operands.append([variables.index(variable) for variable in factor_vars])
+
+    values = np.einsum(
+        *operands,
+        [variables.index(variable) for variable in output_vars],
+        optimize=True
+    )
+
+    return DenseFactor(
+        values=values,
+        domains={variable: domains[variable] for variable in output_vars}
+    )
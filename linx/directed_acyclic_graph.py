@@ -1,6 +1,9 @@
 """
 DirectedAcyclicGraph class
 """
+from collections import deque
+
+from .errors import CycleError
 
 
 class DirectedAcyclicGraph:
@@ -9,7 +12,11 @@ class DirectedAcyclicGraph:
     """
     def __init__(self):
         self.children = {}
+        self.parents = {}
+        # Used as an ordered set.
         self.nodes = {}
+        self.edges = set()
+        self.sorted_nodes = None
 
     def add_edge(self, start, end):
         """
@@ -21,11 +28,18 @@ class DirectedAcyclicGraph:
             end: str
                 End node.
         """
-
         if start not in self.children:
-            self.children[start] = [end]
-        elif end not in self.children[start]:
-            self.children[start].append(end)
+            self.children[start] = []
+
+        if (start, end) in self.edges:
+            return
+
+        self.sorted_nodes = None
+        self.nodes[start] = None
+        self.nodes[end] = None
+        self.edges.add((start, end))
+        self.children[start].append(end)
+        self.parents.setdefault(end, []).append(start)
 
     def add_node(self, node):
         """
@@ -39,6 +53,10 @@ class DirectedAcyclicGraph:
         if node not in self.children:
             self.children[node] = []
 
+        if node not in self.nodes:
+            self.sorted_nodes = None
+            self.nodes[node] = None
+
     def get_neighbors(self, node):
         """
         Parameters:
@@ -56,13 +74,11 @@ class DirectedAcyclicGraph:
 
         Returns: list[str]
         """
-        parents = []
 
-        for other_node, children in self.children.items():
-            if node in children:
-                parents.append(other_node)
+        if node not in self.parents:
+            return []
 
-        return parents
+        return list(self.parents[node])
 
     def get_children(self, node):
         """
@@ -83,51 +99,52 @@ class DirectedAcyclicGraph:
 
         Returns: list[str]
         """
-        root_nodes = []
+        return [node for node in self.nodes if node not in self.parents]
 
-        for node in self.children:
-            node_is_a_child = False
+    def topological_sort(self):
+        """
+        Get a sorted list of variables, such that every node comes after its
+        parents (Kahn's algorithm). The order is cached until a node or an
+        edge gets added.
 
-            for _, child_nodes in self.children.items():
-                if node in child_nodes:
-                    node_is_a_child = True
-                    break
+        Returns: list[str]
 
-            if not node_is_a_child:
-                root_nodes.append(node)
+        Raises:
+            CycleError: If the graph has a cycle.
+        """
+        if self.sorted_nodes is None:
+            in_degrees = {
+                node: len(self.get_parents(node)) for node in self.nodes
+            }
+            queue = deque(
+                node for node, degree in in_degrees.items() if degree == 0
+            )
+            sorted_nodes = []
 
-        return root_nodes
+            while queue:
+                node = queue.popleft()
+                sorted_nodes.append(node)
 
-    def topological_sort(self):
-        """
-        Get a sorted list of variables.
-        """
-        visited = {}
-        roots = self.get_root_nodes()
-        sorted_vars = []
+                for child in self.get_children(node):
+                    in_degrees[child] -= 1
 
-        for var in roots:
-            visited[var] = 1
-            sorted_vars.append(var)
+                    if in_degrees[child] == 0:
+                        queue.append(child)
 
-        while len(set(self.get_nodes()) - set(visited.keys())) > 0:
-            unvisiteds = list(set(self.get_nodes()) - set(visited.keys()))
+            if len(sorted_nodes) < len(self.nodes):
+                raise CycleError(
+                    "Graph has a cycle through some of these nodes: "
+                    + f"{[n for n, d in in_degrees.items() if d > 0]}"
+                )
 
-            for unvisited in unvisiteds:
-                parents = self.get_parents(unvisited)
-                if set(parents) - set(visited.keys()) == set({}):
-                    sorted_vars.append(unvisited)
-                    visited[unvisited] = 1
+            self.sorted_nodes = sorted_nodes
 
-        return sorted_vars
+        return list(self.sorted_nodes)
 
     def get_nodes(self):
         """
-        Get all the nodes in the DAG.
-        """
-        nodes = set({})
-
-        for parent, children in self.children.items():
-            nodes = nodes.union(set([parent]).union(children))
+        Get all the nodes in the DAG, in the order they were added.
 
-        return list(nodes)
+        Returns: list[str]
+        """
+        return list(self.nodes)
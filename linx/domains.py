@@ -0,0 +1,209 @@
+"""
+Domains module
+"""
+import numpy as np
+import pandas as pd
+
+from .errors import ArgumentError
+
+
+def smallest_int_dtype(size):
+    """
+    Smallest signed integer dtype that could hold the codes 0 .. size - 1.
+
+    Parameters:
+        size: integer
+
+    Returns: np.dtype
+    """
+    for dtype in [np.int8, np.int16, np.int32]:
+        if size - 1 <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+
+    return np.dtype(np.int64)
+
+
+class DomainRegistry:
+    """
+    Network-level registry that maps the distinct values of each variable to
+    compact integer codes (int8, int16, or int32, depending on the number of
+    values). Factors that store codes instead of raw values merge and group
+    on small contiguous integers rather than on floats or strings.
+
+    Codes follow the sorted order of the values whenever the values could be
+    sorted, and the order of first appearance otherwise.
+    """
+    def __init__(self):
+        self.domains = {}
+
+    def __repr__(self):
+        return f"DomainRegistry({self.get_domain_sizes()})"
+
+    def add(self, variable, values):
+        """
+        Register values that a variable could take.
+
+        Parameters:
+            variable: str
+
+            values: array-like
+        """
+        if variable in self.domains:
+            values = np.concatenate(
+                [self.domains[variable].to_numpy(), np.asarray(values)]
+            )
+
+        domain = pd.Index(pd.unique(np.asarray(values)))
+
+        try:
+            domain = domain.sort_values()
+        except TypeError:
+            pass
+
+        self.domains[variable] = domain
+
+    def add_df(self, df):
+        """
+        Register the values of every variable column of a long-format
+        dataframe.
+
+        Parameters:
+            df: pd.DataFrame
+        """
+        for col in df.columns:
+            if col != 'value':
+                self.add(col, df[col].to_numpy())
+
+    def get_domain(self, variable):
+        """
+        Parameters:
+            variable: str
+
+        Returns: pd.Index
+            The values of the variable, in the order of their codes.
+        """
+        return self.domains[variable]
+
+    def get_domain_sizes(self):
+        """
+        Returns: dict[str, integer]
+        """
+        return {
+            variable: len(domain) for variable, domain in self.domains.items()
+        }
+
+    def get_dtype(self, variable):
+        """
+        Parameters:
+            variable: str
+
+        Returns: np.dtype
+            The dtype used to store the codes of the variable.
+        """
+        return smallest_int_dtype(len(self.domains[variable]))
+
+    def encode_df(self, df):
+        """
+        Replace the values of the registered variables by their codes.
+
+        Parameters:
+            df: pd.DataFrame
+
+        Returns: pd.DataFrame
+        """
+        encoded = {}
+
+        for col in df.columns:
+            if col not in self.domains:
+                continue
+
+            codes = self.domains[col].get_indexer(df[col])
+
+            if (codes < 0).any():
+                raise ArgumentError(
+                    f"Values of {col} are missing from the registry:"
+                    + f" {df[col][codes < 0].unique()}"
+                )
+
+            encoded[col] = codes.astype(self.get_dtype(col))
+
+        return df.assign(**encoded)
+
+    def decode_df(self, df):
+        """
+        Replace the codes of the registered variables by their values.
+
+        Parameters:
+            df: pd.DataFrame
+
+        Returns: pd.DataFrame
+        """
+        decoded = {
+            col: self.domains[col].take(df[col].to_numpy())
+            for col in df.columns
+            if col in self.domains
+        }
+
+        return df.assign(**decoded)
+
+    def decode_factor(self, factor):
+        """
+        Build a factor of the same class whose variables hold values instead
+        of codes.
+
+        Parameters:
+            factor: Factor or DenseFactor
+
+        Returns: Factor or DenseFactor
+        """
+        data = factor.get_data()
+
+        return factor.__class__(
+            data=data.__class__(
+                self.decode_df(data.read()),
+                storage_folder=data.get_storage_folder(),
+                temporary=True
+            )
+        )
+
+    def encode_filters(self, filters):
+        """
+        Translate the filters of a query, which refer to values, into filters
+        that refer to codes. Callable filters are evaluated once on the domain
+        of their variable, so they must only refer to that variable.
+
+        Parameters:
+            filters: Query or dict
+                Key is a variable name (string).
+                Value is either a callable or non-callable
+
+        Returns: dict
+            Key is a variable name. Value is a code or a callable.
+        """
+        if 'get_filters' in dir(filters):
+            fs = {}
+            for d in filters.get_filters():
+                for k, v in d.items():
+                    fs[k] = v
+        else:
+            fs = filters
+
+        encoded = {}
+
+        for key, value in fs.items():
+            if key not in self.domains:
+                encoded[key] = value
+                continue
+
+            domain = self.domains[key]
+
+            if callable(value):
+                mask = np.asarray(value(pd.DataFrame({key: domain})))
+                allowed = np.flatnonzero(mask)
+
+                encoded[key] = lambda df, key=key, allowed=allowed: \
+                    df[key].isin(allowed)
+            else:
+                encoded[key] = domain.get_indexer([value])[0]
+
+        return encoded
@@ -2,14 +2,18 @@
 Data Structures module.
 
 Classes:
+    - Query
+    - Range
     - ConditionalProbabilityTable
     - DirectedAcyclicGraph
     - LogFactorAdapter
     - Factor
+    - DenseFactor
     - Factors
     - BayesianNetwork
     - MarkovNetwork
     - Particle
+    - ParticleSet
     - RandomVariable
     - Normal
     - Gamma
@@ -18,15 +22,17 @@ Classes:
     - Binomial
     - MetropolisHastings
 """
-from .query import Query
+from .query import Query, Range
 from .conditional_probability_table import ConditionalProbabilityTable
 from .directed_acyclic_graph import DirectedAcyclicGraph
 from .factor import Factor
+from .dense_factor import DenseFactor
 from .log_factor_adapter import LogFactorAdapter
 from .factors import Factors
 from .markov_network import MarkovNetwork
 from .bayesian_network import BayesianNetwork
 from .particles.particle import Particle
+from .particles.particle_set import ParticleSet
 from .random.random_variable import RandomVariable
 from .random.normal import Normal
 from .random.gamma import Gamma
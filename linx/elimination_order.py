@@ -0,0 +1,461 @@
+"""
+Elimination order module
+"""
+from .data import ParquetData
+from .errors import ArgumentError
+
+
+HEURISTICS = [
+    'min_fill_edges',
+    'min_fill',
+    'min_degree',
+    'min_weight',
+    'weighted_min_fill',
+]
+
+
+class EliminationOrderer:
+    """
+    Keeps the interaction graph of a network (an edge between every two
+    variables that share a factor) and updates it incrementally as variables
+    get eliminated. Eliminating a variable connects all of its neighbors and
+    removes it from the graph, which is what happens to the factors in
+    VariableElimination.
+
+    Because only the graph is touched, the whole elimination order could be
+    computed up front, before any factor arithmetic.
+
+    Parameters:
+        network: MarkovNetwork or BayesianNetwork
+
+        heuristic: str. Defaults to 'min_fill'.
+            - min_fill_edges: fewest variables in the factors that contain
+                the variable, i.e. the variable and its neighbors. Same score
+                as the min_fill_edges function of VariableElimination, with
+                ties going to the last eliminateable.
+            - min_fill: fewest edges added among the neighbors.
+            - min_degree: fewest neighbors.
+            - min_weight: smallest product of the domain sizes of the
+                variable and its neighbors.
+            - weighted_min_fill: smallest sum, over the edges added, of the
+                product of the domain sizes of their endpoints.
+
+        domain_sizes: dict[str, integer]. Optional.
+            Number of values of each variable. Only needed by min_weight and
+            weighted_min_fill. If None, the domain registry of the network is
+            used, or else the domain sizes reported by the factors.
+    """
+    def __init__(self, network, heuristic='min_fill', domain_sizes=None):
+        if heuristic not in HEURISTICS:
+            raise ArgumentError(
+                f"Unknown heuristic {heuristic}. Must be one of {HEURISTICS}"
+            )
+
+        self.heuristic = heuristic
+        self.neighbors = {}
+
+        for variables in get_scopes(network):
+            for var in variables:
+                if var not in self.neighbors:
+                    self.neighbors[var] = set()
+
+                self.neighbors[var].update(set(variables) - {var})
+
+        if domain_sizes is None and heuristic in [
+            'min_weight', 'weighted_min_fill'
+        ]:
+            domain_sizes = get_network_domain_sizes(network)
+
+        self.domain_sizes = domain_sizes
+
+        self.scores = {var: self.__score__(var) for var in self.neighbors}
+
+    def __repr__(self):
+        return f"EliminationOrderer({self.heuristic}, {self.neighbors})"
+
+    def __missing_edges__(self, var):
+        neighbors = list(self.neighbors[var])
+        missing = []
+
+        for i, left in enumerate(neighbors):
+            for right in neighbors[i + 1:]:
+                if right not in self.neighbors[left]:
+                    missing.append((left, right))
+
+        return missing
+
+    def __score__(self, var):
+        if self.heuristic == 'min_fill_edges':
+            return len(self.neighbors[var]) + 1
+
+        if self.heuristic == 'min_degree':
+            return len(self.neighbors[var])
+
+        if self.heuristic == 'min_fill':
+            return len(self.__missing_edges__(var))
+
+        if self.heuristic == 'min_weight':
+            weight = self.domain_sizes[var]
+            for neighbor in self.neighbors[var]:
+                weight *= self.domain_sizes[neighbor]
+
+            return weight
+
+        return sum(
+            self.domain_sizes[left] * self.domain_sizes[right]
+            for left, right in self.__missing_edges__(var)
+        )
+
+    def get_score(self, var):
+        """
+        Parameters:
+            var: str
+
+        Returns: integer
+            The current score of the variable. Lower is better.
+        """
+        return self.scores[var]
+
+    def get_neighbors(self, var):
+        """
+        Parameters:
+            var: str
+
+        Returns: set[str]
+        """
+        return self.neighbors[var]
+
+    def choose(self, eliminateables):
+        """
+        Pick the variable to eliminate next.
+
+        Parameters:
+            eliminateables: list[str]
+
+        Returns: str
+            The eliminateable with the lowest score. Ties go to the one that
+            comes first in eliminateables, or last with min_fill_edges, like
+            in VariableElimination.
+        """
+        best_choice = None
+        last_wins = self.heuristic == 'min_fill_edges'
+
+        for eliminateable in eliminateables:
+            if best_choice is None or \
+                    self.scores[eliminateable] < self.scores[best_choice] or \
+                    last_wins and \
+                    self.scores[eliminateable] == self.scores[best_choice]:
+                best_choice = eliminateable
+
+        return best_choice
+
+    def eliminate(self, var):
+        """
+        Remove a variable from the interaction graph, connecting all of its
+        neighbors. Only the scores of variables within two hops of var get
+        recomputed.
+
+        Parameters:
+            var: str
+
+        Returns: set[str]
+            The clique formed by var and its neighbors.
+        """
+        neighbors = self.neighbors.pop(var)
+        del self.scores[var]
+
+        for neighbor in neighbors:
+            self.neighbors[neighbor].discard(var)
+            self.neighbors[neighbor].update(neighbors - {neighbor})
+
+        affected = set(neighbors)
+        for neighbor in neighbors:
+            affected.update(self.neighbors[neighbor])
+
+        for affected_var in affected:
+            self.scores[affected_var] = self.__score__(affected_var)
+
+        return neighbors.union({var})
+
+    def get_order(self, eliminateables):
+        """
+        Compute the whole elimination order up front. This eliminates the
+        variables from the interaction graph of this orderer.
+
+        Ties get broken along the sorted names of the variables, so that the
+        order does not depend on the order of eliminateables, which often
+        comes out of a set.
+
+        Parameters:
+            eliminateables: list[str]
+
+        Returns: list[str]
+        """
+        remaining = sorted(
+            [var for var in eliminateables if var in self.neighbors],
+            key=str
+        )
+        order = []
+
+        while remaining:
+            best_choice = self.choose(remaining)
+            self.eliminate(best_choice)
+            order.append(best_choice)
+            remaining.remove(best_choice)
+
+        return order
+
+
+def get_scopes(network):
+    """
+    Variables of each factor of a network, read off the column names or the
+    CPT definitions without reading any table.
+
+    Parameters:
+        network: MarkovNetwork or BayesianNetwork
+
+    Returns: list[list[str]]
+    """
+    if hasattr(network, 'get_random_variables'):
+        return [
+            list(rv.get_givens()) + list(rv.get_outcomes())
+            for rv in network.get_random_variables().values()
+        ]
+
+    return [factor.get_variables() for factor in network.get_factors()]
+
+
+def get_network_domain_sizes(network):
+    """
+    Number of values of each variable of a network.
+
+    If the network has a domain registry (see
+    BayesianNetwork.to_markov_network), the sizes come from it without
+    reading any table. Otherwise, the tables get read, which could be slow
+    for big networks stored on disk. For a BayesianNetwork, only the outcome
+    columns of each CPT get read from Parquet files (and the given columns
+    of variables that are not the outcome of any CPT), and the value column
+    is skipped. Pass precomputed sizes to the functions that take
+    domain_sizes to skip this altogether.
+
+    Parameters:
+        network: MarkovNetwork or BayesianNetwork
+
+    Returns: dict[str, integer]
+    """
+    if getattr(network, 'domain_registry', None) is not None:
+        return network.domain_registry.get_domain_sizes()
+
+    domain_sizes = {}
+
+    if hasattr(network, 'get_random_variables'):
+        rvs = network.get_random_variables().values()
+        outcomes = {
+            outcome for rv in rvs for outcome in rv.get_outcomes()
+        }
+
+        all_sizes = []
+        for rv in rvs:
+            # The outcome columns of a CPT hold the whole domain of its
+            # outcomes, so each variable is counted once.
+            columns = list(rv.get_outcomes()) + [
+                given for given in rv.get_givens() if given not in outcomes
+            ]
+
+            data = rv.get_data()
+            if isinstance(data, ParquetData):
+                df = data.read(columns=columns)
+            else:
+                df = data.read()
+
+            all_sizes.append({col: df[col].nunique() for col in columns})
+    else:
+        all_sizes = [
+            factor.get_domain_sizes() for factor in network.get_factors()
+        ]
+
+    for sizes in all_sizes:
+        for var, size in sizes.items():
+            domain_sizes[var] = min(size, domain_sizes.get(var, size))
+
+    return domain_sizes
+
+
+class EliminationEstimate:
+    """
+    Predicted cost of running VariableElimination, computed without
+    multiplying or summing any factor.
+
+    Parameters:
+        order: list[str]
+            The variables in the order they get eliminated.
+
+        steps: list[dict]
+            One item per intermediate factor, in the order they get created.
+            Each item has the following keys:
+                variable: str or None
+                    The variable summed out. None for the products of the
+                    remaining factors of the numerator and the denominator.
+                clique: list[str]
+                    The variables of the factors that get combined.
+                scope: list[str]
+                    The variables of the intermediate factor.
+                rows: integer
+                    Predicted row count of the intermediate factor.
+                bytes: integer
+                    Predicted byte size of the intermediate factor.
+
+        induced_width: integer
+            Size of the largest clique, minus one.
+    """
+    def __init__(self, order, steps, induced_width):
+        self.order = order
+        self.steps = steps
+        self.induced_width = induced_width
+
+    def __repr__(self):
+        return f"EliminationEstimate(order: {self.order}, " \
+            + f"induced_width: {self.induced_width}, " \
+            + f"peak_bytes: {self.get_peak_bytes()})"
+
+    def get_order(self):
+        """
+        Returns: list[str]
+        """
+        return self.order
+
+    def get_steps(self):
+        """
+        Returns: list[dict]
+        """
+        return self.steps
+
+    def get_induced_width(self):
+        """
+        Returns: integer
+        """
+        return self.induced_width
+
+    def get_peak_rows(self):
+        """
+        Returns: integer
+            Row count of the largest intermediate factor.
+        """
+        return max([step['rows'] for step in self.steps], default=0)
+
+    def get_peak_bytes(self):
+        """
+        Returns: integer
+            Byte size of the largest intermediate factor.
+        """
+        return max([step['bytes'] for step in self.steps], default=0)
+
+
+def estimate_elimination(
+    network,
+    query,
+    heuristic='min_fill_edges',
+    domain_sizes=None,
+    bytes_per_value=8,
+):
+    """
+    Predict the elimination order, the induced width, and the size of every
+    intermediate factor that VariableElimination would create for a query,
+    without touching any factor data besides counting domain sizes (skipped
+    when domain_sizes is given).
+
+    Row counts are upper bounds: the product of the domain sizes of the
+    variables of a factor. Variables fixed to a value by the query count as
+    having a single value.
+
+    Parameters:
+        network: MarkovNetwork or BayesianNetwork
+
+        query: Query
+
+        heuristic: str. Defaults to 'min_fill_edges'.
+            One of the heuristics of EliminationOrderer. VariableElimination
+            runs the predicted order when given the same greedy_heuristic,
+            which is the default of both. For a callable greedy_heuristic,
+            pass elimination_order=estimate.get_order() to
+            VariableElimination to run the predicted order.
+
+        domain_sizes: dict[str, integer]. Optional.
+            If None, get_network_domain_sizes gets called, which reads the
+            tables of the network when it has no domain registry.
+
+        bytes_per_value: integer. Defaults to 8.
+            Bytes used by each cell of a table (i.e. each variable and the
+            value column).
+
+    Returns: EliminationEstimate
+    """
+    if domain_sizes is None:
+        domain_sizes = get_network_domain_sizes(network)
+
+    domain_sizes = dict(domain_sizes)
+
+    for f in query.get_filters():
+        for var, value in f.items():
+            if not callable(value):
+                domain_sizes[var] = 1
+
+    scopes = [set(scope) for scope in get_scopes(network)]
+
+    variables = set().union(*scopes)
+    outcome_vars = set(query.get_outcome_variables())
+    given_vars = set(query.get_given_variables())
+
+    orderer = EliminationOrderer(
+        network, heuristic=heuristic, domain_sizes=domain_sizes
+    )
+
+    order = []
+    steps = []
+    induced_width = 0
+
+    def add_step(var, clique, scope):
+        rows = 1
+        for scope_var in scope:
+            rows *= domain_sizes[scope_var]
+
+        steps.append({
+            'variable': var,
+            'clique': sorted(clique),
+            'scope': sorted(scope),
+            'rows': rows,
+            'bytes': rows * (len(scope) + 1) * bytes_per_value
+        })
+
+    def eliminate(eliminateables):
+        nonlocal scopes, induced_width
+
+        for var in orderer.get_order(eliminateables):
+            touching = [scope for scope in scopes if var in scope]
+            clique = set().union(*touching)
+            new_scope = clique - {var}
+
+            scopes = [scope for scope in scopes if var not in scope]
+            if new_scope:
+                scopes.append(new_scope)
+
+            order.append(var)
+            induced_width = max(induced_width, len(clique) - 1)
+            add_step(var, clique, new_scope)
+
+    eliminate(list(variables - outcome_vars.union(given_vars)))
+
+    remaining = set().union(*scopes)
+    add_step(None, remaining, remaining)
+
+    eliminate(list(outcome_vars - given_vars))
+
+    remaining = set().union(*scopes)
+    if remaining:
+        add_step(None, remaining, remaining)
+
+    return EliminationEstimate(
+        order=order,
+        steps=steps,
+        induced_width=induced_width
+    )
@@ -8,3 +8,7 @@ class LinxException(Exception):
 
 class ArgumentError(LinxException):
     pass
+
+
+class CycleError(LinxException):
+    pass
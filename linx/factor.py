@@ -2,9 +2,20 @@
 Factor module
 """
 import numpy as np
+import pandas as pd
+import pyarrow as pa
 
 from .errors import ArgumentError
+from .data import ParquetData
 from .factor_one import FactorOne
+from .out_of_core import is_partitioned, filter_rows, merge, \
+    normalize as normalize_out_of_core, sum_variable
+from .query import get_pushdown_filters
+from .settings import is_debug
+
+# Most slices sum_product_by_value goes through before it multiplies whole
+# tables instead.
+MAX_SPLIT_VALUES = 64
 
 
 class Factor:
@@ -12,8 +23,47 @@ class Factor:
     Factor class.
 
     A factor is something that can be multiplied with another factor.
+
+    When the data of a factor is a PartitionedParquetData, its operations run
+    out of core, one partition at a time (see linx.out_of_core), and their
+    results are PartitionedParquetData too.
+
+    Parameters:
+        data: Data
+
+        cpt: ConditionalProbabilityTable
+
+        log_factor: LogFactor
+
+        validate: bool. Defaults to True.
+            If False, the check for emptiness and duplicate entries is
+            skipped, unless debug mode is on (see linx.settings.set_debug).
+            Meant for factors built out of other factors, whose data is
+            already known to be valid.
+
+        storage_policy: StoragePolicy. Optional.
+            Picks where the data of the factors created out of this one is
+            stored. They inherit the policy. If None, they are stored with
+            the same class as the data of this factor.
+
+        scratch_folder: Path-like object. Optional.
+            Where the data of the factors created out of this one is written,
+            instead of the storage folder of the data of this factor. They
+            inherit it. VariableElimination uses it to keep the intermediate
+            factors of a computation in a folder that gets deleted at the end.
+
+    The data of the factors created out of this one is temporary: once no
+    factor refers to it anymore, its file (if any) gets deleted.
     """
-    def __init__(self, data=None, cpt=None, log_factor=None):
+    def __init__(
+        self,
+        data=None,
+        cpt=None,
+        log_factor=None,
+        validate=True,
+        storage_policy=None,
+        scratch_folder=None,
+    ):
         if log_factor is not None and data is not None:
             raise ArgumentError(
                 "Factor must be supplied with only one of"
@@ -32,12 +82,22 @@ class Factor:
         else:
             log_data = log_factor.get_data()
             df = log_data.read()
-            df.loc[:, 'value'] = np.exp(df['value'])
-            self.data = log_data.__class__(df, log_data.get_storage_folder())
+            self.data = log_data.__class__(
+                df.assign(value=np.exp(df['value'])),
+                log_data.get_storage_folder(),
+                temporary=True
+            )
 
-        self.data_class = self.data.__class__
+        self.storage_policy = storage_policy
+        self.scratch_folder = scratch_folder
+
+        if storage_policy is None:
+            self.data_class = self.data.__class__
+        else:
+            self.data_class = storage_policy
 
-        self.__validate__()
+        if validate or is_debug():
+            self.__validate__()
 
     def __validate__(self):
         df = self.data.read()
@@ -58,6 +118,38 @@ class Factor:
             )
 
 
+    def __create_data__(self, df):
+        storage_folder = self.scratch_folder
+
+        if storage_folder is None:
+            storage_folder = self.data.get_storage_folder()
+
+        if self.data_class is ParquetData \
+                and isinstance(self.data, ParquetData):
+            # Derived data keeps the layout of the data it comes from, so that
+            # its filtered reads skip row groups too.
+            return ParquetData(
+                df,
+                storage_folder=storage_folder,
+                sort_by=[var for var in self.data.sort_by if var in df],
+                row_group_size=self.data.row_group_size,
+                temporary=True
+            )
+
+        return self.data_class(
+            df,
+            storage_folder=storage_folder,
+            temporary=True
+        )
+
+    def __derive__(self, data):
+        return Factor(
+            data,
+            validate=False,
+            storage_policy=self.storage_policy,
+            scratch_folder=self.scratch_folder
+        )
+
     def __merged__(self, other):
         left_vars = set(list(self.get_variables()))
         right_vars = set(list(other.get_variables()))
@@ -71,9 +163,7 @@ class Factor:
         if common:
             merged = left_df.merge(right_df, on=common)
         else:
-            left_df['cross-join'] = 1
-            right_df['cross-join'] = 1
-            merged = left_df.merge(right_df, on='cross-join')
+            merged = left_df.merge(right_df, how='cross')
 
         if merged.shape[0] == 0:
             raise ArgumentError(
@@ -94,6 +184,33 @@ class Factor:
         """
         return list(set(self.data.get_columns()) - {'value'})
 
+    def get_domain_sizes(self):
+        """
+        Return the number of distinct values of each variable.
+
+        Only the variable columns get read from Parquet files, and
+        partitioned data gets read one partition at a time.
+
+        Returns: dict[str, integer]
+        """
+        variables = self.get_variables()
+
+        if is_partitioned(self.data):
+            values = {var: set() for var in variables}
+
+            for df in self.data.iter_partitions():
+                for var in variables:
+                    values[var].update(df[var].unique())
+
+            return {var: len(values[var]) for var in variables}
+
+        if isinstance(self.data, ParquetData):
+            df = self.data.read(columns=variables)
+        else:
+            df = self.data.read()
+
+        return {var: df[var].nunique() for var in variables}
+
     def prod(self, other):
         """
         Multiplication of one factor with "other" factor.
@@ -104,18 +221,13 @@ class Factor:
         Returns:
             Factor
         """
+        if is_partitioned(self.data) or is_partitioned(other.data):
+            return self.__derive__(merge(self.data, other.data, np.multiply))
 
         merged, variables = self.__merged__(other)
         merged['value'] = merged.value_x * merged.value_y
 
-        data = self.data.__class__(
-            merged[variables],
-            storage_folder=self.data.get_storage_folder()
-        )
-
-        return Factor(
-            data
-        )
+        return self.__derive__(self.__create_data__(merged[variables]))
 
     def div(self, other):
         """
@@ -124,21 +236,21 @@ class Factor:
 
         Returns: Factor
         """
+        if is_partitioned(self.data) or is_partitioned(other.data):
+            return self.__derive__(merge(self.data, other.data, np.divide))
 
         merged, variables = self.__merged__(other)
         merged['value'] = merged.value_x / merged.value_y
 
-        return Factor(
-            self.data.__class__(
-                merged[variables],
-                storage_folder=self.data.get_storage_folder()
-            )
-        )
+        return self.__derive__(self.__create_data__(merged[variables]))
 
     def filter(self, filters):
         """
         Apply filters of a query to this factor.
 
+        If the data is a ParquetData, equality filters and Ranges get pushed
+        down to the Parquet reader.
+
         Parameters:
             filters: dict
                 Key is a variable name (string).
@@ -159,7 +271,24 @@ class Factor:
         else:
             fs = filters
 
-        df = self.data.read()
+        if is_partitioned(self.data):
+            return self.__derive__(
+                filter_rows(self.data, self.__predicate__(fs))
+            )
+
+        if isinstance(self.data, ParquetData):
+            # Equalities and Ranges get applied while reading. Every filter
+            # gets applied again below, which is cheap on the rows left.
+            try:
+                df = self.data.read(
+                    filters=get_pushdown_filters(fs, self.get_variables())
+                )
+            except pa.ArrowException:
+                # Values pyarrow could not compare with the column (e.g. True
+                # against integers) get compared by pandas instead.
+                df = self.data.read()
+        else:
+            df = self.data.read()
 
         for key, value in fs.items():
             if key in self.get_variables():
@@ -175,11 +304,24 @@ class Factor:
                         + f" {key}.\n\tColumns: {df.columns}"
                     )
 
-        return Factor(
-            self.data.__class__(
-                df, storage_folder=self.data.get_storage_folder()
-            )
-        )
+        return self.__derive__(self.__create_data__(df))
+
+    def __predicate__(self, fs):
+        variables = self.get_variables()
+
+        def predicate(df):
+            mask = pd.Series(True, index=df.index)
+
+            for key, value in fs.items():
+                if key in variables:
+                    if callable(value):
+                        mask = mask & value(df)
+                    else:
+                        mask = mask & (df[key] == value)
+
+            return mask
+
+        return predicate
 
     def sum(self, var):
         """
@@ -196,8 +338,6 @@ class Factor:
         if isinstance(var, str):
             variables = [var]
 
-        df = self.get_df()
-
         other_vars = list(
             set(self.get_variables()) - set(variables)
         )
@@ -205,14 +345,14 @@ class Factor:
         if not other_vars:
             return FactorOne()
 
+        if is_partitioned(self.data):
+            return self.__derive__(sum_variable(self.data, var))
+
+        df = self.get_df()
+
         return_df = df.groupby(other_vars).sum()[['value']].reset_index()
 
-        return Factor(
-            data=self.data_class(
-                return_df,
-                storage_folder=self.get_data().get_storage_folder()
-            )
-        )
+        return self.__derive__(self.__create_data__(return_df))
 
     def normalize(self, variables=None):
         """
@@ -224,17 +364,17 @@ class Factor:
 
         Returns: Factor
         """
+        if is_partitioned(self.data):
+            return self.__derive__(
+                normalize_out_of_core(self.data, variables)
+            )
 
         df = self.get_df()
 
         if not variables:
-            df['value'] = df['value'] / df['value'].sum()
-
-            return Factor(
-                data=self.data_class(
-                    df,
-                    storage_folder=self
-                    .get_data().get_storage_folder()
+            return self.__derive__(
+                self.__create_data__(
+                    df.assign(value=df['value'] / df['value'].sum())
                 )
             )
 
@@ -242,11 +382,8 @@ class Factor:
         merged = df.merge(sum_df, on=variables)
         merged['value'] = merged['value_x'] / merged['value_y']
 
-        return Factor(
-            data=self.data_class(
-                merged.drop(columns=['value_x', 'value_y']),
-                storage_folder=self.get_data().get_storage_folder()
-            )
+        return self.__derive__(
+            self.__create_data__(merged.drop(columns=['value_x', 'value_y']))
         )
 
     def get_df(self):
@@ -258,6 +395,13 @@ class Factor:
 
         return self.get_data().read()
 
+    def get_nbytes(self):
+        """
+        Returns: integer
+            Bytes used by the data.
+        """
+        return self.get_data().get_nbytes()
+
     def get_data(self):
         """
         Return the data object.
@@ -265,3 +409,174 @@ class Factor:
         Returns: Data
         """
         return self.data
+
+
+def multiply_dfs(left_df, right_df):
+    """
+    Inner join two long-format dataframes on their common variables (or a
+    cross join if there are none) and multiply their values.
+
+    Parameters:
+        left_df: pd.DataFrame
+        right_df: pd.DataFrame
+
+    Returns: pd.DataFrame
+    """
+    common = list(
+        set(left_df.columns).intersection(right_df.columns) - {'value'}
+    )
+
+    if common:
+        merged = left_df.merge(right_df, on=common)
+    else:
+        merged = left_df.merge(right_df, how='cross')
+
+    merged['value'] = merged['value_x'] * merged['value_y']
+
+    return merged.drop(columns=['value_x', 'value_y'])
+
+
+def sum_product_by_value(factors, var, max_split_values=MAX_SPLIT_VALUES):
+    """
+    Multiply factors and sum out a variable without materializing the full
+    product. The factors are sliced by each value of a variable they all
+    share, the one with the fewest values; each slice is multiplied and
+    reduced on its own. If that variable is the one being summed out, the
+    partial sums get accumulated. Otherwise, they get stacked. Peak memory is
+    bounded by the product of a single slice rather than the joint table
+    over all values.
+
+    Every slice costs a few pandas calls, so when even the shared variable
+    with the fewest values has more than max_split_values of them, the
+    factors get multiplied and summed in one go instead.
+
+    Parameters:
+        factors: list[Factor]
+            Every factor is expected to have var as one of its variables.
+
+        var: str
+            The variable to be summed out.
+
+        max_split_values: integer. Defaults to MAX_SPLIT_VALUES.
+            Maximum number of slices.
+
+    Returns: Factor or FactorOne
+    """
+    first = factors[0]
+
+    other_vars = list(
+        set().union(*[factor.get_variables() for factor in factors]) - {var}
+    )
+
+    if not other_vars:
+        return FactorOne()
+
+    if any(is_partitioned(factor.get_data()) for factor in factors):
+        # Multiply out of core, and sum var out along with the last product.
+        # A partitioned factor goes first, so that every merge has one.
+        factors = sorted(
+            factors,
+            key=lambda factor: not is_partitioned(factor.get_data())
+        )
+        data = factors[0].get_data()
+
+        for i, factor in enumerate(factors[1:]):
+            data = merge(
+                data,
+                factor.get_data(),
+                np.multiply,
+                var=var if i == len(factors) - 2 else None
+            )
+
+        if len(factors) == 1:
+            data = sum_variable(data, var)
+
+        return factors[0].__derive__(data)
+
+    dfs = [factor.get_df() for factor in factors]
+
+    shared = set(dfs[0].columns).intersection(*[df.columns for df in dfs])
+    cardinalities = {
+        variable: min(df[variable].nunique() for df in dfs)
+        for variable in shared - {'value'}
+    }
+    # Ties go to var, whose partial sums need no stacking.
+    split = min(
+        cardinalities,
+        key=lambda variable: (cardinalities[variable], variable != var)
+    )
+
+    if cardinalities[split] > max_split_values:
+        merged = dfs[0]
+        for df in dfs[1:]:
+            merged = multiply_dfs(merged, df)
+
+        if merged.shape[0] == 0:
+            raise ArgumentError(
+                "Tables being merged have nothing in common:"
+                + f"\ncommon: {var}"
+            )
+
+        return first.__derive__(
+            first.__create_data__(
+                merged.groupby(other_vars)[['value']].sum().reset_index()
+            )
+        )
+
+    slices = [dict(list(df.groupby(split, sort=False))) for df in dfs]
+
+    values = set(slices[0])
+    for df_slices in slices[1:]:
+        values = values.intersection(df_slices)
+
+    partials = []
+
+    for value in values:
+        merged = None
+
+        for df_slices in slices:
+            df_slice = df_slices[value].drop(columns=[split])
+
+            if merged is None:
+                merged = df_slice
+            else:
+                merged = multiply_dfs(merged, df_slice)
+
+            if merged.shape[0] == 0:
+                break
+
+        if merged.shape[0] == 0:
+            continue
+
+        if split == var:
+            partials.append(merged.groupby(other_vars)[['value']].sum())
+        else:
+            group_vars = [
+                variable for variable in other_vars if variable != split
+            ]
+
+            if group_vars:
+                partial = merged.groupby(group_vars)[['value']].sum()\
+                    .reset_index()
+            else:
+                partial = pd.DataFrame({'value': [merged['value'].sum()]})
+
+            partial[split] = value
+            partials.append(partial)
+
+    if not partials:
+        raise ArgumentError(
+            "Tables being merged have nothing in common:"
+            + f"\ncommon: {var}"
+        )
+
+    if split != var:
+        return first.__derive__(
+            first.__create_data__(pd.concat(partials, ignore_index=True))
+        )
+
+    total = partials[0]
+    for partial in partials[1:]:
+        total = total.add(partial, fill_value=0.0)
+
+    return first.__derive__(first.__create_data__(total.reset_index()))
@@ -21,3 +21,10 @@ class FactorOne:
             Empty.
         """
         return []
+
+    def get_nbytes(self):
+        """
+        Returns: integer
+            Zero.
+        """
+        return 0
@@ -1,6 +1,9 @@
 """
 Factors class.
 """
+from .dense_factor import DenseFactor, sum_product as dense_sum_product
+from .factor import Factor, sum_product_by_value
+from .out_of_core import is_partitioned
 
 
 class Factors():
@@ -49,17 +52,122 @@ class Factors():
 
     def prod(self):
         """
-        Multiply set of factors
+        Multiply set of factors. The order of the multiplications follows
+        get_prod_plan, so that small intermediate products get built first.
+
+        Factors whose data is partitioned get multiplied in order instead,
+        since planning would need to count the values of every partition.
         """
-        factor_prod = None
+        partitioned = any(
+            isinstance(factor, Factor) and is_partitioned(factor.get_data())
+            for factor in self.factors
+        )
+
+        if len(self.factors) <= 2 or partitioned:
+            factor_prod = None
+
+            for factor in self.factors:
+                if factor_prod is None:
+                    factor_prod = factor
+                else:
+                    factor_prod = factor_prod.prod(factor)
+
+            return factor_prod
+
+        steps, _ = self.get_prod_plan()
+        products = list(self.factors)
 
+        for left, right in steps:
+            products.append(products[left].prod(products[right]))
+
+            # Only the products still to be multiplied are kept, so that
+            # peak memory is not the sum of every intermediate product.
+            products[left] = products[right] = None
+
+        return products[-1]
+
+    def get_prod_plan(self):
+        """
+        Plan the order of the pairwise multiplications, like a join-order
+        optimizer. At each step, the pair of factors whose product has the
+        smallest predicted size gets multiplied first. The predicted size of a
+        product is the product of the domain sizes of its variables.
+
+        Returns: tuple (list[tuple[integer, integer]], integer)
+            First item is the list of steps. Each step is a pair of indices
+            to multiply. Indices below len(self) refer to the factors, while
+            index len(self) + k refers to the product created in step k.
+
+            Second item is the estimated cost of the plan, i.e. the sum of the
+            predicted sizes of every product.
+        """
+        domain_sizes = {}
         for factor in self.factors:
-            if factor_prod is None:
-                factor_prod = factor
-            else:
-                factor_prod = factor_prod.prod(factor)
+            for var, size in factor.get_domain_sizes().items():
+                domain_sizes[var] = min(size, domain_sizes.get(var, size))
+
+        def predicted_size(variables):
+            size = 1
+            for var in variables:
+                size *= domain_sizes[var]
+            return size
+
+        remaining = {
+            i: set(factor.get_variables())
+            for i, factor in enumerate(self.factors)
+        }
+        next_index = len(self.factors)
+        steps = []
+        cost = 0
+
+        while len(remaining) > 1:
+            best = None
+            indices = sorted(remaining)
+
+            for i, left in enumerate(indices):
+                for right in indices[i + 1:]:
+                    size = predicted_size(
+                        remaining[left].union(remaining[right])
+                    )
+
+                    if best is None or size < best[0]:
+                        best = (size, left, right)
+
+            size, left, right = best
+            remaining[next_index] = remaining.pop(left)\
+                .union(remaining.pop(right))
+            steps.append((left, right))
+            cost += size
+            next_index += 1
+
+        return steps, cost
+
+    def sum_product(self, var):
+        """
+        Multiply the factors and sum out a variable, without materializing
+        the product over every variable of every factor.
+
+        DenseFactors are contracted with einsum. Factors are sliced along
+        the variable they all share that has the fewest values, and each
+        slice is reduced on its own (see sum_product_by_value). If that
+        variable has more than MAX_SPLIT_VALUES values, they get multiplied
+        and summed in one go instead. Partitioned factors get multiplied and
+        summed out of core.
+        Other factors fall back to prod followed by sum.
+
+        Parameters:
+            var: str
+                The variable to be summed out.
+
+        Returns: Factor, DenseFactor, or FactorOne
+        """
+        if any(isinstance(factor, DenseFactor) for factor in self.factors):
+            return dense_sum_product(self.factors, var)
+
+        if all(isinstance(factor, Factor) for factor in self.factors):
+            return sum_product_by_value(self.factors, var)
 
-        return factor_prod
+        return self.prod().sum(var)
 
     def get_variables(self):
         """
@@ -3,9 +3,17 @@ Algorithms for inference.
 
 Classes:
     VariableElimination
+    JunctionTree
+    LRUCache
+    StoragePolicy
 
 Functions:
     min_neighbors
+    estimate_elimination
 """
 import logging
 from .variable_elimination import VariableElimination
+from .junction_tree import JunctionTree
+from .cache import LRUCache
+from .storage_policy import StoragePolicy
+from .elimination_order import estimate_elimination
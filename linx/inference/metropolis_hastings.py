@@ -3,6 +3,7 @@ Metropolis-Hastings sampler for Bayesian Networks with Random Variables.
 """
 import numpy as np
 from ..particles.particle import Particle
+from ..particles.particle_set import ParticleSet
 from tqdm import tqdm
 
 
@@ -38,7 +39,8 @@ class MetropolisHastings:
                 Number of burn-in samples to discard.
 
         Returns:
-            list[Particle]: List of sampled particles.
+            ParticleSet: The sampled particles, along with whether each step
+                was accepted.
         """
         # Initialize particle
         if self.initial_particle is None:
@@ -46,8 +48,10 @@ class MetropolisHastings:
         else:
             current_particle = self.initial_particle.copy()
 
-        samples = []
-        accepted = 0
+        samples = ParticleSet(
+            variables=current_particle.get_variables(),
+            capacity=n
+        )
 
         # Burn-in phase with progress bar
         for _ in tqdm(range(burn_in), desc="Burn-in", leave=False):
@@ -56,12 +60,9 @@ class MetropolisHastings:
         # Sampling phase with progress bar
         for _ in tqdm(range(n), desc="Sampling"):
             current_particle = self._step(current_particle)
-            samples.append(current_particle.copy())
-            if current_particle.is_accepted():
-                accepted += 1
+            samples.append(current_particle)
 
-        acceptance_rate = accepted / n
-        print(f"Acceptance rate: {acceptance_rate:.3f}")
+        print(f"Acceptance rate: {samples.get_acceptance_rate():.3f}")
 
         return samples
 
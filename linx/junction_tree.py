@@ -0,0 +1,363 @@
+"""
+JunctionTree module
+"""
+from collections import deque
+
+from .elimination_order import EliminationOrderer
+from .errors import ArgumentError
+from .factor_one import FactorOne
+from .factors import Factors
+
+
+class JunctionTree:
+    """
+    Junction tree (a.k.a. clique tree) inference. The tree is built once out
+    of the network, and calibrated with sum-product message passing. Once
+    calibrated, the marginal of any set of variables contained in a clique,
+    given the evidence, could be read off a single clique without redoing
+    the products of the whole network.
+
+    Evidence could be changed afterwards with set_evidence and
+    retract_evidence. Only the clique potentials that hold the changed
+    variable, and the messages flowing away from those cliques, get
+    recomputed; every other message is reused.
+
+    Parameters:
+        network: BayesianNetwork or MarkovNetwork
+
+        evidence: dict[str, any]. Optional.
+            Key is a variable name. Value is its observed value.
+
+        heuristic: str. Defaults to 'min_fill'.
+            EliminationOrderer heuristic used to triangulate the network.
+
+        factor_class: class. Optional.
+            Used when converting a BayesianNetwork, e.g. DenseFactor.
+    """
+    def __init__(
+        self,
+        network,
+        evidence=None,
+        heuristic='min_fill',
+        factor_class=None,
+    ):
+        if hasattr(network, 'get_random_variables'):
+            network = network.to_markov_network(factor_class=factor_class)
+
+        if evidence is None:
+            evidence = {}
+
+        self.evidence = dict(evidence)
+        self.factors = get_unique_factors(network)
+        self.cliques = build_cliques(network, heuristic)
+        self.neighbors = build_tree(self.cliques)
+
+        self.assignments = {i: [] for i in range(len(self.cliques))}
+        for factor in self.factors:
+            self.assignments[
+                self.__smallest_clique__(factor.get_variables())
+            ].append(factor)
+
+        self.potentials = {}
+        self.messages = {}
+
+    def __repr__(self):
+        return f"JunctionTree(\n\tcliques: {self.cliques}," \
+            + f"\n\tevidence: {self.evidence}\n)"
+
+    def __smallest_clique__(self, variables):
+        candidates = [
+            i for i, clique in enumerate(self.cliques)
+            if clique.issuperset(variables)
+        ]
+
+        if not candidates:
+            raise ArgumentError(
+                f"No clique contains all of the variables {variables}."
+                + f" Cliques: {self.cliques}"
+            )
+
+        return min(candidates, key=lambda i: len(self.cliques[i]))
+
+    def __invalidate__(self, var):
+        """
+        Forget the potentials that depend on the evidence of var, and the
+        messages that depend on those potentials, i.e. the ones that flow
+        away from the affected cliques.
+        """
+        for clique, factors in self.assignments.items():
+            if not any(var in factor.get_variables() for factor in factors):
+                continue
+
+            self.potentials.pop(clique, None)
+
+            parents = {clique: None}
+            queue = deque([clique])
+
+            while queue:
+                sender = queue.popleft()
+
+                for receiver in self.neighbors[sender]:
+                    if receiver not in parents:
+                        parents[receiver] = sender
+                        self.messages.pop((sender, receiver), None)
+                        queue.append(receiver)
+
+    def __potential__(self, clique):
+        """
+        Product of the factors assigned to a clique, with the evidence
+        applied. None if no factor got assigned to it.
+        """
+        if clique not in self.potentials:
+            factors = [
+                factor.filter(self.evidence)
+                for factor in self.assignments[clique]
+            ]
+
+            if factors:
+                self.potentials[clique] = Factors(factors).prod()
+            else:
+                self.potentials[clique] = None
+
+        return self.potentials[clique]
+
+    def __combine__(self, clique, exclude=None):
+        """
+        Product of the potential of a clique and the messages it received
+        from every neighbor but exclude.
+        """
+        factors = [self.__potential__(clique)] + [
+            self.messages[(neighbor, clique)]
+            for neighbor in self.neighbors[clique]
+            if neighbor != exclude
+        ]
+
+        factors = [factor for factor in factors if factor is not None]
+
+        if not factors:
+            return None
+
+        return Factors(factors).prod()
+
+    def __send__(self, sender, receiver):
+        factor = self.__combine__(sender, exclude=receiver)
+
+        if factor is None:
+            return None
+
+        separator = self.cliques[sender].intersection(self.cliques[receiver])
+
+        for var in factor.get_variables():
+            if var not in separator:
+                factor = factor.sum(var)
+
+        if isinstance(factor, FactorOne):
+            return None
+
+        # Messages only matter up to a constant. Normalizing them keeps the
+        # values away from underflow on long chains.
+        return factor.normalize()
+
+    def __collect__(self, root):
+        """
+        Make sure that every message flowing towards root is computed.
+        Messages that are already computed are reused.
+        """
+        parents = {root: None}
+        visit_order = []
+        queue = deque([root])
+
+        while queue:
+            clique = queue.popleft()
+            visit_order.append(clique)
+
+            for neighbor in self.neighbors[clique]:
+                if neighbor not in parents:
+                    parents[neighbor] = clique
+                    queue.append(neighbor)
+
+        for clique in reversed(visit_order[1:]):
+            edge = (clique, parents[clique])
+
+            if edge not in self.messages:
+                self.messages[edge] = self.__send__(*edge)
+
+    def calibrate(self):
+        """
+        Compute every message of the tree, in both directions.
+        """
+        for clique in range(len(self.cliques)):
+            self.__collect__(clique)
+
+    def set_evidence(self, evidence):
+        """
+        Observe values of variables, replacing previous observations of the
+        same variables.
+
+        Parameters:
+            evidence: dict[str, any]
+                Key is a variable name. Value is its observed value.
+        """
+        for var, value in evidence.items():
+            if var in self.evidence and self.evidence[var] == value:
+                continue
+
+            self.evidence[var] = value
+            self.__invalidate__(var)
+
+    def retract_evidence(self, variables):
+        """
+        Forget the observed values of variables.
+
+        Parameters:
+            variables: str or list[str]
+        """
+        if isinstance(variables, str):
+            variables = [variables]
+
+        for var in variables:
+            if var in self.evidence:
+                del self.evidence[var]
+                self.__invalidate__(var)
+
+    def get_evidence(self):
+        """
+        Returns: dict[str, any]
+        """
+        return dict(self.evidence)
+
+    def get_cliques(self):
+        """
+        Returns: list[frozenset[str]]
+        """
+        return self.cliques
+
+    def get_belief(self, clique):
+        """
+        Unnormalized joint of the variables of a clique and the evidence.
+
+        Parameters:
+            clique: integer
+                Index of the clique.
+
+        Returns: Factor
+        """
+        self.__collect__(clique)
+
+        return self.__combine__(clique)
+
+    def marginal(self, variables):
+        """
+        P(variables | evidence). The variables must all be part of a clique.
+
+        Parameters:
+            variables: list[str]
+
+        Returns: Factor
+        """
+        if isinstance(variables, str):
+            variables = [variables]
+
+        clique = self.__smallest_clique__(variables)
+        belief = self.get_belief(clique)
+
+        for var in belief.get_variables():
+            if var not in variables:
+                belief = belief.sum(var)
+
+        return belief.normalize()
+
+
+def get_unique_factors(network):
+    """
+    Every factor of a Markov network, once.
+
+    Parameters:
+        network: MarkovNetwork
+
+    Returns: list[Factor]
+    """
+    seen = set()
+    factors = []
+
+    for var in network.get_variables():
+        for factor in network.get_factors(var):
+            if id(factor) not in seen:
+                seen.add(id(factor))
+                factors.append(factor)
+
+    return factors
+
+
+def build_cliques(network, heuristic='min_fill'):
+    """
+    Triangulate the interaction graph by eliminating every variable, and keep
+    the maximal elimination cliques.
+
+    Parameters:
+        network: MarkovNetwork
+
+        heuristic: str
+
+    Returns: list[frozenset[str]]
+    """
+    orderer = EliminationOrderer(network, heuristic=heuristic)
+    remaining = list(orderer.neighbors)
+    cliques = []
+
+    while remaining:
+        var = orderer.choose(remaining)
+        remaining.remove(var)
+        clique = frozenset(orderer.eliminate(var))
+
+        # Cliques formed later never contain variables eliminated earlier,
+        # so they could only be subsets of earlier cliques, not supersets.
+        if not any(clique.issubset(other) for other in cliques):
+            cliques.append(clique)
+
+    return cliques
+
+
+def build_tree(cliques):
+    """
+    Connect the cliques with a maximum spanning tree, where the weight of an
+    edge is the size of the separator (the intersection of the two cliques).
+    Cliques that share no variable are left unconnected, so a disconnected
+    network gives a forest.
+
+    Parameters:
+        cliques: list[frozenset[str]]
+
+    Returns: dict[integer, list[integer]]
+        Neighbors of each clique.
+    """
+    edges = []
+
+    for i, left in enumerate(cliques):
+        for j in range(i + 1, len(cliques)):
+            separator_size = len(left.intersection(cliques[j]))
+
+            if separator_size:
+                edges.append((separator_size, i, j))
+
+    edges.sort(key=lambda edge: -edge[0])
+
+    roots = list(range(len(cliques)))
+
+    def find(i):
+        while roots[i] != i:
+            roots[i] = roots[roots[i]]
+            i = roots[i]
+        return i
+
+    neighbors = {i: [] for i in range(len(cliques))}
+
+    for _, i, j in edges:
+        root_i, root_j = find(i), find(j)
+
+        if root_i != root_j:
+            roots[root_i] = root_j
+            neighbors[i].append(j)
+            neighbors[j].append(i)
+
+    return neighbors
@@ -6,32 +6,44 @@ import pandas as pd
 
 from .errors import ArgumentError
 from .factor_one import FactorOne
+from .settings import is_debug
 
 
 def compute_log_sum_exp(other_vars, tmp_df):
     """
-    Compute log_sum_exp
+    Compute log(sum(exp(value))) for each group of other_vars, in one
+    vectorized pass. The max of each group is subtracted before
+    exponentiating, so that tiny log values don't underflow to 0.
 
     Parameters:
         other_vars: list[str]
         tmp_df: pd.DataFrame
+
+    Returns: pd.DataFrame
+        One row per group, with the other_vars and 'value' columns.
     """
-    shifted = tmp_df\
-        .groupby(other_vars)[['value']].shift(-1)
+    values = tmp_df['value']
+    maxes = values.groupby(
+        [tmp_df[var] for var in other_vars]
+    ).transform('max')
+
+    # Groups whose values are all -inf would give nan when shifted.
+    maxes = maxes.where(np.isfinite(maxes), 0.0)
 
-    lagged = tmp_df.merge(
-        shifted.rename(columns=lambda x: x+"_lag"),
-        left_index=True,
-        right_index=True
+    shifted = tmp_df[other_vars].assign(
+        value=np.exp(values - maxes),
+        max=maxes
     )
 
-    tmp_df['value'] = \
-        np.logaddexp(lagged['value'], lagged['value_lag'])
-    # TODO: this might be a problem when there are an odd number of
-    # rows for a group?
-    tmp_df = tmp_df.dropna()
+    summed = shifted.groupby(other_vars).agg(
+        value=('value', 'sum'),
+        max=('max', 'first')
+    )
 
-    return tmp_df
+    with np.errstate(divide='ignore'):
+        summed['value'] = np.log(summed['value']) + summed['max']
+
+    return summed[['value']].reset_index()
 
 
 class LogFactor:
@@ -44,15 +56,26 @@ class LogFactor:
 
     Working in the log space helps us prevent underflow error while still
     letting us represent really tiny probabilities.
+
+    Parameters:
+        data: Data
+
+        cpt: ConditionalProbabilityTable
+
+        validate: bool. Defaults to True.
+            If False, the checks for duplicate entries, negative infinity
+            values, and emptiness are skipped, unless debug mode is on (see
+            linx.settings.set_debug).
     """
 
-    def __init__(self, data=None, cpt=None):
+    def __init__(self, data=None, cpt=None, validate=True):
         if data is not None:
             self.data = data
         else:
             self.data = cpt.get_data()
 
-        self.__validate__()
+        if validate or is_debug():
+            self.__validate__()
         self.data_class = self.data.__class__
 
     def __validate__(self):
@@ -110,10 +133,19 @@ class LogFactor:
                     # We assume we're doing an equality
                     df = df[df[key] == value]
 
+                if df.shape[0] == 0:
+                    raise ArgumentError(
+                        "Dataframe is empty after filtering using filter"
+                        + f" {key}.\n\tColumns: {df.columns}"
+                    )
+
         return LogFactor(
             self.data.__class__(
-                df, storage_folder=self.data.get_storage_folder()
-            )
+                df,
+                storage_folder=self.data.get_storage_folder(),
+                temporary=True
+            ),
+            validate=False
         )
 
     def get_data(self):
@@ -146,11 +178,13 @@ class LogFactor:
 
         data = self.data.__class__(
             merged[variables],
-            storage_folder=self.data.get_storage_folder()
+            storage_folder=self.data.get_storage_folder(),
+            temporary=True
         )
 
         return LogFactor(
-            data
+            data,
+            validate=False
         )
 
     def subtract(self, other):
@@ -173,8 +207,75 @@ class LogFactor:
         return LogFactor(
             self.data.__class__(
                 merged[variables],
-                storage_folder=self.data.get_storage_folder()
-            )
+                storage_folder=self.data.get_storage_folder(),
+                temporary=True
+            ),
+            validate=False
+        )
+
+    def logsumexp(self, var):
+        """
+        Sum out a variable in log space:
+            log(sum_var ɸ(x, var)) = m + log(sum_var exp(log(ɸ(x, var)) - m))
+        where m is the max of log(ɸ(x, var)) for each x.
+
+        Parameters:
+            var: string
+                The variable to be summed out.
+
+        Returns: LogFactor or FactorOne
+            FactorOne if var was the only variable.
+        """
+        other_vars = list(set(self.get_variables()) - {var})
+
+        if not other_vars:
+            return FactorOne()
+
+        return LogFactor(
+            self.data.__class__(
+                compute_log_sum_exp(other_vars, self.data.read()),
+                storage_folder=self.data.get_storage_folder(),
+                temporary=True
+            ),
+            validate=False
+        )
+
+    def normalize(self, variables=None):
+        """
+        Make the exponentiated values sum up to 1, by subtracting their
+        logsumexp. Stays in log space.
+
+        Parameters:
+            variables: list[str]. Optional.
+                The variables in the denominator. If given, the values sum up
+                to 1 for each combination of values of these variables.
+
+        Returns: LogFactor
+        """
+        df = self.data.read()
+
+        if not variables:
+            values = df['value'].to_numpy()
+            max_value = values.max()
+
+            log_total = max_value + np.log(np.exp(values - max_value).sum())
+
+            normalized = df.assign(value=values - log_total)
+        else:
+            totals = compute_log_sum_exp(list(variables), df)
+            merged = df.merge(totals, on=list(variables))
+
+            normalized = merged\
+                .assign(value=merged['value_x'] - merged['value_y'])\
+                .drop(columns=['value_x', 'value_y'])
+
+        return LogFactor(
+            self.data.__class__(
+                normalized,
+                storage_folder=self.data.get_storage_folder(),
+                temporary=True
+            ),
+            validate=False
         )
 
     def __merged__(self, other):
@@ -190,9 +291,7 @@ class LogFactor:
         if common:
             merged = left_df.merge(right_df, on=common)
         else:
-            left_df['cross-join'] = 1
-            right_df['cross-join'] = 1
-            merged = left_df.merge(right_df, on='cross-join')
+            merged = left_df.merge(right_df, how='cross')
 
         if merged.shape[0] == 0:
             raise ArgumentError(
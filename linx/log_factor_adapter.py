@@ -4,6 +4,7 @@ LogFactorAdapter module
 import numpy as np
 
 from .errors import ArgumentError
+from .factor import Factor
 from .factor_one import FactorOne
 from .log_factor import LogFactor
 
@@ -11,8 +12,19 @@ from .log_factor import LogFactor
 class LogFactorAdapter:
     """
     Acts like a Factor object, but is using a LogFactor underneath.
+
+    Parameters:
+        data: Data
+            Values in linear space.
+
+        cpt: ConditionalProbabilityTable
+
+        log_factor: LogFactor
+
+        validate: bool. Defaults to True.
+            Passed on to the LogFactor built out of data or cpt.
     """
-    def __init__(self, data=None, cpt=None, log_factor=None):
+    def __init__(self, data=None, cpt=None, log_factor=None, validate=True):
         if log_factor is not None and data is not None:
             raise ArgumentError(
                 "LogFactorAdapter must be supplied with only one of"
@@ -24,23 +36,23 @@ class LogFactorAdapter:
                 + " Data, ConditionalProbabilityTable, or LogFactor"
             )
 
+        if cpt is not None:
+            data = cpt.get_data()
+
         if data is not None:
             df = data.read()
-            df['value'] = np.log(df['value'])
-
-            self.log_factor = LogFactor(
-                data=data.__class__(df, data.get_storage_folder())
-            )
-            self.data_class = data.__class__
 
-        elif cpt is not None:
-            data = cpt.data
-
-            df = data.read()
-            df['value'] = np.log(df['value'])
+            # Rows that are absent are treated as zeros by the products, so
+            # zeros are dropped instead of being turned into -inf.
+            df = df[df['value'] != 0]
 
             self.log_factor = LogFactor(
-                data=data.__class__(df, data.get_storage_folder())
+                data=data.__class__(
+                    df.assign(value=np.log(df['value'])),
+                    data.get_storage_folder(),
+                    temporary=True
+                ),
+                validate=validate
             )
             self.data_class = data.__class__
 
@@ -58,6 +70,23 @@ class LogFactorAdapter:
         """
         return self.log_factor.get_variables()
 
+    def get_domain_sizes(self):
+        """
+        Return the number of distinct values of each variable.
+
+        Returns: dict[str, integer]
+        """
+        df = self.log_factor.get_data().read()
+
+        return {var: df[var].nunique() for var in self.get_variables()}
+
+    def get_nbytes(self):
+        """
+        Returns: integer
+            Bytes used by the data of the log factor.
+        """
+        return self.log_factor.get_data().get_nbytes()
+
     def div(self, other):
         """
         Parameters:
@@ -102,40 +131,25 @@ class LogFactorAdapter:
 
     def sum(self, var):
         """
-        Get the other variables besides the one being passed in. Group by those
-        variables. Take the sum.
+        Sum out a variable. The sum is done in log space, with logsumexp.
 
         Parameters:
             var: string
                 The variable to be summed out.
 
-        Returns: LogFactorAdapter
+        Returns: LogFactorAdapter or FactorOne
         """
+        log_factor = self.log_factor.logsumexp(var)
 
-        if isinstance(var, str):
-            variables = [var]
-
-        df = self.get_df()
-
-        other_vars = list(
-            set(self.get_variables()) - set(variables)
-        )
-
-        if not other_vars:
-            return FactorOne()
-
-        return_df = df.groupby(other_vars).sum()[['value']].reset_index()
+        if isinstance(log_factor, FactorOne):
+            return log_factor
 
-        return LogFactorAdapter(
-            data=self.data_class(
-                return_df,
-                storage_folder=self.log_factor.get_data().get_storage_folder()
-            )
-        )
+        return LogFactorAdapter(log_factor=log_factor)
 
     def normalize(self, variables=None):
         """
-        Make sure the values represent probabilities.
+        Make sure the values represent probabilities. Done in log space, by
+        subtracting the logsumexp of the values.
 
         Parameters:
             variables: list[str]
@@ -143,29 +157,8 @@ class LogFactorAdapter:
 
         Returns: LogFactorAdapter
         """
-
-        df = self.get_df()
-
-        if not variables:
-            df['value'] = df['value'] / df['value'].sum()
-
-            return Factor(
-                data=self.data_class(
-                    df,
-                    storage_folder=self
-                    .get_data().get_storage_folder()
-                )
-            )
-
-        sum_df = df.groupby(variables)[['value']].sum()
-        merged = df.merge(sum_df, on=variables)
-        merged['value'] = merged['value_x'] / merged['value_y']
-
-        return Factor(
-            data=self.data_class(
-                merged.drop(columns=['value_x', 'value_y']),
-                storage_folder=self.log_factor.get_data().get_storage_folder()
-            )
+        return LogFactorAdapter(
+            log_factor=self.log_factor.normalize(variables)
         )
 
     def get_df(self):
@@ -175,9 +168,28 @@ class LogFactorAdapter:
         Returns: pd.DataFrame
         """
 
-        df = self.data.read()
-        df['value'] = np.exp(df['value'])
-        return df
+        df = self.log_factor.get_data().read()
+
+        return df.assign(value=np.exp(df['value']))
 
     def get_data(self):
-        return self.data
+        """
+        Return the data object, with the values exponentiated.
+
+        Returns: Data
+        """
+        data = self.log_factor.get_data()
+
+        return data.__class__(
+            self.get_df(),
+            storage_folder=data.get_storage_folder(),
+            temporary=True
+        )
+
+    def to_factor(self):
+        """
+        Convert to a Factor, exponentiating the values.
+
+        Returns: Factor
+        """
+        return Factor(log_factor=self.log_factor, validate=False)
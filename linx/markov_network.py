@@ -1,6 +1,9 @@
 """
 MarkovNetwork class.
 """
+from uuid import uuid4
+
+from .domains import DomainRegistry
 from .factors import Factors
 
 
@@ -8,9 +11,23 @@ class MarkovNetwork:
     """
     Markov network. A data structure that has undirected edges. Each clique
     represents a factor.
+
+    Attributes:
+        domain_registry: DomainRegistry or None
+            Set when the factors store integer codes instead of values. Query
+            filters get translated into codes before being applied.
+
+        network_id: str
+            Identifies this network among others.
+
+        version: integer
+            Incremented every time a factor gets added or removed.
     """
     def __init__(self):
         self.factors = {}
+        self.domain_registry = None
+        self.network_id = uuid4().hex
+        self.version = 0
 
     def __repr__(self):
         return f"MarkovNetwork({self.factors})"
@@ -29,6 +46,8 @@ class MarkovNetwork:
                 self.factors[var] = Factors([])
             self.factors[var].append(factor)
 
+        self.version += 1
+
     def get_factors(self, node=None):
         """
         If node is None, returns all factors.
@@ -38,17 +57,18 @@ class MarkovNetwork:
 
         Returns: list[Factor]
         """
-        cache = {}
+        seen = set()
         factors = Factors([])
 
         if node:
             return Factors(list(self.factors[node]))
 
+        # A factor is listed under each of its variables. Factors are told
+        # apart by identity, since different factors could share a scope.
         for _, fs in self.factors.items():
             for factor in fs:
-                variables_key = '-'.join(sorted(factor.get_variables()))
-                if variables_key not in cache:
-                    cache[variables_key] = 1
+                if id(factor) not in seen:
+                    seen.add(id(factor))
                     factors.append(factor)
 
         return factors
@@ -73,6 +93,27 @@ class MarkovNetwork:
             factors = self.factors[node]
             factors.remove(factor)
 
+        self.version += 1
+
+    def get_fingerprint(self):
+        """
+        Identifies the current state of the network. Changes whenever the
+        network gets mutated through add_factor or remove_factor, or the
+        data of one of its factors gets written.
+
+        Returns: tuple (str, integer, tuple[integer])
+            The network_id, the version, and the version of the data of each
+            factor (0 when it has none).
+        """
+        return (
+            self.network_id,
+            self.version,
+            tuple(
+                getattr(getattr(factor, 'data', None), 'version', 0)
+                for factor in self.get_factors()
+            )
+        )
+
     def apply_query(self, query):
         """
         Replaces each factor with a filtered version of the factor, if the
@@ -83,18 +124,89 @@ class MarkovNetwork:
         """
         filters = query.get_filters()
 
+        if self.domain_registry is None:
+            to_apply = query
+        else:
+            to_apply = self.domain_registry.encode_filters(query)
+
         for obj in filters:
             variable = list(obj.keys())[0]
             factors = self.get_factors(variable)
 
             for factor in factors:
-                self.add_factor(factor.filter(query))
+                self.add_factor(factor.filter(to_apply))
                 self.remove_factor(factor)
 
-    def to_markov_network(self):
+    def to_markov_network(
+        self,
+        factor_class=None,
+        encode_domains=False,
+        storage_policy=None,
+    ):
         """
-        Returns a copy of this markov network.
+        Returns a copy of this markov network, which could be mutated (e.g.
+        by VariableElimination) without touching this one.
+
+        Parameters:
+            factor_class: class. Optional.
+                Factors that are not instances of it get converted through
+                factor_class(data=factor.get_data()). Left as they are if
+                None.
+
+            encode_domains: bool. Defaults to False.
+                If True and this network has no domain registry yet, builds
+                one out of the values of every factor, and the factors of the
+                copy store integer codes instead. A registry this network
+                already has gets passed on to the copy either way.
+
+            storage_policy: StoragePolicy. Optional.
+                Passed to each factor that gets created, like with
+                BayesianNetwork.to_markov_network.
 
         Returns: MarkovNetwork
         """
-        # TODO: solve this
+        kwargs = {}
+        if storage_policy is not None:
+            kwargs['storage_policy'] = storage_policy
+
+        def convert(factor, data=None):
+            if data is None:
+                unchanged = factor_class is None \
+                    or isinstance(factor, factor_class)
+
+                if unchanged and not kwargs:
+                    return factor
+
+                data = factor.get_data()
+
+            return (factor_class or factor.__class__)(data=data, **kwargs)
+
+        markov_network = MarkovNetwork()
+        markov_network.domain_registry = self.domain_registry
+
+        if not encode_domains or self.domain_registry is not None:
+            for factor in self.get_factors():
+                markov_network.add_factor(convert(factor))
+
+            return markov_network
+
+        registry = DomainRegistry()
+        for factor in self.get_factors():
+            registry.add_df(factor.get_df())
+
+        for factor in self.get_factors():
+            data = factor.get_data()
+            markov_network.add_factor(
+                convert(
+                    factor,
+                    data=data.__class__(
+                        registry.encode_df(data.read()),
+                        storage_folder=data.get_storage_folder(),
+                        temporary=True
+                    )
+                )
+            )
+
+        markov_network.domain_registry = registry
+
+        return markov_network
@@ -0,0 +1,400 @@
+"""
+Out-of-core operations on the data of factors.
+
+The inputs are read in batches and hash-partitioned on disk on the variables
+that rows need to share to be combined, so that each partition could then be
+processed on its own with bounded memory. The results get written one
+partition at a time into a PartitionedParquetData.
+"""
+import shutil
+from uuid import uuid4
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .data import ParquetData, PartitionedParquetData
+from .errors import ArgumentError
+
+
+def is_partitioned(data):
+    """
+    Parameters:
+        data: Data
+
+    Returns: bool
+    """
+    return isinstance(data, PartitionedParquetData)
+
+
+def iter_batches(data, batch_size):
+    """
+    Read data a batch at a time. Data that lives in memory is returned whole.
+
+    Parameters:
+        data: Data
+        batch_size: integer
+
+    Yields: pd.DataFrame
+    """
+    if is_partitioned(data):
+        yield from data.iter_batches()
+    elif isinstance(data, ParquetData):
+        for batch in pq.ParquetFile(data.path).iter_batches(
+            batch_size=batch_size
+        ):
+            yield batch.to_pandas()
+    else:
+        yield data.read()
+
+
+def get_bucket_ids(df, variables, num_partitions):
+    """
+    Hash the values of variables into buckets. The same values always land
+    in the same bucket, whichever table they come from.
+
+    Parameters:
+        df: pd.DataFrame
+        variables: list[str]
+        num_partitions: integer
+
+    Returns: np.ndarray[integer]
+    """
+    keys = df[sorted(variables)]
+
+    # Numbers of different types hash differently, even when equal (e.g. 1
+    # and 1.0, or int8 and int64), so they all get hashed as float64.
+    # Distinct integers beyond 2**53 could share a bucket, which is harmless.
+    keys = keys.astype({
+        col: 'float64' for col in keys.columns
+        if pd.api.types.is_numeric_dtype(keys[col])
+    })
+
+    hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+    return hashes % np.uint64(num_partitions)
+
+
+def hash_partition(
+    data,
+    variables,
+    folder,
+    num_partitions,
+    batch_size,
+    transform=None,
+):
+    """
+    Split data into buckets on disk, such that rows with the same values of
+    variables end up in the same bucket.
+
+    Parameters:
+        data: Data
+
+        variables: list[str]
+
+        folder: Path-like object
+            Where the buckets get written.
+
+        num_partitions: integer
+
+        batch_size: integer
+
+        transform: callable. Optional.
+            Applied to each batch before it gets split, e.g. to pre-aggregate.
+
+    Returns: dict[integer, Path-like object]
+        Path of each bucket that received rows.
+    """
+    folder.mkdir(parents=True)
+
+    writers = {}
+    schema = None
+
+    try:
+        for batch in iter_batches(data, batch_size):
+            if transform is not None:
+                batch = transform(batch)
+
+            if batch.shape[0] == 0:
+                continue
+
+            bucket_ids = get_bucket_ids(batch, variables, num_partitions)
+
+            for bucket in np.unique(bucket_ids):
+                table = pa.Table.from_pandas(
+                    batch[bucket_ids == bucket],
+                    schema=schema,
+                    preserve_index=False
+                )
+                schema = table.schema
+
+                if bucket not in writers:
+                    writers[bucket] = pq.ParquetWriter(
+                        folder / f'bucket-{bucket:05d}.parquet',
+                        schema
+                    )
+
+                writers[bucket].write_table(table)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    return {
+        int(bucket): folder / f'bucket-{bucket:05d}.parquet'
+        for bucket in writers
+    }
+
+
+def get_settings(*datas):
+    """
+    Storage folder, number of partitions and batch size of the first
+    partitioned data among datas.
+    """
+    for data in datas:
+        if is_partitioned(data):
+            return (
+                data.get_storage_folder(),
+                data.num_partitions,
+                data.batch_size
+            )
+
+    raise ArgumentError("None of the data is partitioned.")
+
+
+def write_partitions(partitions, storage_folder, num_partitions, batch_size):
+    """
+    Write partitions, checking that the result is not empty.
+
+    Returns: PartitionedParquetData
+    """
+    data = PartitionedParquetData(
+        partitions,
+        storage_folder=storage_folder,
+        num_partitions=num_partitions,
+        batch_size=batch_size,
+        temporary=True
+    )
+
+    if not data.get_paths():
+        raise ArgumentError(
+            "Result is empty. Columns: " + f"{list(data.get_columns())}"
+        )
+
+    return data
+
+
+def sum_out(df, var):
+    """
+    Group by every variable but var, and sum the values.
+    """
+    other_vars = [col for col in df.columns if col not in [var, 'value']]
+
+    return df.groupby(other_vars)[['value']].sum().reset_index()
+
+
+def merge(left, right, operation, var=None):
+    """
+    Combine the rows of two tables that agree on their common variables,
+    e.g. to multiply or divide factors, and optionally sum out a variable
+    of the result.
+
+    Both tables get hash-partitioned on their common variables (but var, if
+    possible), so that only one bucket of each is in memory at a time. When
+    var is the only common variable, the partial sums of the buckets get
+    partitioned again on the remaining variables and summed. Without common
+    variables, the left table is streamed in batches and the right table is
+    read whole for the cross product, and the partial sums get summed the
+    same way.
+
+    Parameters:
+        left: Data
+
+        right: Data
+
+        operation: callable
+            Takes the left and the right values (pd.Series). Returns the
+            combined values.
+
+        var: str. Optional.
+            Variable to sum out of the result. It must not be the only
+            variable of the result.
+
+    Returns: PartitionedParquetData
+    """
+    storage_folder, num_partitions, batch_size = get_settings(left, right)
+
+    left_vars = set(left.get_columns()) - {'value'}
+    right_vars = set(right.get_columns()) - {'value'}
+    common = sorted(left_vars.intersection(right_vars))
+    key = [v for v in common if v != var] or common
+
+    scratch = storage_folder / f'scratch-{uuid4()}'
+
+    def combine(left_df, right_df):
+        if common:
+            merged = left_df.merge(right_df, on=common)
+        else:
+            merged = left_df.merge(right_df, how='cross')
+
+        merged = merged\
+            .assign(value=operation(merged['value_x'], merged['value_y']))\
+            .drop(columns=['value_x', 'value_y'])
+
+        if var is not None:
+            merged = sum_out(merged, var)
+
+        return merged
+
+    def partitions():
+        if not common:
+            right_df = right.read()
+
+            for left_df in iter_batches(left, batch_size):
+                yield combine(left_df, right_df)
+
+            return
+
+        left_buckets = hash_partition(
+            left, key, scratch / 'left', num_partitions, batch_size
+        )
+        right_buckets = hash_partition(
+            right, key, scratch / 'right', num_partitions, batch_size
+        )
+
+        for bucket, left_path in sorted(left_buckets.items()):
+            if bucket not in right_buckets:
+                continue
+
+            yield combine(
+                pd.read_parquet(left_path, engine='pyarrow'),
+                pd.read_parquet(right_buckets[bucket], engine='pyarrow')
+            )
+
+    try:
+        result = write_partitions(
+            partitions(), storage_folder, num_partitions, batch_size
+        )
+
+        if var is not None and (not common or var in key):
+            # Groups of the remaining variables span many buckets.
+            partial = result
+            result = sum_variable(partial, None)
+            shutil.rmtree(partial.path)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    return result
+
+
+def sum_variable(data, var):
+    """
+    Sum out a variable. Each batch gets pre-aggregated before being
+    partitioned on the remaining variables.
+
+    Parameters:
+        data: Data
+
+        var: str or None
+            If None, rows that share the values of every variable get summed.
+
+    Returns: PartitionedParquetData
+    """
+    storage_folder, num_partitions, batch_size = get_settings(data)
+
+    other_vars = sorted(set(data.get_columns()) - {'value', var})
+    scratch = storage_folder / f'scratch-{uuid4()}'
+
+    def aggregate(df):
+        return df.groupby(other_vars)[['value']].sum().reset_index()
+
+    def partitions():
+        buckets = hash_partition(
+            data,
+            other_vars,
+            scratch,
+            num_partitions,
+            batch_size,
+            transform=aggregate
+        )
+
+        for _, path in sorted(buckets.items()):
+            yield aggregate(pd.read_parquet(path, engine='pyarrow'))
+
+    try:
+        return write_partitions(
+            partitions(), storage_folder, num_partitions, batch_size
+        )
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def filter_rows(data, predicate):
+    """
+    Keep the rows that satisfy a predicate, one batch at a time.
+
+    Parameters:
+        data: Data
+
+        predicate: callable
+            Takes a pd.DataFrame. Returns a boolean pd.Series.
+
+    Returns: PartitionedParquetData
+    """
+    storage_folder, num_partitions, batch_size = get_settings(data)
+
+    return write_partitions(
+        (df[predicate(df)] for df in iter_batches(data, batch_size)),
+        storage_folder,
+        num_partitions,
+        batch_size
+    )
+
+
+def normalize(data, variables=None):
+    """
+    Divide the values by their sum, or by their sum for each combination of
+    values of variables.
+
+    Parameters:
+        data: Data
+        variables: list[str]. Optional.
+
+    Returns: PartitionedParquetData
+    """
+    storage_folder, num_partitions, batch_size = get_settings(data)
+
+    if not variables:
+        total = sum(
+            df['value'].sum() for df in iter_batches(data, batch_size)
+        )
+
+        return write_partitions(
+            (
+                df.assign(value=df['value'] / total)
+                for df in iter_batches(data, batch_size)
+            ),
+            storage_folder,
+            num_partitions,
+            batch_size
+        )
+
+    scratch = storage_folder / f'scratch-{uuid4()}'
+
+    def partitions():
+        buckets = hash_partition(
+            data, list(variables), scratch, num_partitions, batch_size
+        )
+
+        for _, path in sorted(buckets.items()):
+            df = pd.read_parquet(path, engine='pyarrow')
+            totals = df.groupby(list(variables))['value'].transform('sum')
+
+            yield df.assign(value=df['value'] / totals)
+
+    try:
+        return write_partitions(
+            partitions(), storage_folder, num_partitions, batch_size
+        )
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
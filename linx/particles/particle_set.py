@@ -0,0 +1,366 @@
+"""
+ParticleSet class for storing many samples from Bayesian Networks.
+"""
+import numpy as np
+import pandas as pd
+
+from .particle import Particle
+
+ACCEPTED = 1
+REJECTED = -1
+
+
+def get_missing_dtype(dtype):
+    """
+    Parameters:
+        dtype: np.dtype
+
+    Returns: np.dtype
+        A dtype that could hold both the values of dtype and a missing
+        value.
+    """
+    if dtype.kind in 'iub':
+        return np.dtype(float)
+
+    if dtype.kind in 'fcmMO':
+        return dtype
+
+    return np.dtype(object)
+
+
+def get_missing_value(dtype):
+    """
+    Parameters:
+        dtype: np.dtype
+            Returned by get_missing_dtype.
+
+    Returns: The missing value of dtype.
+    """
+    if dtype.kind in 'fc':
+        return np.nan
+
+    if dtype.kind == 'M':
+        return np.datetime64('NaT')
+
+    if dtype.kind == 'm':
+        return np.timedelta64('NaT')
+
+    return None
+
+
+class ParticleSet:
+    """
+    A columnar collection of particles. The values of each variable are
+    stored in one typed NumPy array, along with an array of the acceptance
+    status of each particle, so that no Python object is kept per sample.
+
+    Space for capacity particles gets allocated up front, and grows by
+    doubling when appending past it. The dtype of each variable is the one
+    of its first value, widened if a later value does not fit, or if a
+    particle has no value for it (see append).
+
+    Parameters:
+        variables: list[str] or dict[str, dtype]. Optional.
+            Names of the variables, optionally with their dtypes. Variables
+            that show up in appended particles get added as needed.
+
+        capacity: int. Defaults to 0.
+            Number of particles to allocate space for.
+    """
+
+    def __init__(self, variables=None, capacity=0):
+        if variables is None:
+            variables = {}
+        elif not isinstance(variables, dict):
+            variables = {variable: None for variable in variables}
+
+        self.capacity = capacity
+        self.size = 0
+        self.dtypes = dict(variables)
+        self.arrays = {}
+        self.status = np.zeros(capacity, dtype=np.int8)
+
+        for variable, dtype in self.dtypes.items():
+            if dtype is not None:
+                self.arrays[variable] = np.empty(capacity, dtype=dtype)
+
+    @classmethod
+    def from_columns(cls, columns, status=None):
+        """
+        Create a ParticleSet out of arrays of values, without copying them.
+
+        Parameters:
+            columns: dict[str, array-like]
+                Values of each variable, all of the same length.
+
+            status: array-like, optional
+                1 for accepted particles, -1 for rejected ones, 0 otherwise.
+
+        Returns:
+            ParticleSet
+        """
+        arrays = {
+            variable: np.asarray(values)
+            for variable, values in columns.items()
+        }
+        lengths = {values.shape[0] for values in arrays.values()}
+
+        if len(lengths) > 1:
+            raise ValueError(
+                f"Columns must all have the same length. Got {lengths}"
+            )
+
+        size = lengths.pop() if lengths else 0
+
+        particle_set = cls(
+            variables={
+                variable: values.dtype for variable, values in arrays.items()
+            }
+        )
+        particle_set.arrays = arrays
+        particle_set.capacity = size
+        particle_set.size = size
+
+        if status is None:
+            particle_set.status = np.zeros(size, dtype=np.int8)
+        else:
+            particle_set.status = np.asarray(status, dtype=np.int8)
+
+        return particle_set
+
+    def __repr__(self):
+        return f"ParticleSet(size={self.size}, " \
+            + f"variables={self.get_variables()})"
+
+    def __str__(self):
+        return self.__repr__()
+
+    def __len__(self):
+        return self.size
+
+    def __grow__(self, capacity):
+        self.capacity = max(capacity, 2 * self.capacity)
+
+        for variable, array in self.arrays.items():
+            grown = np.empty(self.capacity, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            self.arrays[variable] = grown
+
+        status = np.zeros(self.capacity, dtype=np.int8)
+        status[:self.size] = self.status[:self.size]
+        self.status = status
+
+    def __fit__(self, variable, value):
+        """
+        Make sure the array of variable could hold value.
+        """
+        dtype = np.asarray(value).dtype
+
+        if dtype.kind in 'USO':
+            dtype = np.dtype(object)
+
+        if variable not in self.arrays:
+            if self.size:
+                # Earlier particles have no value for it.
+                dtype = get_missing_dtype(dtype)
+
+            self.dtypes[variable] = dtype
+            self.arrays[variable] = np.empty(self.capacity, dtype=dtype)
+
+            if self.size:
+                self.arrays[variable][:self.size] = get_missing_value(dtype)
+
+            return
+
+        array = self.arrays[variable]
+        promoted = np.promote_types(array.dtype, dtype)
+
+        if promoted != array.dtype:
+            self.dtypes[variable] = promoted
+            self.arrays[variable] = array.astype(promoted)
+
+    def __fill_missing__(self, variable):
+        """
+        Mark the value of variable as missing for the particle being
+        appended.
+        """
+        array = self.arrays[variable]
+        dtype = get_missing_dtype(array.dtype)
+
+        if dtype != array.dtype:
+            self.dtypes[variable] = dtype
+            self.arrays[variable] = array.astype(dtype)
+
+        self.arrays[variable][self.size] = get_missing_value(dtype)
+
+    def append(self, particle):
+        """
+        Write the values of a particle at the end of this set, in place.
+
+        Variables of this set that the particle has no value for get a
+        missing value: NaN for numbers (integers and booleans get widened to
+        floats), NaT for dates, and None otherwise.
+
+        Parameters:
+            particle: Particle or dict
+                If a dict, maps variable names to values, and the status is
+                left unset.
+        """
+        if isinstance(particle, Particle):
+            values = particle.values
+
+            if particle.is_accepted():
+                status = ACCEPTED
+            elif particle.is_rejected():
+                status = REJECTED
+            else:
+                status = 0
+        else:
+            values = particle
+            status = 0
+
+        if self.size == self.capacity:
+            self.__grow__(self.size + 1)
+
+        for variable, value in values.items():
+            self.__fit__(variable, value)
+            self.arrays[variable][self.size] = value
+
+        for variable in self.arrays.keys() - values.keys():
+            self.__fill_missing__(variable)
+
+        self.status[self.size] = status
+        self.size += 1
+
+    def get_variables(self):
+        """
+        Get all variable names in this set.
+
+        Returns:
+            list: List of variable names.
+        """
+        return list(self.dtypes)
+
+    def get_values(self, variable):
+        """
+        Get the values of a variable, one per particle.
+
+        Parameters:
+            variable: str
+
+        Returns:
+            np.ndarray: A view that must not be written into.
+        """
+        return self.arrays[variable][:self.size]
+
+    def get_status(self):
+        """
+        Returns:
+            np.ndarray: 1 for accepted particles, -1 for rejected ones, 0
+                otherwise.
+        """
+        return self.status[:self.size]
+
+    def get_acceptance_rate(self):
+        """
+        Returns:
+            float: Fraction of the particles that were accepted.
+        """
+        if self.size == 0:
+            return 0.0
+
+        return float(np.mean(self.get_status() == ACCEPTED))
+
+    def __getitem__(self, index):
+        """
+        Parameters:
+            index: str, int, slice or array-like
+                A variable name gives the values of that variable. An int
+                gives a Particle. A slice, a boolean mask or an array of
+                indices gives a ParticleSet.
+        """
+        if isinstance(index, str):
+            return self.get_values(index)
+
+        if isinstance(index, (int, np.integer)):
+            if index < 0:
+                index += self.size
+
+            if not 0 <= index < self.size:
+                raise IndexError(
+                    f"Index {index} out of range for {self.size} particles"
+                )
+
+            particle = Particle({
+                variable: array[index]
+                for variable, array in self.arrays.items()
+            })
+
+            if self.status[index] == ACCEPTED:
+                particle.accept()
+            elif self.status[index] == REJECTED:
+                particle.reject()
+
+            return particle
+
+        return ParticleSet.from_columns(
+            {
+                variable: array[:self.size][index]
+                for variable, array in self.arrays.items()
+            },
+            status=self.get_status()[index]
+        )
+
+    def __iter__(self):
+        for index in range(self.size):
+            yield self[index]
+
+    def to_df(self):
+        """
+        Convert to a DataFrame with one column per variable and one row per
+        particle.
+
+        Returns:
+            pd.DataFrame
+        """
+        return pd.DataFrame({
+            variable: self.get_values(variable)
+            for variable in self.arrays
+        })
+
+    def get_stats(self, quantiles=(0.025, 0.5, 0.975)):
+        """
+        Summary statistics of each numeric variable.
+
+        Parameters:
+            quantiles: tuple[float]
+                Quantiles to compute, e.g. the bounds of a credible interval.
+
+        Returns:
+            pd.DataFrame: One row per variable. Columns are mean, std, min,
+                the quantiles, and max.
+        """
+        stats = {}
+
+        for variable in self.arrays:
+            values = self.get_values(variable)
+
+            if values.dtype.kind not in 'iufb' or values.shape[0] == 0:
+                continue
+
+            values = values.astype(float)
+            row = {
+                'mean': np.mean(values),
+                'std': np.std(values),
+                'min': np.min(values),
+            }
+
+            for quantile, value in zip(
+                quantiles, np.quantile(values, quantiles)
+            ):
+                row[f'{quantile:g}'] = value
+
+            row['max'] = np.max(values)
+            stats[variable] = row
+
+        return pd.DataFrame.from_dict(stats, orient='index')
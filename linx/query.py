@@ -1,6 +1,7 @@
 """
 Query class
 """
+import pandas as pd
 
 
 class Query:
@@ -36,6 +37,10 @@ class Query:
                             x['some_var'] > 20
                         ) & (x['some_var'] < 30)
                     }
+
+    Callable filters could be given a cache_key attribute (any hashable
+    value that identifies what they filter) so that queries using them
+    could be cached. See get_cache_key.
     """
     def __init__(
         self,
@@ -130,3 +135,147 @@ class Query:
                 given_values[var_name] = given[var_name]
         
         return given_values
+
+    def get_cache_key(self):
+        """
+        Canonical, hashable form of the query. Two queries with the same
+        outcome variables, given variables, and filters get the same key,
+        regardless of the order in which they were listed.
+
+        Returns: tuple or None
+            None if some filter could not be identified, i.e. a callable
+            without a cache_key attribute, or an unhashable value.
+        """
+        filters = []
+
+        for f in self.get_filters():
+            for var, value in f.items():
+                if callable(value):
+                    key = getattr(value, 'cache_key', None)
+
+                    if key is None:
+                        return None
+
+                    filters.append((var, 'callable', key))
+                else:
+                    filters.append((var, 'equals', value))
+
+        try:
+            hash(tuple(filters))
+        except TypeError:
+            return None
+
+        return (
+            tuple(sorted(self.get_outcome_variables())),
+            tuple(sorted(self.get_given_variables())),
+            tuple(sorted(filters, key=repr)),
+        )
+
+
+class Range:
+    """
+    Filter that keeps the rows where a variable is within bounds. It could be
+    used wherever a callable filter could, e.g.
+        Query(outcomes=['X'], givens=[{'Y': Range('Y', low=2, high=5)}])
+
+    Unlike other callables, it could be pushed down to the Parquet reader,
+    which then skips the row groups whose statistics fall out of bounds.
+
+    Parameters:
+        variable: str
+
+        low: any. Optional.
+            Lower bound. None means unbounded.
+
+        high: any. Optional.
+            Upper bound. None means unbounded.
+
+        include_low: bool. Defaults to True.
+
+        include_high: bool. Defaults to True.
+    """
+    def __init__(
+        self,
+        variable,
+        low=None,
+        high=None,
+        include_low=True,
+        include_high=True,
+    ):
+        self.variable = variable
+        self.low = low
+        self.high = high
+        self.include_low = include_low
+        self.include_high = include_high
+        self.cache_key = (
+            'range', variable, low, high, include_low, include_high
+        )
+
+    def __repr__(self):
+        return f"Range({self.variable}, low={self.low}, high={self.high})"
+
+    def __call__(self, df):
+        values = df[self.variable]
+        mask = pd.Series(True, index=df.index)
+
+        if self.low is not None:
+            if self.include_low:
+                mask = mask & (values >= self.low)
+            else:
+                mask = mask & (values > self.low)
+
+        if self.high is not None:
+            if self.include_high:
+                mask = mask & (values <= self.high)
+            else:
+                mask = mask & (values < self.high)
+
+        return mask
+
+    def get_pushdown_filters(self):
+        """
+        Returns: list[tuple]
+            In the (column, operator, value) format of pyarrow.
+        """
+        filters = []
+
+        if self.low is not None:
+            filters.append(
+                (self.variable, '>=' if self.include_low else '>', self.low)
+            )
+
+        if self.high is not None:
+            filters.append(
+                (self.variable, '<=' if self.include_high else '<', self.high)
+            )
+
+        return filters
+
+
+def get_pushdown_filters(filters, variables):
+    """
+    The filters that a Parquet reader could apply: equalities and Ranges.
+    Other callables are left out, and must be applied after reading.
+
+    Parameters:
+        filters: dict
+            Key is a variable name. Value is a callable or a value.
+
+        variables: list[str]
+            Filters of other variables are left out.
+
+    Returns: list[tuple]
+        In the (column, operator, value) format of pyarrow.
+    """
+    pushdown = []
+
+    for key, value in filters.items():
+        if key not in variables:
+            continue
+
+        if isinstance(value, Range) and value.variable == key:
+            pushdown.extend(value.get_pushdown_filters())
+        elif not callable(value):
+            pushdown.append((key, '==', value))
+
+    return pushdown
@@ -0,0 +1,232 @@
+"""
+SamplingTable module
+"""
+import numpy as np
+import pandas as pd
+
+
+def build_alias_table(probabilities):
+    """
+    Walker's alias method (Vose's variant). A draw picks a column uniformly,
+    then keeps it with its probability, or takes its alias otherwise.
+
+    Parameters:
+        probabilities: np.ndarray
+            Nonnegative weights. They don't need to sum to 1, but their sum
+            must be positive.
+
+    Returns: tuple (np.ndarray[float], np.ndarray[integer])
+        Probability of keeping each column, and the alias of each column.
+    """
+    total = probabilities.sum()
+
+    if not total > 0 or not np.isfinite(total):
+        raise ValueError(
+            f"Weights must sum to a positive number. Got {probabilities}"
+        )
+
+    size = probabilities.shape[0]
+    scaled = probabilities * size / total
+
+    keep = np.ones(size)
+    alias = np.arange(size)
+
+    small = [i for i in range(size) if scaled[i] < 1.0]
+    large = [i for i in range(size) if scaled[i] >= 1.0]
+
+    while small and large:
+        less = small.pop()
+        more = large.pop()
+
+        keep[less] = scaled[less]
+        alias[less] = more
+
+        scaled[more] = scaled[more] + scaled[less] - 1.0
+
+        if scaled[more] < 1.0:
+            small.append(more)
+        else:
+            large.append(more)
+
+    # Whatever is left is 1, up to rounding.
+    return keep, alias
+
+
+class SamplingTable:
+    """
+    A conditional probability table compiled for sampling. Rows get grouped
+    by the values of the given variables, and each group gets an alias table,
+    so that a draw takes constant time whatever the number of outcomes, and
+    draws for arrays of given values are vectorized.
+
+    Parameters:
+        df: pd.DataFrame
+            Columns are the outcome and given variables, and 'value'.
+
+        outcomes: list[str]
+
+        givens: list[str]
+    """
+    def __init__(self, df, outcomes, givens):
+        self.outcomes = outcomes
+        self.givens = givens
+
+        if givens:
+            configs = df[givens].drop_duplicates().reset_index(drop=True)
+            configs['config'] = np.arange(configs.shape[0])
+            df = df.merge(configs, on=givens)
+        else:
+            configs = pd.DataFrame({'config': [0]})
+            df = df.assign(config=0)
+
+        df = df.sort_values('config', kind='stable')
+
+        self.configs = configs
+        self.config_ids = {
+            tuple(row[:-1]): row[-1]
+            for row in configs.itertuples(index=False, name=None)
+        }
+
+        row_configs = df['config'].to_numpy(dtype=np.int64)
+        self.offsets = np.searchsorted(
+            row_configs, np.arange(configs.shape[0])
+        )
+        self.counts = np.bincount(row_configs, minlength=configs.shape[0])
+
+        values = df['value'].to_numpy(dtype=float)
+        self.keep = np.ones(values.shape[0])
+        self.alias = np.arange(values.shape[0])
+
+        # Groups whose weights sum to zero could not be sampled. They only
+        # raise once asked for, since the other groups are fine.
+        self.impossible = np.bincount(
+            row_configs, weights=values, minlength=configs.shape[0]
+        ) <= 0
+
+        for offset, count, impossible in zip(
+            self.offsets, self.counts, self.impossible
+        ):
+            if impossible:
+                continue
+
+            keep, alias = build_alias_table(values[offset:offset + count])
+            self.keep[offset:offset + count] = keep
+            self.alias[offset:offset + count] = alias + offset
+
+        self.outcome_values = {
+            outcome: df[outcome].to_numpy() for outcome in outcomes
+        }
+
+    def __draw__(self, configs):
+        counts = self.counts[configs]
+        columns = self.offsets[configs] + np.minimum(
+            np.floor(
+                np.random.random(configs.shape[0]) * counts
+            ).astype(np.int64),
+            counts - 1
+        )
+
+        return np.where(
+            np.random.random(configs.shape[0]) < self.keep[columns],
+            columns,
+            self.alias[columns]
+        )
+
+    def get_config(self, given_values):
+        """
+        Parameters:
+            given_values: dict
+                Values of the given variables.
+
+        Returns: integer or None
+            The group of rows that match given_values, or None if none does.
+        """
+        return self.config_ids.get(
+            tuple(given_values[given] for given in self.givens)
+        )
+
+    def sample(self, given_values=None):
+        """
+        Draw one value of each outcome variable.
+
+        Parameters:
+            given_values: dict. Optional.
+                Values of the given variables.
+
+        Returns: dict
+            Maps outcome variables to their sampled values.
+        """
+        config = self.get_config(given_values or {})
+
+        if config is None:
+            raise ValueError(
+                f"No matching rows found for given values: {given_values}"
+            )
+
+        if self.impossible[config]:
+            raise ValueError(
+                f"Weights sum to zero for given values: {given_values}"
+            )
+
+        count = self.counts[config]
+        column = self.offsets[config] \
+            + min(int(np.random.random() * count), count - 1)
+
+        if np.random.random() < self.keep[column]:
+            row = column
+        else:
+            row = self.alias[column]
+
+        return {
+            outcome: values[row]
+            for outcome, values in self.outcome_values.items()
+        }
+
+    def sample_batch(self, given_values=None, size=None):
+        """
+        Draw one value of each outcome variable for each combination of
+        values of the given variables.
+
+        Parameters:
+            given_values: dict[str, array-like]. Optional.
+                Values of the given variables, one array per variable, all of
+                the same length.
+
+            size: integer. Optional.
+                Number of samples when there are no given variables.
+
+        Returns: dict[str, np.ndarray]
+            Sampled values of each outcome variable.
+        """
+        if self.givens:
+            requested = pd.DataFrame({
+                given: np.asarray(given_values[given])
+                for given in self.givens
+            }).merge(self.configs, on=self.givens, how='left')
+
+            if requested['config'].isna().any():
+                raise ValueError(
+                    "No matching rows found for given values: "
+                    + f"{requested[requested['config'].isna()].iloc[0]}"
+                )
+
+            configs = requested['config'].to_numpy(dtype=np.int64)
+
+            impossible = self.impossible[configs]
+            if impossible.any():
+                raise ValueError(
+                    "Weights sum to zero for given values: "
+                    + f"{requested[impossible].iloc[0]}"
+                )
+        else:
+            if self.impossible.any():
+                raise ValueError("Weights sum to zero")
+
+            configs = np.zeros(size, dtype=np.int64)
+
+        rows = self.__draw__(configs)
+
+        return {
+            outcome: values[rows]
+            for outcome, values in self.outcome_values.items()
+        }
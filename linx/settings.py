@@ -0,0 +1,52 @@
+"""
+Settings module
+"""
+import os
+
+import pandas as pd
+
+
+SETTINGS = {
+    'debug': os.getenv('LINX_DEBUG', '') not in ['', '0'],
+}
+
+
+def set_debug(debug=True):
+    """
+    Turn debug mode on or off. In debug mode, every factor gets validated,
+    including the ones built internally out of other factors (by prod, div,
+    sum, filter, normalize), which are otherwise trusted.
+
+    Debug mode could also be turned on by setting the LINX_DEBUG environment
+    variable to 1.
+
+    Parameters:
+        debug: bool. Defaults to True.
+    """
+    SETTINGS['debug'] = bool(debug)
+
+
+def is_debug():
+    """
+    Returns: bool
+        Whether debug mode is on.
+    """
+    return SETTINGS['debug']
+
+
+def is_copy_on_write():
+    """
+    Whether pandas copies the values shared by many DataFrames before
+    writing into them (Copy-on-Write). Always the case since pandas 3, and
+    opt-in before through pd.options.mode.copy_on_write. Reads that return
+    DataFrames sharing the stored columns are only safe when it is.
+
+    Returns: bool
+    """
+    if int(pd.__version__.split('.')[0]) >= 3:
+        return True
+
+    try:
+        return pd.get_option('mode.copy_on_write') is True
+    except (KeyError, pd.errors.OptionError):
+        return False
@@ -0,0 +1,118 @@
+"""
+StoragePolicy module
+"""
+from threading import RLock
+import weakref
+
+from .data import InMemoryData, ParquetData
+
+
+class StoragePolicy:
+    """
+    Picks where the data of each new factor gets stored, from the size of
+    the data: in memory when it is small, on disk (ParquetData) when it is
+    bigger than spill_threshold, or when keeping it in memory would go over
+    memory_budget. The memory used by the factors kept in memory is tracked
+    until they get garbage collected.
+
+    It is called like a Data class, so factors use it in place of the class
+    of their data to build the data of the factors they create.
+
+    Parameters:
+        storage_folder: Path-like object
+            Where the factors that get spilled are written.
+
+        spill_threshold: integer. Defaults to 64 MB.
+            Byte size past which the data of a factor goes to disk.
+
+        memory_budget: integer. Optional.
+            Maximum total byte size of the data kept in memory by this
+            policy. None means no limit.
+    """
+    def __init__(
+        self,
+        storage_folder,
+        spill_threshold=64 * 2 ** 20,
+        memory_budget=None,
+    ):
+        self.storage_folder = storage_folder
+        self.spill_threshold = spill_threshold
+        self.memory_budget = memory_budget
+
+        self.memory_used = 0
+        self.in_memory_count = 0
+        self.spilled_count = 0
+        self.lock = RLock()
+
+    def __repr__(self):
+        return f"StoragePolicy({self.get_stats()})"
+
+    def __release__(self, nbytes):
+        with self.lock:
+            self.memory_used -= nbytes
+
+    def __call__(self, data, storage_folder=None, name=None, temporary=False):
+        """
+        Store data.
+
+        Parameters:
+            data: pd.DataFrame
+
+            storage_folder: Path-like object. Optional.
+                Ignored. The storage_folder of the policy is used instead, so
+                that the policy could stand in for a Data class.
+
+            name: str. Optional.
+
+            temporary: bool. Defaults to False.
+                If True, the file of spilled data gets deleted once no
+                factor refers to it anymore.
+
+        Returns: InMemoryData or ParquetData
+        """
+        nbytes = int(data.memory_usage(deep=True).sum())
+
+        with self.lock:
+            in_memory = nbytes <= self.spill_threshold and (
+                self.memory_budget is None
+                or self.memory_used + nbytes <= self.memory_budget
+            )
+
+            if in_memory:
+                self.memory_used += nbytes
+                self.in_memory_count += 1
+            else:
+                self.spilled_count += 1
+
+        if not in_memory:
+            return ParquetData(
+                data,
+                storage_folder=self.storage_folder,
+                name=name,
+                temporary=temporary
+            )
+
+        stored = InMemoryData(data, name=name)
+        weakref.finalize(stored, self.__release__, nbytes)
+
+        return stored
+
+    def get_memory_used(self):
+        """
+        Returns: integer
+            Byte size of the data kept in memory by live factors.
+        """
+        return self.memory_used
+
+    def get_stats(self):
+        """
+        Returns: dict
+            memory_used, in_memory (number of data objects kept in memory)
+            and spilled (number of data objects written to disk).
+        """
+        with self.lock:
+            return {
+                'memory_used': self.memory_used,
+                'in_memory': self.in_memory_count,
+                'spilled': self.spilled_count,
+            }
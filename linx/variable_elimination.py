@@ -4,10 +4,18 @@ Variable Elimination module
 
 from datetime import datetime
 import logging
+import shutil
 import time
+from uuid import uuid4
 
 from tqdm import tqdm
 
+from .elimination_order import EliminationOrderer
+from .data import ArrowData, ParquetData
+from .errors import ArgumentError
+from .factor import Factor
+from .log_factor_adapter import LogFactorAdapter
+
 
 def min_fill_edges(eliminateables, network):
     """
@@ -40,6 +48,34 @@ def min_fill_edges(eliminateables, network):
     return best_choice, min_number_of_variables
 
 
+def is_stale_factor_key(key, fingerprint):
+    """
+    Whether a key of the factor cache of VariableElimination refers to
+    factors of another version of the network identified by fingerprint.
+
+    Parameters:
+        key: tuple
+            Either (network_key, variables, filters) for a factor of the
+            network, or (variable, input_keys) for a factor created by
+            summing out variable from the product of the input factors.
+
+        fingerprint: tuple
+            See BayesianNetwork.get_fingerprint.
+
+    Returns: bool
+    """
+    if len(key) == 2:
+        return any(
+            is_stale_factor_key(input_key, fingerprint)
+            for input_key in key[1]
+        )
+
+    key_fingerprint = key[0][0]
+
+    return key_fingerprint[0] == fingerprint[0] \
+        and key_fingerprint != fingerprint
+
+
 class VariableElimination:
     """
     Algorithm that makes use of dynamic programming.
@@ -57,28 +93,143 @@ class VariableElimination:
 
             The right side of the conditioning bar is the "given" section.
 
-        greedy_heuristic: callable. Defaults to min_fill_edges
-            A callable that has two arguments:
+        greedy_heuristic: callable or str. Defaults to 'min_fill_edges'
+            A callable that has two arguments, e.g. min_fill_edges:
                 eliminateables: The list of variables to eliminate.
                 network: MarkovNetwork
 
+            Or the name of an EliminationOrderer heuristic
+            ('min_fill_edges', 'min_fill', 'min_degree', 'min_weight',
+            'weighted_min_fill'). In that case, the whole order is computed
+            up front from the interaction graph, and estimate_elimination
+            given the same heuristic predicts it exactly.
+
+        elimination_order: list[str]. Optional.
+            A precomputed elimination order. Takes precedence over
+            greedy_heuristic. It must contain every variable that needs to be
+            eliminated.
+
+        factor_class: class. Defaults to Factor.
+            The class that wraps each CPT of the network, e.g. DenseFactor to
+            run the products and sums on NumPy arrays instead of DataFrames.
+
+        encode_domains: bool. Defaults to False.
+            If True, the factors store integer codes of the values of the
+            variables, and the result gets decoded back into values once at
+            the end.
+
+        space: str. Defaults to 'linear'.
+            If 'log', the factors store log probabilities (LogFactorAdapter):
+            products are additions, sums are grouped logsumexps, and
+            normalization is a subtraction, which keeps long chains of small
+            probabilities from underflowing. The result gets converted back
+            into a Factor of probabilities once at the end. factor_class must
+            be left out.
+
+        cache: LRUCache. Optional.
+            Results get stored in it, keyed by the fingerprint of the network
+            and the cache key of the query, so that an identical query against
+            an unchanged network skips the elimination. Queries whose cache
+            key is None (see Query.get_cache_key) bypass the cache. The same
+            cache could be shared by many VariableElimination instances.
+            Once the network gets mutated, or the data of one of its CPTs
+            gets written, the results stored for its older versions get
+            removed by the next computation that misses.
+
+        factor_cache: LRUCache. Optional.
+            Intermediate factors get stored in it, keyed by the eliminated
+            variable and the keys of the factors that were combined. Base
+            factors are keyed by the fingerprint of the network, their
+            variables, and the filters of the query that apply to them, so
+            that a later query that eliminates the same variables out of the
+            same factors reuses the stored results, even if other parts of
+            the query differ. Give it a max_bytes to cap its memory, and use
+            its get_stats to size it. Queries whose cache key is None bypass
+            it. Factors stored for older versions of the network get removed
+            by the next computation, like with cache.
+
+        storage_policy: StoragePolicy. Optional.
+            Picks, for each factor created during the elimination, whether
+            its data is kept in memory or spilled to disk, from its size and
+            the memory budget of the policy. Only works with Factor, so
+            factor_class and space must be left to their defaults.
+
+    When the factors of the network are stored on disk, the intermediate
+    factors of a computation get written into a scratch folder next to them,
+    which gets deleted when compute returns. The result, and the factors
+    stored in factor_cache, get written outside of it.
+
     """
     def __init__(
         self,
         network,
         query,
         greedy_heuristic=None,
+        factor_class=None,
+        encode_domains=False,
+        elimination_order=None,
+        cache=None,
+        factor_cache=None,
+        space='linear',
+        storage_policy=None,
     ):
         # TODO: handle queries of do(x)
         # TODO: Maybe have "outcomes" and "given" be wrapped into a "Query"
         # object.
-        self.network = network.to_markov_network()
+        if space not in ['linear', 'log']:
+            raise ArgumentError(
+                f"Unknown space {space}. Must be one of ['linear', 'log']"
+            )
+
+        if space == 'log':
+            if factor_class not in [None, LogFactorAdapter]:
+                raise ArgumentError(
+                    "factor_class can't be combined with space='log'."
+                    + f" Got {factor_class}"
+                )
+
+            factor_class = LogFactorAdapter
+
+        if storage_policy is not None and factor_class not in [None, Factor]:
+            raise ArgumentError(
+                "storage_policy only works with Factor."
+                + f" Got factor_class {factor_class}"
+            )
+
+        self.cache = cache
+        self.cache_key = None
+        self.factor_cache = factor_cache
+        self.factor_keys = None
+
+        self.query_key = query.get_cache_key()
+        self.network_key = (
+            network.get_fingerprint(),
+            factor_class,
+            encode_domains
+        )
+
+        if cache is not None and self.query_key is not None:
+            self.cache_key = (
+                network.get_fingerprint(),
+                self.query_key,
+                factor_class
+            )
+
+        self.network = network.to_markov_network(
+            factor_class=factor_class,
+            encode_domains=encode_domains,
+            storage_policy=storage_policy
+        )
         self.query = query
         if greedy_heuristic is None:
-            self.greedy_heuristic = min_fill_edges
+            self.greedy_heuristic = 'min_fill_edges'
         else:
             self.greedy_heuristic = greedy_heuristic
 
+        self.elimination_order = elimination_order
+        self.storage_folder = None
+        self.scratch_folder = None
+
     def __repr__(self):
         return f"VariableElimination({self.network})"
 
@@ -89,8 +240,116 @@ class VariableElimination:
         Returns: Factor
             A factor that represents the query.
         """
+        if self.cache_key is None:
+            return self.__compute_in_scratch__()
+
+        result = self.cache.get(self.cache_key)
+
+        if result is None:
+            result = self.__compute_in_scratch__()
+
+            # Results computed against older versions of the same network
+            # could never be hit again.
+            fingerprint = self.cache_key[0]
+            self.cache.invalidate(
+                lambda key: key[0][0] == fingerprint[0]
+                and key[0] != fingerprint
+            )
+
+            self.cache.put(
+                self.cache_key,
+                result,
+                nbytes=result.get_nbytes()
+            )
+
+        return result
+
+    def __compute_in_scratch__(self):
+        on_disk = (ParquetData, ArrowData)
+
+        for factor in self.network.get_factors():
+            if isinstance(factor, Factor) \
+                    and isinstance(factor.get_data(), on_disk):
+                self.storage_folder = factor.get_data().get_storage_folder()
+                break
+
+        if self.storage_folder is None:
+            return self.__compute_query__()
+
+        self.scratch_folder = self.storage_folder / f'scratch-{uuid4()}'
+        self.scratch_folder.mkdir()
+
+        # The factors of the network could be the ones of the caller, or of
+        # another computation, so they get wrapped rather than mutated.
+        for factor in list(self.network.get_factors()):
+            if isinstance(factor, Factor):
+                self.network.remove_factor(factor)
+                self.network.add_factor(
+                    Factor(
+                        factor.get_data(),
+                        validate=False,
+                        storage_policy=factor.storage_policy,
+                        scratch_folder=self.scratch_folder
+                    )
+                )
+
+        try:
+            return self.__keep__(self.__compute_query__())
+        finally:
+            shutil.rmtree(self.scratch_folder, ignore_errors=True)
+
+    def __keep__(self, factor, scratch_folder=None):
+        """
+        Return a factor with the values of factor, whose data is outside the
+        scratch folder, so that it outlives the computation. The factors
+        derived from it get written into scratch_folder.
+        """
+        if self.scratch_folder is None or not isinstance(factor, Factor):
+            return factor
+
+        data = factor.get_data()
+
+        if data.get_storage_folder() == self.scratch_folder:
+            data = data.__class__(
+                factor.get_df(),
+                storage_folder=self.storage_folder,
+                temporary=True
+            )
+
+        return Factor(
+            data,
+            validate=False,
+            storage_policy=factor.storage_policy,
+            scratch_folder=scratch_folder
+        )
+
+    def __compute_query__(self):
         self.network.apply_query(self.query)
 
+        if self.factor_cache is not None and self.query_key is not None:
+            # Factors computed out of older versions of the same network
+            # could never be hit again.
+            fingerprint = self.network_key[0]
+            self.factor_cache.invalidate(
+                lambda key: is_stale_factor_key(key, fingerprint)
+            )
+
+            self.factor_keys = {}
+
+            for factor in self.network.get_factors():
+                variables = factor.get_variables()
+
+                self.__set_factor_key__(
+                    factor,
+                    (
+                        self.network_key,
+                        frozenset(variables),
+                        tuple(
+                            f for f in self.query_key[2] if f[0] in variables
+                        )
+                    )
+                )
+
         numerator_eliminateables = list(
             set(self.network.get_variables())
             - set(self.query.get_outcome_variables())
@@ -119,7 +378,7 @@ class VariableElimination:
         denom_prod = self.network.get_factors().prod()
 
         if denom_prod is None:
-            return numerator_prod.normalize()
+            return self.__decode__(numerator_prod.normalize())
 
         div = numerator_prod\
             .div(denom_prod)
@@ -134,7 +393,88 @@ class VariableElimination:
             normalized
         )
 
-        return normalized
+        return self.__decode__(normalized)
+
+    def __decode__(self, factor):
+        if isinstance(factor, LogFactorAdapter):
+            factor = factor.to_factor()
+
+        registry = self.network.domain_registry
+
+        if registry is None:
+            return factor
+
+        return registry.decode_factor(factor)
+
+    def __set_factor_key__(self, factor, key):
+        # The factor is kept along with its key, so that its id could not be
+        # reused by another factor while this computation runs.
+        self.factor_keys[id(factor)] = (factor, key)
+
+    def __factor_key__(self, factor):
+        factor_and_key = self.factor_keys.get(id(factor))
+
+        if factor_and_key is None or factor_and_key[0] is not factor:
+            return None
+
+        return factor_and_key[1]
+
+    def __sum_product__(self, factors, var):
+        """
+        Sum out var from the product of factors, reusing the result stored in
+        the factor cache if the same factors had var eliminated before.
+        """
+        if self.factor_keys is None:
+            return factors.sum_product(var)
+
+        input_keys = [self.__factor_key__(factor) for factor in factors]
+
+        if None in input_keys:
+            return factors.sum_product(var)
+
+        key = (var, frozenset(input_keys))
+        new_factor = self.factor_cache.get(key)
+
+        if new_factor is None:
+            # Cached factors outlive the scratch folder of this computation.
+            new_factor = self.__keep__(factors.sum_product(var))
+            self.factor_cache.put(
+                key,
+                new_factor,
+                nbytes=new_factor.get_nbytes()
+            )
+
+        new_factor = self.__keep__(new_factor, self.scratch_folder)
+
+        self.__set_factor_key__(new_factor, key)
+
+        return new_factor
+
+    def __order__(self, eliminateables):
+        """
+        Elimination order computed up front, or None when the greedy
+        heuristic picks one variable at a time.
+        """
+        if self.elimination_order is not None:
+            order = [
+                var for var in self.elimination_order if var in eliminateables
+            ]
+
+            missing = set(eliminateables) - set(order)
+            if missing:
+                raise ArgumentError(
+                    f"Elimination order is missing variables: {missing}"
+                )
+
+            return order
+
+        if isinstance(self.greedy_heuristic, str):
+            return EliminationOrderer(
+                self.network,
+                heuristic=self.greedy_heuristic
+            ).get_order(eliminateables)
+
+        return None
 
     def __compute__(self, eliminateables, title):
         len_eliminateables = len(eliminateables)
@@ -142,6 +482,8 @@ class VariableElimination:
             "Running __compute__ for %s on %s", title, datetime.now()
         )
 
+        order = self.__order__(eliminateables)
+
         with tqdm(total=len_eliminateables, desc=title) as progress_bar:
             while eliminateables:
                 t1 = time.time()
@@ -150,10 +492,13 @@ class VariableElimination:
                     eliminateables
                 )
 
-                best_eliminateable, _ = self.greedy_heuristic(
-                    eliminateables=eliminateables,
-                    network=self.network
-                )
+                if order is None:
+                    best_eliminateable, _ = self.greedy_heuristic(
+                        eliminateables=eliminateables,
+                        network=self.network
+                    )
+                else:
+                    best_eliminateable, _ = order.pop(0), None
 
                 factors = self.network.get_factors(best_eliminateable)
 
@@ -165,18 +510,16 @@ class VariableElimination:
                     factors
                 )
 
-                factor_prod = factors.prod()
-
-                logging.debug(
-                    "\nAfter prod. \n\tfactor_prod: \n\t%s",
-                    factor_prod
+                # Update network with new factor. The product of the factors
+                # gets reduced as it is computed, so the joint table over
+                # all of their variables never gets materialized.
+                new_factor = self.__sum_product__(
+                    factors,
+                    best_eliminateable
                 )
 
-                # Update network with new factor
-                new_factor = factor_prod.sum(best_eliminateable)
-
                 logging.debug(
-                    "\nAfter sum. sum: \n\t%s",
+                    "\nAfter sum product. sum: \n\t%s",
                     new_factor
                 )
 
@@ -385,3 +385,77 @@ def test_particle_class():
     # Test string representation
     assert 'Particle' in str(particle)
     assert 'X' in str(particle)
+
+
+def test_sample_batch():
+    """Each variable gets sampled once for the whole batch."""
+    np.random.seed(0)
+
+    bayesian_network = BN()
+    bayesian_network.add_node(Normal(name='W', mean=0, std=1))
+    bayesian_network.add_node(
+        CPT(
+            table=[
+                {'X': 0, 'value': 0.4},
+                {'X': 1, 'value': 0.6}
+            ],
+            outcomes=['X']
+        )
+    )
+    bayesian_network.add_node(
+        CPT(
+            table=[
+                {'W': 0, 'X': 0, 'Y': 0, 'value': 0.9},
+                {'W': 0, 'X': 0, 'Y': 1, 'value': 0.1},
+                {'W': 0, 'X': 1, 'Y': 0, 'value': 0.3},
+                {'W': 0, 'X': 1, 'Y': 1, 'value': 0.7},
+                {'W': 1, 'X': 0, 'Y': 0, 'value': 0.5},
+                {'W': 1, 'X': 0, 'Y': 1, 'value': 0.5},
+                {'W': 1, 'X': 1, 'Y': 0, 'value': 0.2},
+                {'W': 1, 'X': 1, 'Y': 1, 'value': 0.8},
+            ],
+            outcomes=['Y'],
+            givens=['W', 'X']
+        )
+    )
+
+    samples = bayesian_network.sample(n=100000).to_df()
+
+    assert samples.shape == (100000, 3)
+    assert set(samples.columns) == {'W', 'X', 'Y'}
+
+    assert samples['W'].mean() == pytest.approx(0, abs=0.02)
+    assert samples['X'].mean() == pytest.approx(0.6, abs=0.01)
+
+    # P(Y=1) = sum over W > 0 and X of P(W > 0) P(X) P(Y=1 | W, X)
+    expected = 0.5 * (0.4 * 0.1 + 0.6 * 0.7) + 0.5 * (0.4 * 0.5 + 0.6 * 0.8)
+    assert samples['Y'].mean() == pytest.approx(expected, abs=0.01)
+
+    subset = samples[(samples['W'] > 0) & (samples['X'] == 1)]
+    assert subset['Y'].mean() == pytest.approx(0.8, abs=0.02)
+
+
+def test_sample_continuous_parent():
+    """A Normal whose mean is another Normal gets its parent's samples."""
+    np.random.seed(0)
+
+    a = Normal(name='a', mean=1.0, std=1.0)
+    b = Normal(name='b', mean=a, std=1.0)
+
+    bayesian_network = BN()
+    bayesian_network.add_node(a)
+    bayesian_network.add_node(b)
+
+    assert bayesian_network.topological_sort() == ['a', 'b']
+    assert bayesian_network.get_parents('b') == ['a']
+
+    particle = bayesian_network.sample()
+    assert set(particle.get_variables()) == {'a', 'b'}
+
+    samples = bayesian_network.sample(n=200000)
+
+    # b = a + noise, so E[b] = 1 and Var[b] = 1 + 1.
+    assert samples['b'].mean() == pytest.approx(1.0, abs=0.02)
+    assert samples['b'].var() == pytest.approx(2.0, abs=0.03)
+    assert np.corrcoef(samples['a'], samples['b'])[0, 1] \
+        == pytest.approx(np.sqrt(0.5), abs=0.01)
@@ -0,0 +1,335 @@
+import pandas as pd
+
+from ..linx.cache import LRUCache, ParquetCache, get_parquet_cache, \
+    set_parquet_cache
+from ..linx.data import ParquetData
+from ..linx.ds import ConditionalProbabilityTable as CPT, Query
+from ..linx.infer import VariableElimination
+from .conftest import assert_approx_value_df, clean_tmp, get_tmp_path
+
+
+def test_lru_eviction_by_entries():
+    evicted = []
+    cache = LRUCache(
+        max_entries=2,
+        on_evict=lambda key, value: evicted.append(key)
+    )
+
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+
+    cache.put('c', 3)
+
+    assert evicted == ['b']
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert cache.get('b') is None
+
+    stats = cache.get_stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['evictions'] == 1
+    assert stats['entries'] == 2
+    assert stats['hit_rate'] == 0.5
+
+
+def test_lru_eviction_by_bytes():
+    cache = LRUCache(max_bytes=100)
+
+    cache.put('a', 1, nbytes=60)
+    cache.put('b', 2, nbytes=30)
+    cache.put('c', 3, nbytes=30)
+
+    assert 'a' not in cache
+    assert cache.get_stats()['bytes'] == 60
+
+    assert not cache.put('d', 4, nbytes=101)
+    assert 'd' not in cache
+
+
+def test_lru_invalidate_and_clear():
+    cache = LRUCache()
+
+    cache.put(('x', 1), 1, nbytes=10)
+    cache.put(('x', 2), 2, nbytes=10)
+    cache.put(('y', 1), 3, nbytes=10)
+
+    cache.invalidate(lambda key: key[0] == 'x')
+
+    assert len(cache) == 1
+    assert cache.get_stats()['bytes'] == 10
+    assert cache.get_stats()['evictions'] == 0
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_query_cache_key():
+    assert Query(outcomes=['X', 'Y'], givens=[{'Z': 1}]).get_cache_key() \
+        == Query(outcomes=['Y', 'X'], givens=[{'Z': 1}]).get_cache_key()
+
+    assert Query(outcomes=['X'], givens=[{'Z': 1}]).get_cache_key() \
+        != Query(outcomes=['X'], givens=[{'Z': 0}]).get_cache_key()
+
+    def above_five(df):
+        return df['Z'] > 5
+
+    assert Query(outcomes=['X'], givens=[{'Z': above_five}])\
+        .get_cache_key() is None
+
+    above_five.cache_key = 'Z > 5'
+
+    assert Query(outcomes=['X'], givens=[{'Z': above_five}])\
+        .get_cache_key() is not None
+
+
+def test_variable_elimination_cache(collider_and_descendant):
+    cache = LRUCache(max_entries=10)
+    query = Query(outcomes=['Z'], givens=[{'Y': 1}])
+
+    first = VariableElimination(
+        network=collider_and_descendant,
+        query=query,
+        cache=cache
+    ).compute()
+
+    second = VariableElimination(
+        network=collider_and_descendant,
+        query=Query(outcomes=['Z'], givens=[{'Y': 1}]),
+        cache=cache
+    ).compute()
+
+    assert second is first
+    assert cache.get_stats()['hits'] == 1
+    assert cache.get_stats()['bytes'] > 0
+
+    VariableElimination(
+        network=collider_and_descendant,
+        query=Query(
+            outcomes=['Z'],
+            givens=[{'Y': lambda df: df['Y'] == 1}]
+        ),
+        cache=cache
+    ).compute()
+
+    assert len(cache) == 1
+
+    clean_tmp()
+
+
+def test_variable_elimination_cache_invalidated_by_mutation(
+    collider_and_descendant
+):
+    cache = LRUCache()
+
+    VariableElimination(
+        network=collider_and_descendant,
+        query=Query(outcomes=['A']),
+        cache=cache
+    ).compute()
+
+    collider_and_descendant.add_node(
+        CPT(
+            ParquetData(
+                pd.DataFrame([
+                    {'Z': 0, 'A': 0, 'value': 0.1},
+                    {'Z': 0, 'A': 1, 'value': 0.9},
+                    {'Z': 1, 'A': 0, 'value': 0.1},
+                    {'Z': 1, 'A': 1, 'value': 0.9},
+                ]),
+                storage_folder=get_tmp_path()
+            ),
+            outcomes=['A'],
+            givens=['Z']
+        )
+    )
+
+    result = VariableElimination(
+        network=collider_and_descendant,
+        query=Query(outcomes=['A']),
+        cache=cache
+    ).compute()
+
+    assert cache.get_stats()['hits'] == 0
+    assert len(cache) == 1
+
+    assert_approx_value_df(
+        actual_df=result.get_df(),
+        expected_df=pd.DataFrame([
+            {'A': 0, 'value': 0.1},
+            {'A': 1, 'value': 0.9},
+        ])
+    )
+
+    clean_tmp()
+
+
+def test_variable_elimination_cache_invalidated_by_data_write(
+    collider_and_descendant
+):
+    cache = LRUCache()
+    factor_cache = LRUCache()
+
+    def compute():
+        return VariableElimination(
+            network=collider_and_descendant,
+            query=Query(outcomes=['A']),
+            elimination_order=['X', 'Y', 'Z', 'A'],
+            cache=cache,
+            factor_cache=factor_cache
+        ).compute()
+
+    compute()
+    factor_entries = len(factor_cache)
+
+    collider_and_descendant.get_random_variables()['A'].get_data().write(
+        pd.DataFrame([
+            {'Z': 0, 'A': 0, 'value': 0.1},
+            {'Z': 0, 'A': 1, 'value': 0.9},
+            {'Z': 1, 'A': 0, 'value': 0.1},
+            {'Z': 1, 'A': 1, 'value': 0.9},
+        ])
+    )
+
+    result = compute()
+
+    assert cache.get_stats()['hits'] == 0
+    assert factor_cache.get_stats()['hits'] == 0
+
+    # Entries of the older version got removed rather than left to pile up.
+    assert len(cache) == 1
+    assert len(factor_cache) == factor_entries
+
+    assert_approx_value_df(
+        actual_df=result.get_df(),
+        expected_df=pd.DataFrame([
+            {'A': 0, 'value': 0.1},
+            {'A': 1, 'value': 0.9},
+        ])
+    )
+
+    clean_tmp()
+
+
+def test_variable_elimination_factor_cache(collider_and_descendant):
+    factor_cache = LRUCache(max_bytes=10 ** 6)
+
+    def compute(outcomes, elimination_order, factor_cache=None):
+        return VariableElimination(
+            network=collider_and_descendant,
+            query=Query(outcomes=outcomes),
+            elimination_order=elimination_order,
+            factor_cache=factor_cache
+        ).compute()
+
+    compute(['A'], ['X', 'Y', 'Z', 'A'], factor_cache)
+
+    stats = factor_cache.get_stats()
+    assert stats['misses'] == 4
+    assert stats['hits'] == 0
+    assert stats['bytes'] > 0
+
+    # X and Y get eliminated out of the same factors as in the first query.
+    result = compute(['Z'], ['X', 'Y', 'A', 'Z'], factor_cache)
+
+    stats = factor_cache.get_stats()
+    assert stats['hits'] == 2
+    assert stats['misses'] == 6
+
+    assert_approx_value_df(
+        actual_df=result.get_df(),
+        expected_df=compute(['Z'], ['X', 'Y', 'A', 'Z']).get_df()
+    )
+
+    clean_tmp()
+
+
+def test_variable_elimination_factor_cache_memory_cap(
+    collider_and_descendant
+):
+    factor_cache = LRUCache(max_bytes=1)
+
+    VariableElimination(
+        network=collider_and_descendant,
+        query=Query(outcomes=['A']),
+        factor_cache=factor_cache
+    ).compute()
+
+    # Only the final FactorOne, which takes no space, fits.
+    assert factor_cache.get_stats()['bytes'] == 0
+    assert factor_cache.get_stats()['misses'] == 4
+
+    clean_tmp()
+
+
+def test_parquet_cache():
+    clean_tmp()
+
+    spill_folder = get_tmp_path() / 'spill'
+    spill_folder.mkdir()
+
+    df_1 = pd.DataFrame([{'X': i, 'value': 0.1} for i in range(100)])
+    df_2 = pd.DataFrame([{'Y': i, 'value': 0.2} for i in range(100)])
+
+    data_1 = ParquetData(df_1, storage_folder=get_tmp_path())
+    data_2 = ParquetData(df_2, storage_folder=get_tmp_path())
+
+    nbytes = int(df_1.memory_usage(deep=True).sum())
+    cache = ParquetCache(max_bytes=nbytes, spill_folder=spill_folder)
+
+    assert get_parquet_cache() is None
+    set_parquet_cache(cache)
+
+    try:
+        assert data_1.read().equals(df_1)
+        assert data_1.read().equals(df_1)
+
+        stats = cache.get_stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['bytes'] == nbytes
+
+        # Only one of the two fits, so data_1 gets spilled.
+        assert data_2.read().equals(df_2)
+        assert cache.get_stats()['spilled'] == 1
+        assert cache.get_stats()['evictions'] == 1
+
+        assert data_1.read().equals(df_1)
+        assert cache.get_stats()['spill_hits'] == 1
+
+        mutable = data_1.read(copy=True)
+        mutable.loc[:, 'value'] = 1.0
+        assert data_1.read()['value'].max() == 0.1
+    finally:
+        set_parquet_cache(None)
+        cache.clear()
+
+    assert not list(spill_folder.glob('*'))
+
+    clean_tmp()
+
+
+def test_factor_cache_outlives_scratch_folder(collider_and_descendant):
+    factor_cache = LRUCache()
+
+    def compute():
+        return VariableElimination(
+            network=collider_and_descendant,
+            query=Query(outcomes=['A']),
+            elimination_order=['X', 'Y', 'Z', 'A'],
+            factor_cache=factor_cache
+        ).compute()
+
+    expected = compute()
+    actual = compute()
+
+    assert factor_cache.get_stats()['hits'] > 0
+    assert not list(get_tmp_path().glob('scratch-*'))
+
+    assert_approx_value_df(
+        actual_df=actual.get_df(),
+        expected_df=expected.get_df()
+    )
+
+    clean_tmp()
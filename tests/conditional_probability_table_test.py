@@ -5,6 +5,7 @@ import pandas as pd
 from ..linx.data import ParquetData
 from ..linx.ds import ConditionalProbabilityTable as CPT
 from ..linx.random.random_variable import RandomVariable
+from ..linx.sampling_table import build_alias_table
 from .conftest import clean_tmp, get_tmp_path
 
 
@@ -167,4 +168,141 @@ def test_cpt_backward_compatibility():
     # Test other original methods
     assert cpt.get_outcomes() == ['Y']
     assert cpt.get_givens() == ['X']
-    assert cpt.get_data() is not None 
\ No newline at end of file
+    assert cpt.get_data() is not None
+
+
+def test_sample_batch_matches_table():
+    """Batched draws follow the rows of each parent configuration."""
+    np.random.seed(0)
+
+    cpt = CPT(
+        table=[
+            {'X': 0, 'Y': 'a', 'value': 0.2},
+            {'X': 0, 'Y': 'b', 'value': 0.0},
+            {'X': 0, 'Y': 'c', 'value': 0.8},
+            {'X': 1, 'Y': 'a', 'value': 3.0},
+            {'X': 1, 'Y': 'b', 'value': 1.0},
+            {'X': 1, 'Y': 'c', 'value': 0.0},
+        ],
+        outcomes=['Y'],
+        givens=['X']
+    )
+
+    x = np.repeat([0, 1], 50000)
+    y = cpt.sample_batch(given_values={'X': x})['Y']
+
+    assert y.shape == x.shape
+    assert not ((x == 0) & (y == 'b')).any()
+    assert not ((x == 1) & (y == 'c')).any()
+
+    assert np.mean(y[x == 0] == 'a') == pytest.approx(0.2, abs=0.01)
+    # Values are normalized within each parent configuration.
+    assert np.mean(y[x == 1] == 'a') == pytest.approx(0.75, abs=0.01)
+
+    with pytest.raises(ValueError):
+        cpt.sample_batch(given_values={'X': [2]})
+
+    with pytest.raises(ValueError):
+        cpt.sample_batch(size=10)
+
+
+def test_sampling_table_compiled_once():
+    """Single draws go through alias tables compiled once per CPT."""
+    np.random.seed(1)
+
+    cpt = CPT(
+        table=[
+            {'X': x, 'Y': y, 'value': value}
+            for x, weights in enumerate([[1, 0, 3, 4], [0, 0, 1, 0]])
+            for y, value in enumerate(weights)
+        ],
+        outcomes=['Y'],
+        givens=['X']
+    )
+
+    table = cpt.get_sampling_table()
+    assert cpt.get_sampling_table() is table
+
+    draws = np.array([
+        cpt.sample_with_given_values({'X': 0})['Y'] for _ in range(20000)
+    ])
+
+    assert cpt.get_sampling_table() is table
+    assert not (draws == 1).any()
+    assert np.mean(draws == 0) == pytest.approx(1 / 8, abs=0.01)
+    assert np.mean(draws == 3) == pytest.approx(4 / 8, abs=0.01)
+
+    assert cpt.sample(X=1) == {'Y': 2}
+
+    with pytest.raises(ValueError):
+        cpt.sample_with_given_values({'X': 5})
+
+    with pytest.raises(ValueError):
+        cpt.sample_with_given_values({'Z': 0})
+
+
+def test_build_alias_table():
+    probabilities = np.array([0.1, 0.0, 0.6, 0.3])
+    keep, alias = build_alias_table(probabilities)
+
+    # Mass of each column: kept share plus the shares aliased to it.
+    size = probabilities.shape[0]
+    mass = keep / size
+
+    for column in range(size):
+        np.add.at(mass, alias[column], (1 - keep[column]) / size)
+
+    np.testing.assert_allclose(mass, probabilities)
+
+
+def test_sampling_zero_weights():
+    with pytest.raises(ValueError):
+        build_alias_table(np.zeros(3))
+
+    cpt = CPT(
+        table=[
+            {'X': x, 'Y': y, 'value': value}
+            for x, weights in enumerate([[0.5, 0.5], [0.0, 0.0]])
+            for y, value in enumerate(weights)
+        ],
+        outcomes=['Y'],
+        givens=['X']
+    )
+
+    # The other configuration could still be sampled.
+    assert cpt.sample_with_given_values({'X': 0})['Y'] in [0, 1]
+    assert cpt.sample_batch(given_values={'X': [0, 0]})['Y'].shape == (2,)
+
+    with pytest.raises(ValueError, match='sum to zero'):
+        cpt.sample_with_given_values({'X': 1})
+
+    with pytest.raises(ValueError, match='sum to zero'):
+        cpt.sample_batch(given_values={'X': [0, 1]})
+
+    cpt = CPT(
+        table=[{'Y': 0, 'value': 0.0}, {'Y': 1, 'value': 0.0}],
+        outcomes=['Y']
+    )
+
+    with pytest.raises(ValueError, match='sum to zero'):
+        cpt.sample_batch(size=10)
+
+
+def test_sampling_table_recompiled_on_write():
+    clean_tmp()
+
+    data = ParquetData(
+        pd.DataFrame([{'Y': 0, 'value': 1.0}, {'Y': 1, 'value': 0.0}]),
+        storage_folder=get_tmp_path()
+    )
+    cpt = CPT(data, outcomes=['Y'])
+
+    assert cpt.sample_batch(size=10)['Y'].tolist() == [0] * 10
+
+    data.write(
+        pd.DataFrame([{'Y': 0, 'value': 0.0}, {'Y': 1, 'value': 1.0}])
+    )
+
+    assert cpt.sample_batch(size=10)['Y'].tolist() == [1] * 10
+
+    clean_tmp()
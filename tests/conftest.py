@@ -186,6 +186,25 @@ def create_df_hard(given, outcome):
     ])
 
 
+def create_grid_df(sizes):
+    """
+    Every combination of values of some variables, without a value column.
+
+    Parameters:
+        sizes: dict[str, integer]
+            Number of values of each variable. Values go from 0 to size - 1.
+
+    Returns: pd.DataFrame
+    """
+    rows = [{}]
+    for var, size in sizes.items():
+        rows = [
+            dict(row, **{var: value}) for row in rows for value in range(size)
+        ]
+
+    return pd.DataFrame(rows)
+
+
 @pytest.fixture
 def collider_and_descendant():
     r"""
@@ -21,6 +21,15 @@ def test_get_parents():
     assert ["B"] == dag.get_parents("C")
 
 
+def test_get_parents_returns_a_copy():
+    dag = DAG()
+    dag.add_edge("A", "B")
+
+    dag.get_parents("B").append("C")
+
+    assert ["A"] == dag.get_parents("B")
+
+
 def test_get_children():
     dag = DAG()
     dag.add_edge("A", "B")
@@ -0,0 +1,257 @@
+import gc
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pytest
+
+from ..linx.cache import ParquetCache, set_parquet_cache
+from ..linx.data import ArrowData, ParquetData
+from ..linx.ds import BayesianNetwork, ConditionalProbabilityTable as CPT, \
+    Factor, Query, Range
+from ..linx.errors import ArgumentError
+from ..linx.infer import VariableElimination
+from .conftest import assert_approx_value_df, clean_tmp, get_tmp_path
+
+
+def test_arrow_data_memory_maps_reads():
+    clean_tmp()
+
+    df = pd.DataFrame([
+        {'X': 0, 'Y': 'a', 'value': 0.25},
+        {'X': 1, 'Y': 'b', 'value': 0.75},
+    ])
+
+    data = ArrowData(df, storage_folder=get_tmp_path())
+
+    pd.testing.assert_frame_equal(data.read(), df, check_dtype=False)
+    assert list(data.get_columns()) == ['X', 'Y', 'value']
+    assert data.get_nbytes() > 0
+
+    # Reads share the mapped pages instead of decoding the file again.
+    assert np.shares_memory(
+        data.read()['value'].to_numpy(),
+        data.read()['value'].to_numpy()
+    )
+
+    mutable = data.read(copy=True)
+    mutable.loc[:, 'value'] = 0.0
+    assert data.read()['value'].tolist() == [0.25, 0.75]
+
+    with pytest.raises(ArgumentError):
+        ArrowData(df, storage_folder=get_tmp_path(), name=data.name)
+
+    clean_tmp()
+
+
+def test_arrow_data_write_keeps_earlier_reads():
+    clean_tmp()
+
+    df = pd.DataFrame([
+        {'X': 0, 'value': 0.25},
+        {'X': 1, 'value': 0.75},
+    ])
+
+    data = ArrowData(df, storage_folder=get_tmp_path())
+    before = data.read()
+
+    data.write(df.assign(value=[0.5, 0.5]))
+
+    assert before['value'].tolist() == [0.25, 0.75]
+    assert data.read()['value'].tolist() == [0.5, 0.5]
+    assert data.version == 2
+    assert [path.name for path in get_tmp_path().iterdir()] == [str(data.name)]
+
+    clean_tmp()
+
+
+def test_arrow_data_factors(collider_and_descendant):
+    network = BayesianNetwork()
+
+    for rv in collider_and_descendant.get_random_variables().values():
+        network.add_node(
+            CPT(
+                ArrowData(
+                    rv.get_data().read(),
+                    storage_folder=get_tmp_path()
+                ),
+                outcomes=rv.get_outcomes(),
+                givens=rv.get_givens()
+            )
+        )
+
+    query = Query(outcomes=['Z'], givens=[{'Y': 1}])
+
+    result = VariableElimination(network=network, query=query).compute()
+
+    assert isinstance(result.get_data(), ArrowData)
+
+    assert_approx_value_df(
+        actual_df=result.get_df(),
+        expected_df=VariableElimination(
+            network=collider_and_descendant,
+            query=query
+        ).compute().get_df()
+    )
+
+    factor = Factor(network.get_random_variables()['Z'].get_data())
+    assert set(factor.sum('X').get_variables()) == {'Y', 'Z'}
+
+    clean_tmp()
+
+
+def test_parquet_data_pushdown():
+    clean_tmp()
+
+    df = pd.DataFrame([
+        {'X': x, 'Y': y, 'value': 0.1}
+        for y in range(10) for x in range(10)
+    ])
+
+    data = ParquetData(
+        df,
+        storage_folder=get_tmp_path(),
+        sort_by=['X'],
+        row_group_size=10
+    )
+
+    metadata = pq.ParquetFile(data.path).metadata
+    x_index = metadata.schema.names.index('X')
+
+    # Sorted by X, each row group holds a single value of X.
+    for i in range(metadata.num_row_groups):
+        statistics = metadata.row_group(i).column(x_index).statistics
+        assert statistics.min == statistics.max
+
+    read = data.read(columns=['X', 'value'], filters=[('X', '==', 3)])
+    assert list(read.columns) == ['X', 'value']
+    assert read.shape[0] == 10
+    assert (read['X'] == 3).all()
+
+    read = data.read(filters=[('X', '>=', 8), ('Y', '<', 2)])
+    assert read.shape[0] == 4
+
+    cache = ParquetCache(max_bytes=10 ** 6)
+    set_parquet_cache(cache)
+
+    try:
+        data.read()
+        cached_read = data.read(filters=[('X', '>=', 8), ('Y', '<', 2)])
+        assert cached_read.shape[0] == 4
+        assert cache.get_stats()['hits'] == 1
+    finally:
+        set_parquet_cache(None)
+
+    clean_tmp()
+
+
+def count_row_groups_read(data, expression):
+    """
+    Number of row groups of the file of data whose statistics could match
+    expression, i.e. the ones a filtered read goes through.
+    """
+    fragment = next(ds.dataset(data.path, format='parquet').get_fragments())
+
+    return len(fragment.split_by_row_group(expression))
+
+
+def test_parquet_data_sorted_by_default():
+    clean_tmp()
+
+    df = pd.DataFrame([
+        {'X': x, 'Y': y, 'value': 0.1}
+        for y in range(10) for x in range(10)
+    ])
+
+    data = ParquetData(df, storage_folder=get_tmp_path(), row_group_size=10)
+    assert data.sort_by == ['X', 'Y']
+    assert count_row_groups_read(data, ds.field('X') == 3) == 1
+
+    unsorted = ParquetData(
+        df,
+        storage_folder=get_tmp_path(),
+        sort_by=[],
+        row_group_size=10
+    )
+    assert count_row_groups_read(unsorted, ds.field('X') == 3) == 10
+
+    # Data derived from it keeps its layout.
+    other = Factor(
+        ParquetData(
+            pd.DataFrame([{'Y': y, 'value': 1.0} for y in range(10)]),
+            storage_folder=get_tmp_path()
+        )
+    )
+    derived = Factor(data).prod(other).get_data()
+
+    assert isinstance(derived, ParquetData)
+    assert derived.sort_by == ['X', 'Y']
+    assert derived.row_group_size == 10
+    assert count_row_groups_read(derived, ds.field('X') == 3) == 1
+
+    clean_tmp()
+
+
+def test_factor_filter_pushdown():
+    clean_tmp()
+
+    df = pd.DataFrame([
+        {'X': x, 'Y': y, 'value': 0.1}
+        for y in range(10) for x in range(10)
+    ])
+
+    factor = Factor(ParquetData(df, storage_folder=get_tmp_path()))
+
+    filtered = factor.filter(Query(
+        outcomes=[{'X': Range('X', low=2, high=4)}],
+        givens=[{'Y': 1}]
+    ))
+
+    assert sorted(filtered.get_df()['X'].tolist()) == [2, 3, 4]
+    assert set(filtered.get_df()['Y']) == {1}
+
+    with pytest.raises(ArgumentError):
+        factor.filter({'X': Range('X', low=20)})
+
+    # Evidence whose type pyarrow could not compare with the column.
+    assert set(factor.filter({'X': True}).get_df()['X']) == {1}
+
+    with pytest.raises(ArgumentError):
+        factor.filter({'X': 'a'})
+
+    clean_tmp()
+
+
+def test_temporary_data_deleted_when_unreferenced():
+    clean_tmp()
+
+    df = pd.DataFrame([
+        {'X': 0, 'value': 0.25},
+        {'X': 1, 'value': 0.75},
+    ])
+
+    kept = ParquetData(df, storage_folder=get_tmp_path())
+    temporary = ArrowData(df, storage_folder=get_tmp_path(), temporary=True)
+    path = temporary.path
+
+    assert path.exists()
+
+    del temporary
+    gc.collect()
+
+    assert not path.exists()
+    assert kept.path.exists()
+
+    # Factors derived from others are temporary.
+    factor = Factor(kept)
+    product = factor.prod(factor).normalize()
+    path = product.get_data().path
+
+    del product
+    gc.collect()
+
+    assert not path.exists()
+    assert kept.path.exists()
+
+    clean_tmp()
@@ -0,0 +1,159 @@
+import pandas as pd
+import pytest
+
+from ..linx.data import InMemoryData, ParquetData
+from ..linx.ds import ConditionalProbabilityTable as CPT, DenseFactor, \
+    Factor, Query
+from ..linx.errors import ArgumentError
+from ..linx.factor_one import FactorOne
+from ..linx.infer import VariableElimination
+from .conftest import assert_approx_value_df, clean_tmp, get_tmp_path
+
+
+def create_y_given_x_df():
+    return pd.DataFrame([
+        {'X': 0, 'Y': 0, 'value': 0.25},
+        {'X': 0, 'Y': 1, 'value': 0.75},
+        {'X': 1, 'Y': 0, 'value': 0.6},
+        {'X': 1, 'Y': 1, 'value': 0.4},
+    ])
+
+
+def create_a_given_x_df():
+    return pd.DataFrame([
+        {'X': 0, 'A': 0, 'value': 0.4},
+        {'X': 0, 'A': 1, 'value': 0.6},
+        {'X': 1, 'A': 0, 'value': 0.7},
+        {'X': 1, 'A': 1, 'value': 0.3},
+    ])
+
+
+def test_duplicate_entry_for_variables():
+    df = pd.DataFrame([
+        {'X': 0, 'Y': 0, 'value': 0.25},
+        {'X': 0, 'Y': 0, 'value': 0.99},
+    ])
+
+    with pytest.raises(ArgumentError):
+        DenseFactor(data=InMemoryData(df))
+
+
+def test_dense_factor_prod_matches_factor():
+    clean_tmp()
+
+    cpt_1 = CPT(
+        ParquetData(create_y_given_x_df(), storage_folder=get_tmp_path()),
+        outcomes=['Y'],
+        givens=['X']
+    )
+    cpt_2 = CPT(
+        ParquetData(create_a_given_x_df(), storage_folder=get_tmp_path()),
+        outcomes=['A'],
+        givens=['X']
+    )
+
+    expected_df = Factor(cpt=cpt_1).prod(Factor(cpt=cpt_2)).get_df()
+    actual = DenseFactor(cpt=cpt_1).prod(DenseFactor(cpt=cpt_2))
+
+    assert set(actual.get_variables()) == {'X', 'Y', 'A'}
+    assert_approx_value_df(actual.get_df(), expected_df)
+
+    clean_tmp()
+
+
+def test_dense_factor_prod_with_factor():
+    factor_1 = DenseFactor(data=InMemoryData(create_y_given_x_df()))
+    factor_2 = Factor(data=InMemoryData(create_a_given_x_df()))
+
+    expected_df = Factor(data=InMemoryData(create_y_given_x_df()))\
+        .prod(factor_2).get_df()
+
+    assert_approx_value_df(factor_1.prod(factor_2).get_df(), expected_df)
+
+
+def test_dense_factor_div():
+    factor_1 = DenseFactor(data=InMemoryData(create_y_given_x_df()))
+    factor_2 = DenseFactor(data=InMemoryData(create_a_given_x_df()))
+
+    expected_df = pd.DataFrame([
+        {'A': 0, 'X': 0, 'Y': 0, 'value': 0.625},
+        {'A': 1, 'X': 0, 'Y': 0, 'value': 0.416},
+        {'A': 0, 'X': 0, 'Y': 1, 'value': 1.875},
+        {'A': 1, 'X': 0, 'Y': 1, 'value': 1.25},
+        {'A': 0, 'X': 1, 'Y': 0, 'value': 0.857},
+        {'A': 1, 'X': 1, 'Y': 0, 'value': 2.0},
+        {'A': 0, 'X': 1, 'Y': 1, 'value': 0.571},
+        {'A': 1, 'X': 1, 'Y': 1, 'value': 1.33},
+    ])
+
+    assert_approx_value_df(factor_1.div(factor_2).get_df(), expected_df)
+
+
+def test_dense_factor_sum_and_normalize():
+    factor = DenseFactor(data=InMemoryData(create_y_given_x_df()))
+
+    summed = factor.sum('X')
+    assert summed.get_variables() == ['Y']
+
+    expected_df = pd.DataFrame([
+        {'Y': 0, 'value': 0.85},
+        {'Y': 1, 'value': 1.15},
+    ])
+    assert_approx_value_df(summed.get_df(), expected_df)
+
+    normalized = factor.normalize(['Y'])
+    expected_df = pd.DataFrame([
+        {'X': 0, 'Y': 0, 'value': 0.294},
+        {'X': 0, 'Y': 1, 'value': 0.652},
+        {'X': 1, 'Y': 0, 'value': 0.706},
+        {'X': 1, 'Y': 1, 'value': 0.348},
+    ])
+    assert_approx_value_df(normalized.get_df(), expected_df)
+
+    assert isinstance(summed.sum('Y'), FactorOne)
+
+
+def test_dense_factor_filter():
+    factor = DenseFactor(data=InMemoryData(create_y_given_x_df()))
+
+    filtered = factor.filter(
+        Query(
+            outcomes=[{'Y': lambda df: df['Y'] == 1}],
+            givens=[{'X': 1}]
+        )
+    )
+
+    expected_df = pd.DataFrame([{'X': 1, 'Y': 1, 'value': 0.4}])
+    assert_approx_value_df(filtered.get_df(), expected_df)
+
+    with pytest.raises(ArgumentError):
+        factor.filter({'X': 3})
+
+
+def test_variable_elimination_with_dense_factors(collider_and_descendant):
+    """
+    P(Z|Y) = ∑ P(Z | x, Y) ⨉ P(x)
+             x
+    """
+    algo = VariableElimination(
+        network=collider_and_descendant,
+        query=Query(outcomes=['Z'], givens=['Y']),
+        factor_class=DenseFactor
+    )
+
+    result = algo.compute()
+
+    expected_df = pd.DataFrame([
+        {'Z': 0, 'value': 0.55, 'Y': 0},
+        {'Z': 1, 'value': 0.45, 'Y': 0},
+        {'Z': 0, 'value': 0.45, 'Y': 1},
+        {'Z': 1, 'value': 0.55, 'Y': 1},
+    ])
+
+    assert isinstance(result, DenseFactor)
+    assert_approx_value_df(
+        actual_df=result.get_df(),
+        expected_df=expected_df,
+    )
+
+    clean_tmp()
@@ -1,4 +1,7 @@
+import pytest
+
 from ..linx.directed_acyclic_graph import DirectedAcyclicGraph
+from ..linx.errors import CycleError
 
 
 def test_add_edge():
@@ -273,3 +276,80 @@ def test_multiple_edges_same_direction():
     assert dag.get_children('A') == ['B', 'C']
     assert dag.get_parents('C') == ['A', 'B']
     assert dag.get_parents('B') == ['A']
+
+
+def test_adjacency_indexes():
+    """Parents and nodes are indexed as edges get added."""
+    dag = DirectedAcyclicGraph()
+    dag.add_edge('B', 'C')
+    dag.add_edge('A', 'C')
+    dag.add_edge('A', 'C')
+    dag.add_node('D')
+
+    assert dag.parents == {'C': ['B', 'A']}
+    assert dag.get_nodes() == ['B', 'C', 'A', 'D']
+    assert dag.get_root_nodes() == ['B', 'A', 'D']
+
+
+def test_large_graph():
+    """Every node of a long chain plus a hub."""
+    dag = DirectedAcyclicGraph()
+    size = 5000
+
+    for i in range(1, size):
+        dag.add_edge(f'X{i - 1}', f'X{i}')
+        dag.add_edge('hub', f'X{i}')
+
+    assert len(dag.get_nodes()) == size + 1
+    assert dag.get_root_nodes() == ['X0', 'hub']
+    assert dag.get_parents(f'X{size - 1}') == [f'X{size - 2}', 'hub']
+    assert len(dag.get_children('hub')) == size - 1
+
+
+def test_topological_sort_cycle():
+    """
+    A -> B -> C -> A
+    """
+    dag = DirectedAcyclicGraph()
+    dag.add_edge('D', 'A')
+    dag.add_edge('A', 'B')
+    dag.add_edge('B', 'C')
+    dag.add_edge('C', 'A')
+
+    with pytest.raises(CycleError, match="A"):
+        dag.topological_sort()
+
+
+def test_topological_sort_cached():
+    """The order is only recomputed after structural edits."""
+    dag = DirectedAcyclicGraph()
+    dag.add_edge('B', 'C')
+    dag.add_edge('A', 'B')
+
+    assert dag.topological_sort() == ['A', 'B', 'C']
+    cached = dag.sorted_nodes
+
+    # Mutating the returned list leaves the cache alone.
+    dag.topological_sort().append('Z')
+    dag.add_edge('A', 'B')
+    dag.add_node('C')
+
+    assert dag.sorted_nodes is cached
+    assert dag.topological_sort() == ['A', 'B', 'C']
+
+    dag.add_edge('C', 'D')
+    assert dag.sorted_nodes is None
+    assert dag.topological_sort() == ['A', 'B', 'C', 'D']
+
+    dag.add_node('E')
+    assert dag.topological_sort() == ['A', 'E', 'B', 'C', 'D']
+
+
+def test_topological_sort_large_graph():
+    dag = DirectedAcyclicGraph()
+    size = 5000
+
+    for i in range(size - 1, 0, -1):
+        dag.add_edge(f'X{i - 1}', f'X{i}')
+
+    assert dag.topological_sort() == [f'X{i}' for i in range(size)]
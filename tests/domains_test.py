@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+
+from ..linx.domains import DomainRegistry
+from ..linx.ds import BayesianNetwork, ConditionalProbabilityTable as CPT, \
+    DenseFactor, Query
+from ..linx.infer import VariableElimination
+from .conftest import assert_approx_value_df, clean_tmp
+
+
+def create_float_keyed_network():
+    """
+    proba -> infected <- activity
+    """
+    bayesian_network = BayesianNetwork()
+
+    bayesian_network.add_node(CPT(
+        table=[
+            {'proba': 0.013, 'value': 0.5},
+            {'proba': 0.27, 'value': 0.5},
+        ],
+        outcomes=['proba'],
+    ))
+
+    bayesian_network.add_node(CPT(
+        table=[
+            {'activity': 'singing', 'value': 0.2},
+            {'activity': 'talking', 'value': 0.8},
+        ],
+        outcomes=['activity'],
+    ))
+
+    rows = []
+    for proba in [0.013, 0.27]:
+        for activity, mult in [('singing', 2.0), ('talking', 1.0)]:
+            rows.append({
+                'proba': proba,
+                'activity': activity,
+                'infected': 1,
+                'value': proba * mult
+            })
+            rows.append({
+                'proba': proba,
+                'activity': activity,
+                'infected': 0,
+                'value': 1.0 - proba * mult
+            })
+
+    bayesian_network.add_node(CPT(
+        table=rows,
+        outcomes=['infected'],
+        givens=['proba', 'activity'],
+    ))
+
+    return bayesian_network
+
+
+def test_encode_decode_round_trip():
+    registry = DomainRegistry()
+
+    df = pd.DataFrame([
+        {'proba': 0.27, 'activity': 'talking', 'value': 0.1},
+        {'proba': 0.013, 'activity': 'singing', 'value': 0.9},
+    ])
+    registry.add_df(df)
+
+    encoded = registry.encode_df(df)
+
+    assert list(encoded['proba']) == [1, 0]
+    assert list(encoded['activity']) == [1, 0]
+    assert encoded['proba'].dtype == np.int8
+    assert registry.get_domain_sizes() == {'proba': 2, 'activity': 2}
+
+    decoded = registry.decode_df(encoded)
+    assert list(decoded['proba']) == [0.27, 0.013]
+    assert list(decoded['activity']) == ['talking', 'singing']
+
+
+def test_dtype_grows_with_domain_size():
+    registry = DomainRegistry()
+    registry.add('small', np.arange(100))
+    registry.add('medium', np.arange(1000))
+    registry.add('large', np.arange(40000))
+
+    assert registry.get_dtype('small') == np.int8
+    assert registry.get_dtype('medium') == np.int16
+    assert registry.get_dtype('large') == np.int32
+
+
+def test_encode_filters():
+    registry = DomainRegistry()
+    registry.add('x', [0.5, 1.5, 2.5])
+
+    filters = registry.encode_filters({
+        'x': lambda df: df['x'] > 1.0,
+        'y': 3
+    })
+
+    assert list(filters['x'](pd.DataFrame({'x': [0, 1, 2]}))) == \
+        [False, True, True]
+    assert filters['y'] == 3
+    assert registry.encode_filters({'x': 2.5})['x'] == 2
+
+
+def test_to_markov_network_encode_domains():
+    bayesian_network = create_float_keyed_network()
+
+    markov_network = bayesian_network.to_markov_network(encode_domains=True)
+
+    assert markov_network.domain_registry is not None
+
+    for factor in markov_network.get_factors():
+        df = factor.get_df()
+        for variable in factor.get_variables():
+            assert df[variable].dtype == np.int8
+
+
+def test_variable_elimination_encode_domains():
+    clean_tmp()
+
+    for factor_class in [None, DenseFactor]:
+        query = Query(
+            outcomes=['proba'],
+            givens=[{'infected': 1}, {'activity': lambda df: df['activity']
+                                      == 'talking'}]
+        )
+
+        expected = VariableElimination(
+            network=create_float_keyed_network(),
+            query=query,
+            factor_class=factor_class,
+        ).compute()
+
+        query = Query(
+            outcomes=['proba'],
+            givens=[{'infected': 1}, {'activity': lambda df: df['activity']
+                                      == 'talking'}]
+        )
+
+        actual = VariableElimination(
+            network=create_float_keyed_network(),
+            query=query,
+            factor_class=factor_class,
+            encode_domains=True,
+        ).compute()
+
+        assert set(actual.get_df()['proba']) == {0.013, 0.27}
+        assert_approx_value_df(actual.get_df(), expected.get_df())
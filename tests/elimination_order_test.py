@@ -0,0 +1,265 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ..linx.data import InMemoryData
+from ..linx.elimination_order import (
+    EliminationOrderer,
+    estimate_elimination,
+    get_network_domain_sizes
+)
+from ..linx.errors import ArgumentError
+from ..linx.ds import Factor, Factors, MarkovNetwork, Query
+from ..linx.infer import VariableElimination
+from ..linx.variable_elimination import min_fill_edges
+from .conftest import assert_approx_value_df, clean_tmp, create_grid_df
+
+
+def create_factor(variables, size=2):
+    df = create_grid_df({var: size for var in variables})
+    df['value'] = 1.0
+
+    return Factor(InMemoryData(df))
+
+
+def create_network(scopes, sizes=None):
+    if sizes is None:
+        sizes = {}
+
+    markov_network = MarkovNetwork()
+
+    for scope in scopes:
+        size = max([sizes.get(var, 2) for var in scope])
+        markov_network.add_factor(create_factor(scope, size=size))
+
+    return markov_network
+
+
+def test_min_fill_counts_fill_edges():
+    r"""
+    A - B - C, B - D. Eliminating B requires connecting A, C, and D, i.e.
+    3 fill edges, even though the clique has 4 variables.
+    """
+    network = create_network([['A', 'B'], ['B', 'C'], ['B', 'D']])
+
+    orderer = EliminationOrderer(network, heuristic='min_fill')
+
+    assert orderer.get_score('B') == 3
+    assert orderer.get_score('A') == 0
+    assert orderer.choose(['B', 'A']) == 'A'
+
+
+def test_min_degree():
+    network = create_network([['A', 'B'], ['B', 'C'], ['B', 'D']])
+
+    orderer = EliminationOrderer(network, heuristic='min_degree')
+
+    assert orderer.get_score('B') == 3
+    assert orderer.get_score('C') == 1
+
+
+def test_min_fill_edges_matches_variable_elimination():
+    network = create_network(
+        [['A', 'B'], ['B', 'C'], ['B', 'D'], ['D', 'E'], ['C', 'E']]
+    )
+
+    orderer = EliminationOrderer(network, heuristic='min_fill_edges')
+
+    assert orderer.get_score('B') == 4
+    assert orderer.get_score('A') == 2
+
+    for eliminateables in [
+        ['A', 'B', 'C', 'D', 'E'],
+        ['E', 'D', 'C', 'B', 'A'],
+        ['B', 'C', 'D'],
+    ]:
+        assert orderer.choose(eliminateables) == \
+            min_fill_edges(eliminateables, network)[0]
+
+
+def test_min_weight_and_weighted_min_fill():
+    network = create_network([['A', 'B'], ['B', 'C']])
+    domain_sizes = {'A': 10, 'B': 2, 'C': 3}
+
+    orderer = EliminationOrderer(
+        network, heuristic='min_weight', domain_sizes=domain_sizes
+    )
+
+    assert orderer.get_score('A') == 20
+    assert orderer.get_score('B') == 60
+    assert orderer.get_score('C') == 6
+
+    orderer = EliminationOrderer(
+        network, heuristic='weighted_min_fill', domain_sizes=domain_sizes
+    )
+
+    assert orderer.get_score('B') == 30
+    assert orderer.get_score('A') == 0
+
+
+def test_domain_sizes_from_factors():
+    network = create_network([['A', 'B'], ['B', 'C']], sizes={'C': 3})
+
+    orderer = EliminationOrderer(network, heuristic='min_weight')
+
+    # B takes 2 values in the first factor, so only 2 of its 3 values in the
+    # second factor could survive the product.
+    assert orderer.get_score('C') == 6
+
+
+def test_eliminate_updates_graph_incrementally():
+    network = create_network([['A', 'B'], ['B', 'C'], ['C', 'D']])
+
+    orderer = EliminationOrderer(network, heuristic='min_fill')
+
+    assert orderer.eliminate('B') == {'A', 'B', 'C'}
+    assert orderer.get_neighbors('A') == {'C'}
+    assert orderer.get_neighbors('C') == {'A', 'D'}
+    assert orderer.get_score('C') == 1
+
+    rebuilt = EliminationOrderer(
+        create_network([['A', 'C'], ['C', 'D']]),
+        heuristic='min_fill'
+    )
+
+    for var in ['A', 'C', 'D']:
+        assert orderer.get_score(var) == rebuilt.get_score(var)
+
+
+def test_get_order():
+    network = create_network([['A', 'B'], ['B', 'C'], ['B', 'D']])
+
+    order = EliminationOrderer(network).get_order(['A', 'B', 'C', 'D'])
+
+    assert set(order) == {'A', 'B', 'C', 'D'}
+    assert order.index('B') > 0
+
+
+def test_unknown_heuristic():
+    with pytest.raises(ArgumentError):
+        EliminationOrderer(create_network([['A']]), heuristic='unknown')
+
+
+def test_variable_elimination_with_precomputed_order(
+    collider_and_descendant
+):
+    expected_df = pd.DataFrame([
+        {'Z': 0, 'value': 0.55, 'Y': 0},
+        {'Z': 1, 'value': 0.45, 'Y': 0},
+        {'Z': 0, 'value': 0.45, 'Y': 1},
+        {'Z': 1, 'value': 0.55, 'Y': 1},
+    ])
+
+    for kwargs in [
+        {'greedy_heuristic': 'min_fill'},
+        {'greedy_heuristic': 'weighted_min_fill'},
+        {'elimination_order': ['A', 'X', 'Z']},
+    ]:
+        algo = VariableElimination(
+            network=collider_and_descendant,
+            query=Query(outcomes=['Z'], givens=['Y']),
+            **kwargs
+        )
+
+        assert_approx_value_df(
+            actual_df=algo.compute().get_df(),
+            expected_df=expected_df,
+        )
+
+    algo = VariableElimination(
+        network=collider_and_descendant,
+        query=Query(outcomes=['Z'], givens=['Y']),
+        elimination_order=['A']
+    )
+
+    with pytest.raises(ArgumentError):
+        algo.compute()
+
+    clean_tmp()
+
+
+def test_estimate_elimination(collider_and_descendant):
+    estimate = estimate_elimination(
+        collider_and_descendant,
+        Query(outcomes=['Z'], givens=['Y'])
+    )
+
+    order = estimate.get_order()
+    assert set(order[:2]) == {'A', 'X'}
+    assert order[2] == 'Z'
+    assert estimate.get_induced_width() == 2
+
+    steps = {
+        step['variable']: step for step in estimate.get_steps()
+        if step['variable'] is not None
+    }
+
+    assert steps['X']['clique'] == ['X', 'Y', 'Z']
+    assert steps['X']['scope'] == ['Y', 'Z']
+    assert steps['X']['rows'] == 4
+    assert steps['X']['bytes'] == 4 * 3 * 8
+    assert steps['Z']['scope'] == ['Y']
+    assert estimate.get_peak_rows() == 4
+
+    clean_tmp()
+
+
+def test_estimate_elimination_with_evidence(collider_and_descendant):
+    estimate = estimate_elimination(
+        collider_and_descendant,
+        Query(outcomes=['Z'], givens=[{'Y': 1}]),
+        domain_sizes={'X': 2, 'Y': 2, 'Z': 2, 'A': 10},
+        bytes_per_value=4,
+    )
+
+    steps = {
+        step['variable']: step for step in estimate.get_steps()
+        if step['variable'] is not None
+    }
+
+    assert steps['X']['rows'] == 2
+    assert steps['A']['clique'] == ['A', 'Z']
+    assert steps['A']['rows'] == 2
+    assert estimate.get_peak_bytes() == 2 * 3 * 4
+
+    clean_tmp()
+
+
+def test_estimate_elimination_order_matches_variable_elimination(
+    monkeypatch
+):
+    rng = np.random.default_rng(0)
+    variables = [f'V{i}' for i in range(9)]
+    order = []
+    sum_product = Factors.sum_product
+
+    def recording_sum_product(self, var):
+        order.append(var)
+        return sum_product(self, var)
+
+    monkeypatch.setattr(Factors, 'sum_product', recording_sum_product)
+
+    for _ in range(30):
+        scopes = [
+            list(rng.choice(variables, size=rng.integers(1, 4), replace=False))
+            for _ in range(8)
+        ] + [[var] for var in variables]
+        network = create_network(scopes)
+        query = Query(outcomes=[str(rng.choice(variables))])
+
+        order.clear()
+        VariableElimination(network=network, query=query).compute()
+
+        assert order == estimate_elimination(network, query).get_order()
+
+
+def test_network_domain_sizes(collider_and_descendant):
+    assert get_network_domain_sizes(collider_and_descendant) == {
+        'X': 2, 'Y': 2, 'Z': 2, 'A': 2
+    }
+
+    assert get_network_domain_sizes(
+        collider_and_descendant.to_markov_network(encode_domains=True)
+    ) == {'X': 2, 'Y': 2, 'Z': 2, 'A': 2}
+
+    clean_tmp()
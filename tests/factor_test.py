@@ -1,9 +1,12 @@
+import numpy as np
 import pandas as pd
 import pytest
-from ..linx.data import ParquetData
+from ..linx import data as data_module
+from ..linx.data import InMemoryData, ParquetData
 from ..linx.ds import ConditionalProbabilityTable as CPT, Factor
 from ..linx.errors import ArgumentError
 from ..linx.query import Query
+from ..linx.settings import is_debug, set_debug
 
 from .conftest import assert_approx_value_df, get_tmp_path, clean_tmp
 
@@ -302,3 +305,89 @@ def test_factor_filter():
         new_factor.get_df(),
         expected_df,
     )
+
+
+def test_in_memory_data_read_does_not_copy_values():
+    df = pd.DataFrame([
+        {'X': 0, 'value': 0.25},
+        {'X': 1, 'value': 0.75},
+    ])
+
+    data = InMemoryData(df)
+
+    assert data.read() is not df
+    assert np.shares_memory(
+        data.read()['value'].to_numpy(),
+        df['value'].to_numpy()
+    )
+
+    mutable = data.read(copy=True)
+    mutable.loc[:, 'value'] = 0.0
+
+    assert data.read()['value'].tolist() == [0.25, 0.75]
+
+
+def test_in_memory_data_read_copies_without_copy_on_write(monkeypatch):
+    df = pd.DataFrame([
+        {'X': 0, 'value': 0.25},
+        {'X': 1, 'value': 0.75},
+    ])
+
+    data = InMemoryData(df)
+
+    monkeypatch.setattr(data_module, 'is_copy_on_write', lambda: False)
+
+    read = data.read()
+    assert not np.shares_memory(
+        read['value'].to_numpy(),
+        df['value'].to_numpy()
+    )
+
+    read.loc[:, 'value'] = 0.0
+    assert data.read()['value'].tolist() == [0.25, 0.75]
+
+
+def test_factor_operations_do_not_mutate_inputs():
+    x_df = pd.DataFrame([
+        {'X': 0, 'value': 0.25},
+        {'X': 1, 'value': 0.75},
+    ])
+    y_df = pd.DataFrame([
+        {'Y': 0, 'value': 0.5},
+        {'Y': 1, 'value': 1.5},
+    ])
+
+    factor_x = Factor(InMemoryData(x_df))
+    factor_y = Factor(InMemoryData(y_df))
+
+    product = factor_x.prod(factor_y)
+    product.normalize()
+    product.normalize(['X'])
+
+    assert set(product.get_variables()) == {'X', 'Y'}
+    assert list(factor_x.get_df().columns) == ['X', 'value']
+    assert factor_x.get_df()['value'].tolist() == [0.25, 0.75]
+    assert factor_y.get_df()['value'].tolist() == [0.5, 1.5]
+    assert 'cross-join' not in product.get_df().columns
+
+
+def test_validate_skipped_unless_debug():
+    duplicated = pd.DataFrame([
+        {'X': 0, 'value': 0.25},
+        {'X': 0, 'value': 0.75},
+    ])
+
+    with pytest.raises(ArgumentError):
+        Factor(InMemoryData(duplicated))
+
+    factor = Factor(InMemoryData(duplicated), validate=False)
+    assert factor.get_variables() == ['X']
+
+    assert not is_debug()
+    set_debug(True)
+
+    try:
+        with pytest.raises(ArgumentError):
+            Factor(InMemoryData(duplicated), validate=False)
+    finally:
+        set_debug(False)
@@ -2,9 +2,12 @@ import pytest
 
 import pandas as pd
 
-from ..linx.ds import Factors, Factor
-from .conftest import clean_tmp, get_tmp_path
-from ..linx.data import ParquetData
+from ..linx import factor as factor_module
+from ..linx.ds import DenseFactor, Factors, Factor
+from ..linx.factor_one import FactorOne
+from .conftest import assert_approx_value_df, clean_tmp, create_grid_df, \
+    get_tmp_path
+from ..linx.data import InMemoryData, ParquetData
 
 
 def test_subscriptable(two_factors):
@@ -166,3 +169,146 @@ def test_get_filters():
     assert all(filtered[2].get_df()['A'] == 0)
 
     clean_tmp()
+
+
+def create_sum_product_factors(factor_class):
+    df1 = pd.DataFrame([
+        {'X': 0, 'value': 0.7},
+        {'X': 1, 'value': 0.3},
+    ])
+
+    df2 = pd.DataFrame([
+        {'X': 0, 'Y': 0, 'value': 0.4},
+        {'X': 0, 'Y': 1, 'value': 0.6},
+        {'X': 1, 'Y': 0, 'value': 0.9},
+        {'X': 1, 'Y': 1, 'value': 0.1},
+    ])
+
+    df3 = pd.DataFrame([
+        {'X': 0, 'A': 0, 'value': 0.2},
+        {'X': 0, 'A': 1, 'value': 0.8},
+        {'X': 1, 'A': 1, 'value': 1.0},
+    ])
+
+    return Factors([
+        factor_class(ParquetData(df, storage_folder=get_tmp_path()))
+        for df in [df1, df2, df3]
+    ])
+
+
+@pytest.mark.parametrize("factor_class", [Factor, DenseFactor])
+def test_sum_product(factor_class):
+    clean_tmp()
+
+    factors = create_sum_product_factors(factor_class)
+
+    expected_df = factors.prod().sum('X').get_df()
+    result = factors.sum_product('X')
+
+    assert isinstance(result, factor_class)
+    assert set(result.get_variables()) == {'Y', 'A'}
+    assert_approx_value_df(result.get_df(), expected_df)
+
+    clean_tmp()
+
+
+def test_sum_product_single_variable():
+    clean_tmp()
+
+    factors = create_sum_product_factors(Factor)
+
+    assert isinstance(Factors([factors[0]]).sum_product('X'), FactorOne)
+
+    clean_tmp()
+
+
+def create_grid_factor(sizes, seed):
+    df = create_grid_df(sizes)
+    df['value'] = (df.index.to_numpy() * seed % 7 + 1) / 7.0
+
+    return Factor(InMemoryData(df))
+
+
+def count_multiplications(monkeypatch):
+    calls = []
+    multiply_dfs = factor_module.multiply_dfs
+
+    def counting(left_df, right_df):
+        calls.append(1)
+        return multiply_dfs(left_df, right_df)
+
+    monkeypatch.setattr(factor_module, 'multiply_dfs', counting)
+
+    return calls
+
+
+def test_sum_product_splits_on_fewest_values(monkeypatch):
+    factors = Factors([
+        create_grid_factor({'X': 10, 'Y': 2, 'A': 3}, seed=3),
+        create_grid_factor({'X': 10, 'Y': 2, 'B': 2}, seed=5),
+    ])
+
+    expected_df = factors.prod().sum('X').get_df()
+
+    calls = count_multiplications(monkeypatch)
+    result = factors.sum_product('X')
+
+    # One product per value of Y rather than per value of X.
+    assert len(calls) == 2
+    assert set(result.get_variables()) == {'Y', 'A', 'B'}
+    assert_approx_value_df(result.get_df(), expected_df)
+
+
+def test_sum_product_falls_back_past_max_split_values(monkeypatch):
+    factors = [
+        create_grid_factor({'X': 10, 'A': 3}, seed=3),
+        create_grid_factor({'X': 10, 'B': 2}, seed=5),
+        create_grid_factor({'X': 10}, seed=2),
+    ]
+
+    expected_df = Factors(factors).prod().sum('X').get_df()
+
+    calls = count_multiplications(monkeypatch)
+    result = factor_module.sum_product_by_value(
+        factors, 'X', max_split_values=5
+    )
+
+    # The tables get multiplied whole, once per pair.
+    assert len(calls) == 2
+    assert_approx_value_df(result.get_df(), expected_df)
+
+    calls.clear()
+    sliced = factor_module.sum_product_by_value(factors, 'X')
+
+    assert len(calls) == 2 * 10
+    assert_approx_value_df(sliced.get_df(), expected_df)
+
+
+def test_get_prod_plan():
+    clean_tmp()
+
+    df1 = pd.DataFrame([
+        {'X': x, 'Y': y, 'value': 0.04} for x in range(5) for y in range(5)
+    ])
+    df2 = pd.DataFrame([{'W': w, 'value': 0.2} for w in range(5)])
+    df3 = pd.DataFrame([{'X': x, 'value': 0.2} for x in range(5)])
+
+    factors = Factors([
+        Factor(ParquetData(df, storage_folder=get_tmp_path()))
+        for df in [df1, df2, df3]
+    ])
+
+    steps, cost = factors.get_prod_plan()
+
+    # X,Y with X first (25 rows), then with W (125 rows), rather than
+    # X,Y with W first (125 rows), then with X (125 rows).
+    assert steps == [(0, 2), (1, 3)]
+    assert cost == 150
+
+    result = factors.prod()
+    expected = factors[0].prod(factors[1]).prod(factors[2])
+
+    assert set(result.get_variables()) == {'X', 'Y', 'W'}
+    assert_approx_value_df(result.get_df(), expected.get_df())
+
+    clean_tmp()
@@ -0,0 +1,205 @@
+import pandas as pd
+import pytest
+
+from ..linx.ds import BayesianNetwork, ConditionalProbabilityTable as CPT, \
+    DenseFactor, Query
+from ..linx.errors import ArgumentError
+from ..linx.infer import JunctionTree, VariableElimination
+from .conftest import assert_approx_value_df, clean_tmp
+
+
+def variable_elimination_df(network, outcome, evidence):
+    query = Query(
+        outcomes=[outcome],
+        givens=[{key: value} for key, value in evidence.items()]
+    )
+
+    df = VariableElimination(network=network, query=query).compute().get_df()
+
+    return df[[outcome, 'value']]
+
+
+def test_cliques(collider_and_descendant):
+    junction_tree = JunctionTree(collider_and_descendant)
+
+    cliques = junction_tree.get_cliques()
+
+    assert set(cliques) == {
+        frozenset({'X', 'Y', 'Z'}),
+        frozenset({'Z', 'A'}),
+    }
+
+    clean_tmp()
+
+
+@pytest.mark.parametrize("factor_class", [None, DenseFactor])
+def test_marginals_match_variable_elimination(
+    collider_and_descendant,
+    factor_class
+):
+    evidence = {'A': 1}
+
+    junction_tree = JunctionTree(
+        collider_and_descendant,
+        evidence=evidence,
+        factor_class=factor_class
+    )
+    junction_tree.calibrate()
+
+    for outcome in ['X', 'Y', 'Z']:
+        expected_df = variable_elimination_df(
+            collider_and_descendant, outcome, evidence
+        )
+
+        assert_approx_value_df(
+            junction_tree.marginal([outcome]).get_df(),
+            expected_df
+        )
+
+    clean_tmp()
+
+
+def test_marginal_without_evidence(collider_and_descendant):
+    junction_tree = JunctionTree(collider_and_descendant)
+
+    expected_df = pd.DataFrame([
+        {'X': 0, 'Y': 0, 'value': 0.28},
+        {'X': 0, 'Y': 1, 'value': 0.42},
+        {'X': 1, 'Y': 0, 'value': 0.12},
+        {'X': 1, 'Y': 1, 'value': 0.18},
+    ])
+
+    assert_approx_value_df(
+        junction_tree.marginal(['X', 'Y']).get_df(),
+        expected_df
+    )
+
+    with pytest.raises(ArgumentError):
+        junction_tree.marginal(['X', 'A'])
+
+    clean_tmp()
+
+
+def test_calibrate_reuses_messages(collider_and_descendant):
+    junction_tree = JunctionTree(collider_and_descendant, evidence={'Y': 0})
+    junction_tree.calibrate()
+
+    messages = dict(junction_tree.messages)
+    assert len(messages) == 2
+
+    junction_tree.marginal('A')
+    junction_tree.marginal('X')
+
+    for edge, message in messages.items():
+        assert junction_tree.messages[edge] is message
+
+    clean_tmp()
+
+
+def create_binary_child_cpt(given, outcome, proba_given_1, proba_given_0):
+    return CPT(
+        table=[
+            {given: 1, outcome: 1, 'value': proba_given_1},
+            {given: 1, outcome: 0, 'value': 1.0 - proba_given_1},
+            {given: 0, outcome: 1, 'value': proba_given_0},
+            {given: 0, outcome: 0, 'value': 1.0 - proba_given_0},
+        ],
+        outcomes=[outcome],
+        givens=[given]
+    )
+
+
+def test_longer_network_matches_variable_elimination():
+    r"""
+    A -> B -> C -> D
+    |
+    v
+    E
+    """
+    bayesian_network = BayesianNetwork()
+    bayesian_network.add_nodes([
+        CPT(
+            table=[{'A': 1, 'value': 0.3}, {'A': 0, 'value': 0.7}],
+            outcomes=['A']
+        ),
+        create_binary_child_cpt('A', 'B', 0.8, 0.1),
+        create_binary_child_cpt('B', 'C', 0.7, 0.4),
+        create_binary_child_cpt('C', 'D', 0.9, 0.2),
+        create_binary_child_cpt('A', 'E', 0.6, 0.3),
+    ])
+
+    evidence = {'D': 1}
+    junction_tree = JunctionTree(bayesian_network, evidence=evidence)
+
+    assert len(junction_tree.get_cliques()) == 4
+
+    expected = {'A': 0.357, 'B': 0.392, 'C': 0.814, 'E': 0.407}
+
+    for outcome in ['A', 'B', 'C', 'E']:
+        df = junction_tree.marginal(outcome).get_df()
+        assert df[df[outcome] == 1]['value'].iloc[0] == \
+            pytest.approx(expected[outcome], abs=0.001)
+
+        assert_approx_value_df(
+            df,
+            variable_elimination_df(bayesian_network, outcome, evidence)
+        )
+
+
+def test_set_and_retract_evidence(collider_and_descendant):
+    junction_tree = JunctionTree(collider_and_descendant)
+    junction_tree.calibrate()
+
+    cliques = junction_tree.get_cliques()
+    xyz = cliques.index(frozenset({'X', 'Y', 'Z'}))
+    za = cliques.index(frozenset({'Z', 'A'}))
+
+    towards_za = junction_tree.messages[(xyz, za)]
+
+    junction_tree.set_evidence({'A': 1})
+
+    # Only the message flowing away from the clique holding A is stale.
+    assert (za, xyz) not in junction_tree.messages
+    assert junction_tree.messages[(xyz, za)] is towards_za
+
+    for outcome in ['X', 'Y', 'Z']:
+        assert_approx_value_df(
+            junction_tree.marginal(outcome).get_df(),
+            variable_elimination_df(
+                collider_and_descendant, outcome, {'A': 1}
+            )
+        )
+
+    assert junction_tree.messages[(xyz, za)] is towards_za
+
+    junction_tree.set_evidence({'A': 0})
+
+    assert_approx_value_df(
+        junction_tree.marginal('X').get_df(),
+        variable_elimination_df(collider_and_descendant, 'X', {'A': 0})
+    )
+
+    junction_tree.set_evidence({'Y': 1})
+    assert (xyz, za) not in junction_tree.messages
+
+    assert_approx_value_df(
+        junction_tree.marginal('X').get_df(),
+        variable_elimination_df(
+            collider_and_descendant, 'X', {'A': 0, 'Y': 1}
+        )
+    )
+
+    junction_tree.retract_evidence(['A', 'Y'])
+    assert junction_tree.get_evidence() == {}
+
+    expected_df = pd.DataFrame([
+        {'X': 0, 'value': 0.7},
+        {'X': 1, 'value': 0.3},
+    ])
+
+    assert_approx_value_df(
+        junction_tree.marginal('X').get_df(),
+        expected_df
+    )
+
+    clean_tmp()
@@ -2,6 +2,7 @@ import pytest
 import numpy as np
 import pandas as pd
 from ..linx.log_factor import LogFactor
+from ..linx.log_factor_adapter import LogFactorAdapter
 from ..linx.data import ParquetData
 
 from .conftest import (assert_approx_value_df, get_tmp_path, clean_tmp)
@@ -93,3 +94,61 @@ def test_log_factor_subtract():
         new_log_factor.data.read(),
         expected_df,
     )
+
+
+def test_log_factor_logsumexp():
+    clean_tmp()
+
+    # Values tiny enough that exponentiating them underflows to 0.
+    df = pd.DataFrame([
+        {'x': 0, 'y': 0, 'value': -1000.0},
+        {'x': 0, 'y': 1, 'value': -1000.0 + np.log(2)},
+        {'x': 0, 'y': 2, 'value': -1000.0 + np.log(3)},
+        {'x': 1, 'y': 0, 'value': np.log(0.2)},
+        {'x': 1, 'y': 1, 'value': -np.inf},
+        {'x': 1, 'y': 2, 'value': np.log(0.3)},
+        {'x': 2, 'y': 0, 'value': -np.inf},
+        {'x': 2, 'y': 1, 'value': -np.inf},
+        {'x': 2, 'y': 2, 'value': -np.inf},
+    ])
+
+    log_factor = LogFactor(
+        ParquetData(df, storage_folder=get_tmp_path()),
+        validate=False
+    )
+
+    summed = log_factor.logsumexp('y').data.read().sort_values('x')
+
+    assert summed['x'].tolist() == [0, 1, 2]
+    assert summed['value'].iloc[0] == pytest.approx(-1000.0 + np.log(6))
+    assert summed['value'].iloc[1] == pytest.approx(np.log(0.5))
+    assert summed['value'].iloc[2] == -np.inf
+
+
+def test_log_factor_adapter_sum_stays_in_log_space():
+    clean_tmp()
+
+    df = pd.DataFrame([
+        {'x': 0, 'y': 0, 'value': 1e-300},
+        {'x': 0, 'y': 1, 'value': 1e-300},
+        {'x': 1, 'y': 0, 'value': 0.25},
+        {'x': 1, 'y': 1, 'value': 0.5},
+    ])
+
+    factor = LogFactorAdapter(
+        data=ParquetData(df, storage_folder=get_tmp_path())
+    )
+
+    log_df = factor.sum('y').log_factor.get_data().read().sort_values('x')
+
+    assert log_df['value'].tolist() == pytest.approx(
+        [np.log(2e-300), np.log(0.75)]
+    )
+
+    assert_approx_value_df(
+        factor.sum('y').get_df(),
+        pd.DataFrame([
+            {'x': 0, 'value': 2e-300},
+            {'x': 1, 'value': 0.75},
+        ])
+    )
@@ -1,8 +1,9 @@
 import pandas as pd
 
-from ..linx.data import ParquetData
+from ..linx.data import InMemoryData, ParquetData
 from ..linx.ds import MarkovNetwork, ConditionalProbabilityTable as CPT, \
-    Factor, Query
+    DenseFactor, Factor, Query
+from ..linx.infer import VariableElimination
 from .conftest import (assert_approx_value_df, clean_tmp, get_tmp_path)
 
 
@@ -208,3 +209,77 @@ def test_remove_factors():
     factors = markov_network.get_factors()
     assert len(factors) == 1
     assert factor_2 in factors
+
+
+def test_to_markov_network_converts_factors(collider_and_descendant):
+    markov_network = collider_and_descendant.to_markov_network()
+    query = Query(outcomes=['Z'], givens=[{'Y': 1}])
+
+    expected_df = VariableElimination(
+        network=collider_and_descendant,
+        query=query
+    ).compute().get_df()
+
+    dense = markov_network.to_markov_network(factor_class=DenseFactor)
+
+    assert dense is not markov_network
+    assert all(
+        isinstance(factor, DenseFactor) for factor in dense.get_factors()
+    )
+    assert all(
+        isinstance(factor, Factor) for factor in markov_network.get_factors()
+    )
+
+    for factor_class, encode_domains in [
+        (None, False),
+        (DenseFactor, False),
+        (None, True),
+    ]:
+        result = VariableElimination(
+            network=markov_network,
+            query=query,
+            factor_class=factor_class,
+            encode_domains=encode_domains
+        ).compute()
+
+        assert_approx_value_df(
+            actual_df=result.get_df(),
+            expected_df=expected_df
+        )
+
+    # The factors of the network the computations ran on are left as is.
+    assert len(markov_network.get_factors()) == 4
+
+    clean_tmp()
+
+
+def test_factors_sharing_a_scope():
+    markov_network = MarkovNetwork()
+
+    for values in [(0.9, 0.1), (0.1, 0.9)]:
+        markov_network.add_factor(
+            Factor(
+                InMemoryData(
+                    pd.DataFrame([
+                        {'X': x, 'value': value}
+                        for x, value in enumerate(values)
+                    ])
+                )
+            )
+        )
+
+    assert len(markov_network.get_factors()) == 2
+    assert len(markov_network.to_markov_network().get_factors()) == 2
+
+    result = VariableElimination(
+        network=markov_network,
+        query=Query(outcomes=['X'])
+    ).compute()
+
+    assert_approx_value_df(
+        actual_df=result.get_df(),
+        expected_df=pd.DataFrame([
+            {'X': 0, 'value': 0.5},
+            {'X': 1, 'value': 0.5},
+        ])
+    )
@@ -0,0 +1,212 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ..linx.data import InMemoryData, PartitionedParquetData
+from ..linx.ds import BayesianNetwork, ConditionalProbabilityTable as CPT, \
+    Factor, Factors, Query
+from ..linx.errors import ArgumentError
+from ..linx.infer import VariableElimination
+from ..linx.out_of_core import get_bucket_ids
+from .conftest import assert_approx_value_df, clean_tmp, create_grid_df, \
+    get_tmp_path
+
+
+def create_df(variables, seed, size=3):
+    rng = np.random.default_rng(seed)
+    df = create_grid_df({var: size for var in variables})
+    df['value'] = rng.uniform(0.1, 1.0, size=df.shape[0])
+
+    return df
+
+
+def create_factors(df, batch_size=4, num_partitions=3):
+    in_memory = Factor(InMemoryData(df))
+    partitioned = Factor(
+        PartitionedParquetData(
+            df,
+            storage_folder=get_tmp_path(),
+            batch_size=batch_size,
+            num_partitions=num_partitions
+        )
+    )
+
+    return in_memory, partitioned
+
+
+def assert_same(actual, expected):
+    actual_df = actual.get_df()
+    expected_df = expected.get_df()
+
+    assert actual_df.shape == expected_df.shape
+    assert_approx_value_df(actual_df, expected_df, abs_tol=1e-9)
+
+
+def test_partitioned_data_round_trip():
+    clean_tmp()
+
+    df = create_df(['X', 'Y'], seed=0)
+
+    data = PartitionedParquetData(
+        df, storage_folder=get_tmp_path(), batch_size=4
+    )
+
+    assert len(data.get_paths()) == 3
+    assert list(data.get_columns()) == ['X', 'Y', 'value']
+    assert data.read().shape == df.shape
+    assert data.get_nbytes() > 0
+
+    with pytest.raises(ArgumentError):
+        PartitionedParquetData(
+            df, storage_folder=get_tmp_path(), name=data.name
+        )
+
+    clean_tmp()
+
+
+def test_bucket_ids_ignore_integer_width():
+    df = pd.DataFrame({'X': [0, 1, 2, 3], 'value': [1.0] * 4})
+
+    np.testing.assert_array_equal(
+        get_bucket_ids(df, ['X'], 7),
+        get_bucket_ids(df.astype({'X': 'int8'}), ['X'], 7)
+    )
+    np.testing.assert_array_equal(
+        get_bucket_ids(df, ['X'], 4),
+        get_bucket_ids(df.astype({'X': 'float64'}), ['X'], 4)
+    )
+
+
+def test_prod_int_and_float_keys():
+    clean_tmp()
+
+    left_df = create_df(['X', 'Y'], seed=7, size=6)
+    right_df = create_df(['Y', 'Z'], seed=8, size=6)
+    right_df = right_df.astype({'Y': 'float64'})
+
+    left, partitioned_left = create_factors(left_df, num_partitions=4)
+    right, partitioned_right = create_factors(right_df, num_partitions=4)
+
+    expected = left.prod(right)
+
+    assert expected.get_df().shape[0] == 6 ** 3
+    assert_same(partitioned_left.prod(partitioned_right), expected)
+
+    clean_tmp()
+
+
+@pytest.mark.parametrize("left_vars,right_vars", [
+    (['X', 'Y'], ['Y', 'Z']),
+    (['X', 'Y'], ['X', 'Y']),
+    (['X'], ['Z']),
+])
+def test_prod_and_div(left_vars, right_vars):
+    clean_tmp()
+
+    left, partitioned_left = create_factors(create_df(left_vars, seed=1))
+    right, partitioned_right = create_factors(create_df(right_vars, seed=2))
+
+    assert_same(partitioned_left.prod(partitioned_right), left.prod(right))
+    assert_same(partitioned_left.prod(right), left.prod(right))
+    assert_same(partitioned_left.div(partitioned_right), left.div(right))
+
+    clean_tmp()
+
+
+def test_prod_reads_one_partition_at_a_time(monkeypatch):
+    clean_tmp()
+
+    pairs = [
+        create_factors(create_df(variables, seed=seed))
+        for seed, variables in enumerate([['X', 'Y'], ['Y', 'Z'], ['Z']])
+    ]
+
+    expected = Factors([in_memory for in_memory, _ in pairs]).prod()
+
+    def read(self, copy=False):
+        raise AssertionError("Every partition got loaded at once")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(PartitionedParquetData, 'read', read)
+
+        assert pairs[0][1].get_domain_sizes() == {'X': 3, 'Y': 3}
+
+        actual = Factors([partitioned for _, partitioned in pairs]).prod()
+
+    assert_same(actual, expected)
+
+    clean_tmp()
+
+
+def test_sum_filter_normalize():
+    clean_tmp()
+
+    factor, partitioned = create_factors(create_df(['X', 'Y', 'Z'], seed=3))
+
+    assert_same(partitioned.sum('Y'), factor.sum('Y'))
+    assert_same(partitioned.normalize(), factor.normalize())
+    assert_same(partitioned.normalize(['X']), factor.normalize(['X']))
+
+    filters = {'X': 1, 'Z': lambda df: df['Z'] > 0}
+    assert_same(partitioned.filter(filters), factor.filter(filters))
+
+    with pytest.raises(ArgumentError):
+        partitioned.filter({'X': 10})
+
+    clean_tmp()
+
+
+@pytest.mark.parametrize("var", ['Y', 'X'])
+def test_sum_product(var):
+    clean_tmp()
+
+    factor_1, partitioned_1 = create_factors(create_df(['X', 'Y'], seed=4))
+    factor_2, partitioned_2 = create_factors(create_df(['Y', 'Z'], seed=5))
+    factor_3, _ = create_factors(create_df(['X', 'W'], seed=6))
+
+    expected = Factors([factor_1, factor_2, factor_3]).prod().sum(var)
+
+    assert_same(
+        Factors([factor_1, partitioned_2, factor_3]).sum_product(var),
+        expected
+    )
+    assert_same(
+        Factors([partitioned_1, partitioned_2, factor_3]).sum_product(var),
+        expected
+    )
+
+    clean_tmp()
+
+
+def test_variable_elimination(collider_and_descendant):
+    network = BayesianNetwork()
+
+    for rv in collider_and_descendant.get_random_variables().values():
+        network.add_node(
+            CPT(
+                PartitionedParquetData(
+                    rv.get_data().read(),
+                    storage_folder=get_tmp_path(),
+                    batch_size=2,
+                    num_partitions=2
+                ),
+                outcomes=rv.get_outcomes(),
+                givens=rv.get_givens()
+            )
+        )
+
+    query = Query(outcomes=['Z'], givens=[{'Y': 1}])
+
+    result = VariableElimination(network=network, query=query).compute()
+
+    assert isinstance(result.get_data(), PartitionedParquetData)
+
+    assert_approx_value_df(
+        actual_df=result.get_df(),
+        expected_df=VariableElimination(
+            network=collider_and_descendant,
+            query=query
+        ).compute().get_df()
+    )
+
+    clean_tmp()
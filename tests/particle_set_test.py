@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ..linx.ds import Particle, ParticleSet
+
+
+def test_append_grows_in_place():
+    particles = ParticleSet(variables=['x'], capacity=2)
+
+    for i in range(5):
+        particle = Particle({'x': i, 'label': f'p{i}'})
+
+        if i % 2:
+            particle.accept()
+        else:
+            particle.reject()
+
+        particles.append(particle)
+
+    assert len(particles) == 5
+    assert particles.capacity == 8
+    assert particles.get_values('x').dtype == np.int64
+    assert particles['x'].tolist() == [0, 1, 2, 3, 4]
+    assert particles['label'].tolist() == ['p0', 'p1', 'p2', 'p3', 'p4']
+    assert particles.get_acceptance_rate() == pytest.approx(0.4)
+
+    # Values that don't fit widen the dtype.
+    particles.append({'x': 0.5})
+    assert particles['x'].dtype == np.float64
+    assert particles['x'][-1] == 0.5
+    assert particles['label'][-1] is None
+
+    # Variables showing up late are missing for earlier particles.
+    particles.append({'y': 1})
+    assert np.isnan(particles['y'][:-1]).all()
+    assert particles['y'][-1] == 1
+
+
+def test_append_marks_missing_values():
+    particles = ParticleSet()
+
+    particles.append({'x': 1, 'y': 0.5, 'label': 'a', 'flag': True})
+    particles.append({'x': 2})
+
+    assert particles['x'].tolist() == [1, 2]
+    assert particles['x'].dtype == np.int64
+
+    assert np.isnan(particles['y'][-1])
+    assert particles['label'][-1] is None
+
+    # Integers and booleans could not hold NaN.
+    particles.append({'y': 1.5})
+
+    assert particles['x'].dtype == np.float64
+    assert particles['x'][:2].tolist() == [1.0, 2.0]
+    assert np.isnan(particles['x'][-1])
+    assert particles['flag'].dtype == np.float64
+    assert particles['flag'][0] == 1.0
+    assert np.isnan(particles['flag'][1:]).all()
+    assert particles['y'][-1] == 1.5
+
+
+def test_indexing_and_iteration():
+    particles = ParticleSet.from_columns(
+        {'x': np.arange(4), 'y': np.array([0.1, 0.2, 0.3, 0.4])},
+        status=[1, -1, 1, 0]
+    )
+
+    particle = particles[-2]
+    assert isinstance(particle, Particle)
+    assert particle.get_value('x') == 2
+    assert particle.is_accepted()
+
+    with pytest.raises(IndexError):
+        particles[4]
+
+    subset = particles[1:3]
+    assert isinstance(subset, ParticleSet)
+    assert subset['x'].tolist() == [1, 2]
+    assert subset.get_status().tolist() == [-1, 1]
+
+    # Slices share the values of the set they come from.
+    assert np.shares_memory(subset['y'], particles['y'])
+
+    masked = particles[particles['y'] > 0.25]
+    assert masked['x'].tolist() == [2, 3]
+
+    assert [p.get_value('x') for p in particles] == [0, 1, 2, 3]
+    assert [p.is_rejected() for p in particles] == [False, True, False, False]
+
+    with pytest.raises(ValueError):
+        ParticleSet.from_columns({'x': [1, 2], 'y': [1]})
+
+
+def test_to_df_and_stats():
+    particles = ParticleSet(variables={'x': float, 'label': object})
+
+    for i in range(101):
+        particles.append({'x': float(i), 'label': 'a'})
+
+    df = particles.to_df()
+    assert isinstance(df, pd.DataFrame)
+    assert df.shape == (101, 2)
+    assert df['x'].sum() == 5050
+
+    stats = particles.get_stats(quantiles=(0.1, 0.5))
+
+    assert list(stats.index) == ['x']
+    assert list(stats.columns) == ['mean', 'std', 'min', '0.1', '0.5', 'max']
+    assert stats.loc['x', 'mean'] == 50
+    assert stats.loc['x', '0.1'] == 10
+    assert stats.loc['x', 'max'] == 100
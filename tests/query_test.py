@@ -1,4 +1,7 @@
-from ..linx.ds import Query
+import pandas as pd
+
+from ..linx.ds import Query, Range
+from ..linx.query import get_pushdown_filters
 
 
 def test_query_get_outcome_variables():
@@ -47,3 +50,34 @@ def test_query_get_filters_without_givens():
     assert 'A' not in keys
     assert 'X' not in keys
     assert 'Z' not in keys
+
+
+def test_range():
+    df = pd.DataFrame({'X': [1, 2, 3, 4, 5]})
+
+    assert Range('X', low=2, high=4)(df).tolist() == \
+        [False, True, True, True, False]
+    assert Range('X', low=2, include_low=False)(df).tolist() == \
+        [False, False, True, True, True]
+    assert Range('X', high=4, include_high=False)(df).tolist() == \
+        [True, True, True, False, False]
+
+    assert Range('X', low=2, high=4).get_pushdown_filters() == \
+        [('X', '>=', 2), ('X', '<=', 4)]
+
+
+def test_get_pushdown_filters():
+    filters = {
+        'X': 1,
+        'Y': Range('Y', high=3),
+        'Z': lambda df: df['Z'] > 1,
+        'W': 0,
+    }
+
+    assert get_pushdown_filters(filters, ['X', 'Y', 'Z']) == [
+        ('X', '==', 1),
+        ('Y', '<=', 3),
+    ]
+
+    assert Query(outcomes=[{'Y': Range('Y', high=3)}]).get_cache_key() \
+        is not None
@@ -0,0 +1,133 @@
+import gc
+
+import pandas as pd
+import pytest
+
+from ..linx.data import InMemoryData, ParquetData
+from ..linx.ds import Factor, Query
+from ..linx.errors import ArgumentError
+from ..linx.infer import StoragePolicy, VariableElimination
+from ..linx.log_factor_adapter import LogFactorAdapter
+from .conftest import assert_approx_value_df, clean_tmp, get_tmp_path
+
+
+def create_factor(variable, size):
+    return Factor(
+        InMemoryData(
+            pd.DataFrame([
+                {variable: i, 'value': 1.0 / size} for i in range(size)
+            ])
+        )
+    )
+
+
+def test_spill_threshold():
+    clean_tmp()
+
+    policy = StoragePolicy(get_tmp_path(), spill_threshold=1000)
+
+    small = create_factor('X', 2)
+    big = create_factor('Y', 100)
+
+    small_data = policy(small.get_df())
+    assert isinstance(small_data, InMemoryData)
+    assert policy.get_memory_used() == small.get_nbytes()
+
+    big_data = policy(big.get_df())
+    assert isinstance(big_data, ParquetData)
+    assert policy.get_stats()['spilled'] == 1
+
+    del small_data
+    gc.collect()
+
+    assert policy.get_memory_used() == 0
+
+    clean_tmp()
+
+
+def test_memory_budget():
+    clean_tmp()
+
+    df = create_factor('X', 10).get_df()
+    nbytes = int(df.memory_usage(deep=True).sum())
+
+    policy = StoragePolicy(get_tmp_path(), memory_budget=nbytes)
+
+    first = policy(df)
+    assert isinstance(first, InMemoryData)
+
+    # The budget is taken by the first.
+    assert isinstance(policy(df), ParquetData)
+
+    del first
+    gc.collect()
+
+    assert isinstance(policy(df), InMemoryData)
+
+    clean_tmp()
+
+
+def test_factors_inherit_policy():
+    clean_tmp()
+
+    policy = StoragePolicy(get_tmp_path(), spill_threshold=1000)
+
+    x = Factor(create_factor('X', 2).get_data(), storage_policy=policy)
+    y = create_factor('Y', 100)
+
+    product = x.prod(y)
+    assert isinstance(product.get_data(), ParquetData)
+    assert product.storage_policy is policy
+
+    marginal = product.sum('Y')
+    assert isinstance(marginal.get_data(), InMemoryData)
+
+    assert_approx_value_df(
+        actual_df=marginal.get_df(),
+        expected_df=pd.DataFrame([
+            {'X': 0, 'value': 0.5},
+            {'X': 1, 'value': 0.5},
+        ])
+    )
+
+    clean_tmp()
+
+
+def test_variable_elimination(collider_and_descendant):
+    policy = StoragePolicy(get_tmp_path(), spill_threshold=0)
+    query = Query(outcomes=['Z'], givens=[{'Y': 1}])
+
+    result = VariableElimination(
+        network=collider_and_descendant,
+        query=query,
+        storage_policy=policy
+    ).compute()
+
+    assert isinstance(result.get_data(), ParquetData)
+    assert policy.get_stats()['spilled'] > 0
+
+    assert_approx_value_df(
+        actual_df=result.get_df(),
+        expected_df=VariableElimination(
+            network=collider_and_descendant,
+            query=query
+        ).compute().get_df()
+    )
+
+    with pytest.raises(ArgumentError):
+        VariableElimination(
+            network=collider_and_descendant,
+            query=query,
+            factor_class=LogFactorAdapter,
+            storage_policy=policy
+        )
+
+    with pytest.raises(ArgumentError):
+        VariableElimination(
+            network=collider_and_descendant,
+            query=query,
+            space='log',
+            storage_policy=policy
+        )
+
+    clean_tmp()
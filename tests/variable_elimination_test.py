@@ -1,3 +1,5 @@
+import gc
+
 import pytest
 import numpy as np
 import pandas as pd
@@ -488,3 +490,141 @@ def test_nothing_to_eliminate():
     ]['value'].values[0] > 0.5
 
     clean_tmp()
+
+
+@pytest.mark.parametrize("query", [
+    Query(outcomes=['Z'], givens=['Y']),
+    Query(outcomes=['A'], givens=[{'X': 1}]),
+    Query(outcomes=['X', 'Y']),
+])
+def test_log_space(collider_and_descendant, query):
+    expected = VariableElimination(
+        network=collider_and_descendant,
+        query=query,
+    ).compute()
+
+    result = VariableElimination(
+        network=collider_and_descendant,
+        query=query,
+        space='log',
+    ).compute()
+
+    assert_approx_value_df(
+        actual_df=result.get_df(),
+        expected_df=expected.get_df()
+    )
+
+    clean_tmp()
+
+
+def test_log_space_does_not_underflow():
+    """
+    The joint probabilities are around 1e-400, which is 0 in float64. The
+    posterior is still well defined: P(X=0 | Y=1, Z=1) = 1/7.
+    """
+    clean_tmp()
+
+    bayesian_network = BayesianNetwork()
+
+    bayesian_network.add_nodes([
+        CPT(
+            ParquetData(
+                pd.DataFrame([
+                    {'X': 0, 'value': 0.5},
+                    {'X': 1, 'value': 0.5},
+                ]),
+                storage_folder=get_tmp_path()
+            ),
+            outcomes=['X']
+        ),
+        CPT(
+            ParquetData(
+                pd.DataFrame([
+                    {'X': 0, 'Y': 0, 'value': 1.0 - 1e-200},
+                    {'X': 0, 'Y': 1, 'value': 1e-200},
+                    {'X': 1, 'Y': 0, 'value': 1.0 - 2e-200},
+                    {'X': 1, 'Y': 1, 'value': 2e-200},
+                ]),
+                storage_folder=get_tmp_path()
+            ),
+            outcomes=['Y'],
+            givens=['X']
+        ),
+        CPT(
+            ParquetData(
+                pd.DataFrame([
+                    {'X': 0, 'Z': 0, 'value': 1.0 - 1e-200},
+                    {'X': 0, 'Z': 1, 'value': 1e-200},
+                    {'X': 1, 'Z': 0, 'value': 1.0 - 3e-200},
+                    {'X': 1, 'Z': 1, 'value': 3e-200},
+                ]),
+                storage_folder=get_tmp_path()
+            ),
+            outcomes=['Z'],
+            givens=['X']
+        ),
+    ])
+
+    result = VariableElimination(
+        network=bayesian_network,
+        query=Query(outcomes=['X'], givens=[{'Y': 1}, {'Z': 1}]),
+        space='log',
+    ).compute()
+
+    assert_approx_value_df(
+        actual_df=result.get_df(),
+        expected_df=pd.DataFrame([
+            {'X': 0, 'Y': 1, 'Z': 1, 'value': 1 / 7},
+            {'X': 1, 'Y': 1, 'Z': 1, 'value': 6 / 7},
+        ])
+    )
+
+    clean_tmp()
+
+
+def test_intermediate_files_get_deleted(collider_and_descendant):
+    before = set(get_tmp_path().iterdir())
+
+    algo = VariableElimination(
+        network=collider_and_descendant,
+        query=Query(outcomes=['Z'], givens=[{'Y': 1}]),
+    )
+    result = algo.compute()
+
+    assert not list(get_tmp_path().glob('scratch-*'))
+    assert result.get_data().path.exists()
+
+    assert_approx_value_df(
+        actual_df=result.get_df(),
+        expected_df=pd.DataFrame([
+            {'Y': 1, 'Z': 0, 'value': 0.45},
+            {'Y': 1, 'Z': 1, 'value': 0.55},
+        ])
+    )
+
+    del algo
+    del result
+    gc.collect()
+
+    assert set(get_tmp_path().iterdir()) == before
+
+    clean_tmp()
+
+
+def test_markov_network_factors_left_untouched(collider_and_descendant):
+    markov_network = collider_and_descendant.to_markov_network()
+    factors = list(markov_network.get_factors())
+
+    VariableElimination(
+        network=markov_network,
+        query=Query(outcomes=['Z'], givens=[{'Y': 1}]),
+    ).compute()
+
+    assert not list(get_tmp_path().glob('scratch-*'))
+    assert all(factor.scratch_folder is None for factor in factors)
+
+    # Deriving from them still writes next to their data.
+    product = factors[0].prod(factors[1])
+    assert product.get_data().path.exists()
+
+    clean_tmp()